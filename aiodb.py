@@ -0,0 +1,157 @@
+"""asyncio front end for db.py.
+
+:class:`AsyncDB` exposes the db.py functions as coroutines, with ``db_path`` filled
+in. Reads run concurrently on a thread pool where every worker keeps its own open
+connection; writes are queued to one writer thread. Whatever writes are waiting when
+the writer becomes free are committed together in a single transaction (group
+commit), each in its own savepoint, so one failing call does not undo the others::
+
+    async with AsyncDB("school.db") as adb:
+        rows = await adb.search_courses("math", limit=20)
+        await asyncio.gather(*(adb.register_student(s, "C1") for s in ids))
+"""
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+
+import db as DB
+from dbpool import open_connection
+
+READS = [
+    "list_students", "get_student", "search_students",
+    "list_instructors", "get_instructor", "search_instructors",
+    "list_courses", "get_course", "search_courses",
+    "list_registrations_for_student", "list_registrations_for_course",
+    "students_by_id", "instructors_by_id", "courses_by_id", "list_waitlist", "list_course_slots",
+]
+WRITES = [
+    "add_student", "update_student", "delete_student",
+    "add_instructor", "update_instructor", "delete_instructor",
+    "add_course", "update_course", "delete_course",
+    "register_student", "unregister_student",
+    "delete_students", "delete_instructors", "delete_courses", "delete_where",
+    "assign_instructor_bulk", "reassign_courses", "set_course_capacity", "set_course_slots",
+]
+
+GROUP_MAX = 256  # most writes committed by one transaction
+
+
+class AsyncDB:
+    def __init__(self, db_path: str = DB.DEFAULT_DB, readers: int = 4, group_max: int = GROUP_MAX):
+        DB.init_db(db_path)
+        self.db_path, self.group_max = db_path, group_max
+        self._local = threading.local()
+        self._cons: List = []
+        self._cons_lock = threading.Lock()
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="aiodb-read")
+        self._jobs = queue.Queue()
+        self.batches = 0  # transactions committed by the writer thread
+        self._writer = threading.Thread(target=self._write_loop, name="aiodb-write", daemon=True)
+        self._writer.start()
+
+    # generic entry points (also usable with stats.*, changelog.*, ...) ----------
+    async def read(self, fn, *args, **kwargs):
+        """Run the blocking read ``fn`` on a pooled connection (pass ``db_path`` yourself)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._call_read, fn, args, kwargs)
+
+    async def write(self, fn, *args, **kwargs):
+        """Queue the blocking write ``fn`` for the next group commit (pass ``db_path`` yourself)."""
+        fut = Future()
+        self._jobs.put((fut, fn, args, kwargs))
+        return await asyncio.wrap_future(fut)
+
+    def _call_read(self, fn, args, kwargs):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = open_connection(self.db_path)
+            with self._cons_lock:
+                self._cons.append(con)
+        with DB.bind(con, self.db_path):
+            return fn(*args, **kwargs)
+
+    def _next_batch(self):
+        job = self._jobs.get()
+        if job is None:
+            return None
+        batch = [job]
+        while len(batch) < self.group_max:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:  # close() requested: finish this batch, then stop
+                self._jobs.put(None)
+                break
+            batch.append(job)
+        return [j for j in batch if j[0].set_running_or_notify_cancel()]
+
+    def _write_loop(self):
+        con = open_connection(self.db_path, timeout=DB.WRITE_BUSY_TIMEOUT)
+        try:
+            with DB.bind(con, self.db_path):
+                while True:
+                    batch = self._next_batch()
+                    if batch is None:
+                        return
+                    if batch:
+                        self._commit(batch)
+        finally:
+            con.close()
+
+    def _commit(self, batch):
+        outcomes = []
+        try:
+            with DB.writer(self.db_path):
+                for fut, fn, args, kwargs in batch:
+                    try:  # db.writer inside fn opens a savepoint on the bound connection
+                        outcomes.append((fut, True, fn(*args, **kwargs)))
+                    except Exception as e:
+                        outcomes.append((fut, False, e))
+        except Exception as e:  # BEGIN/COMMIT failed: nothing in the batch was written
+            for fut, *_ in batch:
+                fut.set_exception(e)
+            return
+        self.batches += 1
+        for fut, ok, value in outcomes:
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+
+    # lifecycle ----------------------------------------------------------------
+    async def close(self):
+        self._jobs.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, self._writer.join)
+        self._readers.shutdown(wait=True)
+        with self._cons_lock:
+            for con in self._cons:
+                con.close()
+            self._cons.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def _mirror(name: str, write: bool):
+    fn = getattr(DB, name)
+
+    async def method(self, *args, **kwargs):
+        kwargs.setdefault("db_path", self.db_path)
+        return await (self.write if write else self.read)(fn, *args, **kwargs)
+
+    method.__name__, method.__qualname__ = name, f"AsyncDB.{name}"
+    method.__doc__ = f"Coroutine version of :func:`db.{name}`."
+    return method
+
+
+for _name in READS:
+    setattr(AsyncDB, _name, _mirror(_name, write=False))
+for _name in WRITES:
+    setattr(AsyncDB, _name, _mirror(_name, write=True))
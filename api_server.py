@@ -0,0 +1,274 @@
+"""Local HTTP/JSON API over db.py (standard library only).
+
+Reads run on a :class:`dbpool.ReadPool`; every write goes through one
+:class:`dbpool.SerialWriter` thread. Connections are kept alive (HTTP/1.1) and list
+endpoints are paginated and streamed with chunked transfer encoding.
+
+Endpoints (``{kind}`` is ``students``, ``instructors`` or ``courses``)::
+
+    GET    /{kind}?q=&limit=&offset=     list or search, one page
+    GET    /{kind}/{id}                  one record
+    POST   /{kind}                       create (JSON body with all fields)
+    PATCH  /{kind}/{id}                  update (JSON body, ``new_id`` renames; courses take ``capacity``)
+    DELETE /{kind}/{id}
+    GET    /students/{id}/courses        courses a student is registered in
+    GET    /courses/{id}/students        students registered in a course
+    POST   /registrations                {"student_id": ..., "course_id": ...[, "waitlist": false]}
+                                         201 registered, 202 waitlisted, 409 full
+    DELETE /registrations/{student_id}/{course_id}   reports who was promoted from the waitlist
+
+Usage::
+
+    python api_server.py --port 8000 --readers 4
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import db as DB
+from dbpool import ReadPool, SerialWriter
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+CHUNK_ITEMS = 200
+
+RESOURCES = {
+    "students": dict(list=DB.list_students, search=DB.search_students, get=DB.get_student,
+                     add=DB.add_student, update=DB.update_student, delete=DB.delete_student,
+                     fields=("student_id", "name", "age", "email"), updatable=("name", "age", "email")),
+    "instructors": dict(list=DB.list_instructors, search=DB.search_instructors, get=DB.get_instructor,
+                        add=DB.add_instructor, update=DB.update_instructor, delete=DB.delete_instructor,
+                        fields=("instructor_id", "name", "age", "email"), updatable=("name", "age", "email")),
+    "courses": dict(list=DB.list_courses, search=DB.search_courses, get=DB.get_course,
+                    add=DB.add_course, update=DB.update_course, delete=DB.delete_course,
+                    fields=("course_id", "course_name", "instructor_id"), extras=("capacity",),
+                    updatable=("course_name", "instructor_id", "capacity")),
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    server: "ApiServer"
+
+    # routing -------------------------------------------------------------
+    ROUTES = [
+        ("GET", re.compile(r"^/students/([^/]+)/courses$"), "student_courses"),
+        ("GET", re.compile(r"^/courses/([^/]+)/students$"), "course_students"),
+        ("POST", re.compile(r"^/registrations$"), "register"),
+        ("DELETE", re.compile(r"^/registrations/([^/]+)/([^/]+)$"), "unregister"),
+        ("GET", re.compile(r"^/(students|instructors|courses)$"), "list"),
+        ("POST", re.compile(r"^/(students|instructors|courses)$"), "create"),
+        ("GET", re.compile(r"^/(students|instructors|courses)/([^/]+)$"), "get"),
+        ("PATCH", re.compile(r"^/(students|instructors|courses)/([^/]+)$"), "update"),
+        ("DELETE", re.compile(r"^/(students|instructors|courses)/([^/]+)$"), "delete"),
+    ]
+
+    def do_GET(self): self._dispatch("GET")
+    def do_POST(self): self._dispatch("POST")
+    def do_PATCH(self): self._dispatch("PATCH")
+    def do_DELETE(self): self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            body = self._read_body()
+            for m, rx, name in self.ROUTES:
+                match = rx.match(url.path)
+                if m == method and match:
+                    return getattr(self, "h_" + name)(*(unquote(g) for g in match.groups()), body=body)
+            raise ApiError(404, "no such endpoint")
+        except ApiError as e:
+            self._json(e.status, {"error": str(e)})
+        except DB.WriteTimeout as e:
+            self._json(503, {"error": str(e)}, {"Retry-After": "1"})
+        except sqlite3.IntegrityError as e:
+            self._json(409, {"error": str(e)})
+        except (ValueError, TypeError, KeyError) as e:
+            self._json(400, {"error": f"bad request: {e}"})
+
+    def _read_body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        if not n:
+            return None
+        try:
+            return json.loads(self.rfile.read(n))
+        except json.JSONDecodeError as e:
+            raise ApiError(400, f"invalid JSON: {e}")
+
+    # responses -----------------------------------------------------------
+    def _json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, text: str):
+        data = text.encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def _stream(self, items, **meta):
+        """Send ``{"items": [...], **meta}`` in chunks of CHUNK_ITEMS items."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._chunk('{"items": [')
+        for i in range(0, len(items), CHUNK_ITEMS):
+            self._chunk(("," if i else "") + ",".join(json.dumps(r) for r in items[i:i + CHUNK_ITEMS]))
+        self._chunk("]" + "".join(f", {json.dumps(k)}: {json.dumps(v)}" for k, v in meta.items()) + "}")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _page_args(self):
+        limit = min(int(self.query.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        offset = int(self.query.get("offset", 0))
+        if limit < 1 or offset < 0:
+            raise ApiError(400, "limit must be >= 1 and offset >= 0")
+        return limit, offset
+
+    def _read(self, fn, *args, **kwargs):
+        return self.server.readers.run(fn, *args, **kwargs)
+
+    def _write(self, fn, *args, **kwargs):
+        return self.server.writer.run(fn, *args, **kwargs)
+
+    # handlers ------------------------------------------------------------
+    def h_list(self, kind, body=None):
+        res, db_path = RESOURCES[kind], self.server.db_path
+        limit, offset = self._page_args()
+        q = self.query.get("q", "").strip()
+        # one extra row tells us whether another page exists
+        if q:
+            rows = self._read(res["search"], q, db_path, limit=limit + 1, offset=offset)
+        else:
+            rows = self._read(res["list"], db_path, limit=limit + 1, offset=offset)
+        more = len(rows) > limit
+        self._stream(rows[:limit], limit=limit, offset=offset, next_offset=offset + limit if more else None)
+
+    def h_get(self, kind, key, body=None):
+        row = self._read(RESOURCES[kind]["get"], key, self.server.db_path)
+        if row is None:
+            raise ApiError(404, f"{kind[:-1]} not found: {key}")
+        self._json(200, row)
+
+    def h_create(self, kind, body=None):
+        res = RESOURCES[kind]
+        if not isinstance(body, dict):
+            raise ApiError(400, "expected a JSON object")
+        optional = {"instructor_id"}
+        missing = [f for f in res["fields"] if f not in body and f not in optional]
+        if missing:
+            raise ApiError(400, f"missing fields: {', '.join(missing)}")
+        extras = {f: body[f] for f in res.get("extras", ()) if f in body}
+        self._write(res["add"], *(body.get(f) for f in res["fields"]), self.server.db_path, **extras)
+        self._json(201, self._read(res["get"], body[res["fields"][0]], self.server.db_path))
+
+    def h_update(self, kind, key, body=None):
+        res, db_path = RESOURCES[kind], self.server.db_path
+        if not isinstance(body, dict):
+            raise ApiError(400, "expected a JSON object")
+        unknown = set(body) - set(res["updatable"]) - {"new_id"}
+        if unknown:
+            raise ApiError(400, f"unknown fields: {', '.join(sorted(unknown))}")
+        current = self._read(res["get"], key, db_path)
+        if current is None:
+            raise ApiError(404, f"{kind[:-1]} not found: {key}")
+        if kind == "courses" and "capacity" in body:
+            self._write(self._update_course, key, body, current, db_path)
+        else:
+            if kind == "courses" and "instructor_id" not in body:
+                body["instructor_id"] = current["instructor_id"]  # update_course always writes it
+            self._write(res["update"], key, db_path=db_path, **body)
+        self._json(200, self._read(res["get"], body.get("new_id") or key, db_path))
+
+    @staticmethod
+    def _update_course(key, body, current, db_path):
+        """update_course and set_course_capacity (which promotes from the waitlist) in one transaction."""
+        fields = {k: v for k, v in body.items() if k != "capacity"}
+        with DB.transaction(db_path):
+            if fields:
+                fields.setdefault("instructor_id", current["instructor_id"])
+                DB.update_course(key, db_path=db_path, **fields)
+            DB.set_course_capacity(fields.get("new_id") or key, body["capacity"], db_path)
+
+    def h_delete(self, kind, key, body=None):
+        res = RESOURCES[kind]
+        if self._read(res["get"], key, self.server.db_path) is None:
+            raise ApiError(404, f"{kind[:-1]} not found: {key}")
+        self._write(res["delete"], key, self.server.db_path)
+        self._json(200, {"deleted": key})
+
+    def h_student_courses(self, sid, body=None):
+        self._stream(self._read(DB.list_registrations_for_student, sid, self.server.db_path))
+
+    def h_course_students(self, cid, body=None):
+        self._stream(self._read(DB.list_registrations_for_course, cid, self.server.db_path))
+
+    def h_register(self, body=None):
+        if not isinstance(body, dict) or not body.get("student_id") or not body.get("course_id"):
+            raise ApiError(400, "student_id and course_id are required")
+        status = self._write(DB.register_student, body["student_id"], body["course_id"], self.server.db_path,
+                             waitlist=body.get("waitlist", True) is not False)
+        self._json(201 if status == DB.REGISTERED else 202 if status == DB.WAITLISTED else 409,
+                   {"student_id": body["student_id"], "course_id": body["course_id"], "status": status})
+
+    def h_unregister(self, sid, cid, body=None):
+        promoted = self._write(DB.unregister_student, sid, cid, self.server.db_path)
+        self._json(200, {"deleted": {"student_id": sid, "course_id": cid}, "promoted": promoted})
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, db_path=DB.DEFAULT_DB, readers=4, verbose=False):
+        DB.init_db(db_path)
+        self.db_path, self.verbose = db_path, verbose
+        self.readers = ReadPool(db_path, readers)
+        self.writer = SerialWriter(db_path)
+        super().__init__(address, Handler)
+
+    def server_close(self):
+        super().server_close()
+        self.writer.close()
+        self.readers.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--db", default=DB.DEFAULT_DB)
+    ap.add_argument("--readers", type=int, default=4, help="pooled read connections")
+    ap.add_argument("--verbose", action="store_true", help="log every request")
+    a = ap.parse_args(argv)
+    srv = ApiServer((a.host, a.port), a.db, a.readers, a.verbose)
+    print(f"Serving {a.db} on http://{a.host}:{srv.server_address[1]}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""Deduplicated backups of the school database in a local store.
+
+Every backup splits the database file into its pages and stores each page once,
+under the SHA-256 of its content, so a page that did not change since an earlier
+backup costs nothing but a 32-byte reference. Disk use and write time grow with
+the number of changed pages, not with the size of the database; reading and
+hashing the file stays linear, at a few hundred MB/s.
+
+Store layout::
+
+    <store>/chunks/ab/cdef...        one zlib-compressed page, named by its SHA-256
+    <store>/manifests/<id>.manifest  zlib(<JSON header> b"\\n" <32-byte digest per page>)
+
+The header records the page size, page count, the schema version and a SHA-256
+over the page digests, which vouches for the page list as a whole. Chunks are
+written before the manifest that references them, so an interrupted backup leaves
+at most unreferenced chunks, which :func:`prune` deletes. Snapshot ids are UTC
+timestamps (``20261019T120000Z``) and sort by age.
+
+The pages are read under a shared lock (a read transaction), so the copy is
+consistent while writers wait briefly; a database in WAL mode is first copied
+with the SQLite backup API.
+
+:func:`prune` keeps the newest backup plus the newest one in each of the last
+``hourly`` hours, ``daily`` days and ``weekly`` weeks (see :data:`RETENTION`) and
+deletes chunks no kept backup references. :func:`restore` and :func:`verify`
+check the manifest digest and every chunk against its digest; :func:`verify`
+reads each chunk once however many backups share it. The maintenance scheduler
+(``maintenance.py``) takes a backup and prunes every hour; one process should
+manage a store at a time.
+
+Usage::
+
+    python backup_store.py backup --db school.db [--store school.backups]
+    python backup_store.py list --store school.backups
+    python backup_store.py verify [ID...] --store school.backups
+    python backup_store.py restore latest restored.db --store school.backups [--replace]
+    python backup_store.py prune --store school.backups [--hourly 24 --daily 7 --weekly 4]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Set
+
+import db as DB
+
+STORE_ENV = "SCHOOL_BACKUP_STORE"
+RETENTION: Dict[str, int] = {"hourly": 24, "daily": 7, "weekly": 4}
+PERIODS = {"hourly": 3600, "daily": 86400, "weekly": 7 * 86400}
+DIGEST = 32  # bytes of SHA-256
+LEVEL = 1    # zlib level for chunks: level 6 is 4x slower for 4% less
+
+_lock = threading.Lock()  # backup and prune of one process never overlap
+
+
+class BackupError(ValueError):
+    """The store is missing, corrupt, or does not hold the requested backup."""
+
+
+class Snapshot(NamedTuple):
+    id: str
+    created: float
+    page_size: int
+    pages: int
+    size: int
+    digest: str       # SHA-256 of the page digests, in page order
+    user_version: int
+    new_chunks: int   # pages this backup added to the store
+    new_bytes: int    # compressed bytes this backup added to the store
+
+    def __str__(self):
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
+        return (f"{self.id}  {when}  {self.size} bytes ({self.pages} pages), "
+                f"{self.new_chunks} new pages, {self.new_bytes} bytes added")
+
+
+def default_store(db_path: str = DB.DEFAULT_DB) -> str:
+    """``$SCHOOL_BACKUP_STORE``, else ``<db name>.backups`` next to the database."""
+    return os.environ.get(STORE_ENV) or os.path.splitext(os.path.abspath(db_path))[0] + ".backups"
+
+
+def _chunk_path(store: str, digest: bytes) -> str:
+    h = digest.hex()
+    return os.path.join(store, "chunks", h[:2], h[2:])
+
+
+def _manifest_path(store: str, snap_id: str) -> str:
+    return os.path.join(store, "manifests", snap_id + ".manifest")
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# manifests -------------------------------------------------------------------
+def _read_manifest(store: str, snap_id: str, digests: bool = True):
+    """``(Snapshot, [digest per page])``; with ``digests=False`` only the header is decompressed."""
+    try:
+        with open(_manifest_path(store, snap_id), "rb") as f:
+            data = f.read()
+        raw = zlib.decompress(data) if digests else zlib.decompressobj().decompress(data, 4096)
+        head, _, body = raw.partition(b"\n")
+        snap = Snapshot(**json.loads(head))
+    except FileNotFoundError:
+        raise BackupError(f"no backup {snap_id!r} in {store}") from None
+    except (zlib.error, ValueError, TypeError) as e:
+        raise BackupError(f"backup {snap_id}: unreadable manifest ({e})") from None
+    if not digests:
+        return snap, None
+    if len(body) != snap.pages * DIGEST or hashlib.sha256(body).hexdigest() != snap.digest:
+        raise BackupError(f"backup {snap_id}: page list does not match the manifest digest")
+    return snap, [body[i:i + DIGEST] for i in range(0, len(body), DIGEST)]
+
+
+def snapshots(store: str) -> List[Snapshot]:
+    """Every backup in ``store``, oldest first."""
+    d = os.path.join(store, "manifests")
+    if not os.path.isdir(d):
+        return []
+    ids = sorted(n[:-len(".manifest")] for n in os.listdir(d) if n.endswith(".manifest"))
+    return [_read_manifest(store, i, digests=False)[0] for i in ids]
+
+
+def _resolve(store: str, snap_id: str) -> str:
+    if snap_id != "latest":
+        return snap_id
+    snaps = snapshots(store)
+    if not snaps:
+        raise BackupError(f"no backups in {store}")
+    return snaps[-1].id
+
+
+# backup ----------------------------------------------------------------------
+@contextmanager
+def _consistent_file(db_path: str) -> Iterator[BinaryIO]:
+    """The database file, open for reading, unchanged for the duration of the block."""
+    con = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if con.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            # the main file lags behind the WAL; take a copy through the backup API
+            with tempfile.TemporaryDirectory(prefix="backup_") as d:
+                copy = sqlite3.connect(os.path.join(d, "copy.db"))
+                try:
+                    con.backup(copy)
+                finally:
+                    copy.close()
+                with open(os.path.join(d, "copy.db"), "rb") as f:
+                    yield f
+            return
+        con.execute("BEGIN")
+        con.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()  # shared lock until ROLLBACK
+        try:
+            with open(db_path, "rb") as f:
+                yield f
+        finally:
+            con.execute("ROLLBACK")
+    finally:
+        con.close()
+
+
+def _new_id(store: str) -> str:
+    base = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    snap_id, n = base, 1
+    while os.path.exists(_manifest_path(store, snap_id)):
+        n += 1
+        snap_id = f"{base}-{n}"
+    return snap_id
+
+
+def backup(db_path: str = DB.DEFAULT_DB, store: Optional[str] = None) -> Snapshot:
+    """Add a backup of ``db_path`` to ``store``; only pages not stored yet are written."""
+    if not os.path.exists(db_path):
+        raise BackupError(f"{db_path} does not exist")
+    store = store or default_store(db_path)
+    with _lock:
+        snaps = snapshots(store)
+        known: Set[bytes] = set(_read_manifest(store, snaps[-1].id)[1]) if snaps else set()
+        created = time.time()
+        with _consistent_file(db_path) as f:
+            header = f.read(100)
+            page_size = int.from_bytes(header[16:18], "big")
+            page_size = 65536 if page_size == 1 else page_size
+            user_version = int.from_bytes(header[60:64], "big")
+            f.seek(0)
+            digests, new_chunks, new_bytes = [], 0, 0
+            while True:
+                page = f.read(page_size)
+                if not page:
+                    break
+                digest = hashlib.sha256(page).digest()
+                digests.append(digest)
+                if digest in known:
+                    continue
+                known.add(digest)
+                path = _chunk_path(store, digest)
+                if not os.path.exists(path):
+                    data = zlib.compress(page, LEVEL)
+                    _write_atomic(path, data)
+                    new_chunks, new_bytes = new_chunks + 1, new_bytes + len(data)
+        snap = Snapshot(_new_id(store), created, page_size, len(digests), len(digests) * page_size,
+                        hashlib.sha256(b"".join(digests)).hexdigest(), user_version, new_chunks, new_bytes)
+        head = json.dumps(snap._asdict(), separators=(",", ":")).encode()
+        _write_atomic(_manifest_path(store, snap.id), zlib.compress(head + b"\n" + b"".join(digests), LEVEL))
+    return snap
+
+
+# restore and verify ----------------------------------------------------------
+def _page(store: str, n: int, digest: bytes) -> bytes:
+    """Page ``n`` from its chunk, checked against its digest; raises :class:`BackupError`."""
+    try:
+        with open(_chunk_path(store, digest), "rb") as f:
+            page = zlib.decompress(f.read())
+    except FileNotFoundError:
+        raise BackupError(f"page {n}: chunk {digest.hex()} is missing") from None
+    except zlib.error:
+        raise BackupError(f"page {n}: chunk {digest.hex()} is corrupt") from None
+    if hashlib.sha256(page).digest() != digest:
+        raise BackupError(f"page {n}: chunk {digest.hex()} does not match its digest")
+    return page
+
+
+def restore(store: str, snap_id: str, dest: str, replace: bool = False) -> Snapshot:
+    """Rebuild backup ``snap_id`` (or ``"latest"``) as ``dest``, checking every digest.
+
+    ``dest`` must not exist unless ``replace`` is set; it is only replaced once the
+    whole file has been rebuilt and checked. Close every connection to ``dest`` first.
+    """
+    snap, digests = _read_manifest(store, _resolve(store, snap_id))
+    if os.path.exists(dest) and not replace:
+        raise BackupError(f"{dest} already exists (use replace=True)")
+    for suffix in ("-journal", "-wal"):
+        if os.path.exists(dest + suffix):
+            raise BackupError(f"{dest}{suffix} exists: close every connection to {dest} first")
+    tmp = f"{dest}.{os.getpid()}.restore"
+    try:
+        with open(tmp, "wb") as f:
+            for n, digest in enumerate(digests, 1):
+                f.write(_page(store, n, digest))
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return snap
+
+
+def verify(store: str, snap_ids: Optional[List[str]] = None) -> List[str]:
+    """Check backups (all by default) as :func:`restore` would, without writing a file.
+
+    Each chunk is read and hashed once however many backups share it. Returns a
+    list of problems (empty when every backup restores intact).
+    """
+    problems, checked = [], set()
+    for snap_id in snap_ids or [s.id for s in snapshots(store)]:
+        try:
+            _, digests = _read_manifest(store, _resolve(store, snap_id))
+            for n, digest in enumerate(digests, 1):
+                if digest not in checked:
+                    _page(store, n, digest)
+                    checked.add(digest)
+        except BackupError as e:
+            problems.append(f"{snap_id}: {e}")
+    return problems
+
+
+# retention -------------------------------------------------------------------
+def retained(snaps: List[Snapshot], policy: Dict[str, int] = RETENTION) -> Set[str]:
+    """Ids kept by ``policy``: the newest backup, plus the newest in each of the last
+    ``policy[name]`` hours/days/weeks that have a backup."""
+    newest_first = sorted(snaps, key=lambda s: s.created, reverse=True)
+    keep = {newest_first[0].id} if newest_first else set()
+    for name, count in policy.items():
+        seen: Set[int] = set()
+        for s in newest_first:
+            if len(seen) >= count:
+                break
+            bucket = int(s.created // PERIODS[name])
+            if bucket not in seen:
+                seen.add(bucket)
+                keep.add(s.id)
+    return keep
+
+
+def prune(store: str, policy: Dict[str, int] = RETENTION) -> Dict[str, int]:
+    """Delete backups ``policy`` does not keep, then every chunk no kept backup uses."""
+    with _lock:
+        snaps = snapshots(store)
+        keep = retained(snaps, policy)
+        for s in snaps:
+            if s.id not in keep:
+                os.remove(_manifest_path(store, s.id))
+        live: Set[str] = set()
+        for snap_id in keep:
+            live.update(d.hex() for d in _read_manifest(store, snap_id)[1])
+        chunks, freed = 0, 0
+        root = os.path.join(store, "chunks")
+        for sub in os.listdir(root) if os.path.isdir(root) else []:
+            for name in os.listdir(os.path.join(root, sub)):
+                if sub + name not in live:
+                    path = os.path.join(root, sub, name)
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    chunks += 1
+    return {"backups_removed": len(snaps) - len(keep), "chunks_removed": chunks, "bytes_freed": freed}
+
+
+def usage(store: str) -> int:
+    """Bytes on disk taken by ``store``."""
+    return sum(os.path.getsize(os.path.join(d, n)) for d, _, names in os.walk(store) for n in names)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--store", help="backup store (default: <db name>.backups next to --db)")
+    common.add_argument("--db", default=DB.DEFAULT_DB)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("backup", parents=[common]); sub.add_parser("list", parents=[common])
+    p = sub.add_parser("verify", parents=[common]); p.add_argument("ids", nargs="*", metavar="ID")
+    p = sub.add_parser("restore", parents=[common]); p.add_argument("id", help='backup id or "latest"')
+    p.add_argument("dest"); p.add_argument("--replace", action="store_true", help="overwrite dest")
+    p = sub.add_parser("prune", parents=[common])
+    for name, count in RETENTION.items():
+        p.add_argument(f"--{name}", type=int, default=count)
+    a = ap.parse_args(argv)
+    store = a.store or default_store(a.db)
+    try:
+        if a.cmd == "backup":
+            print(backup(a.db, store))
+        elif a.cmd == "list":
+            for s in snapshots(store):
+                print(s)
+            print(f"store: {usage(store)} bytes")
+        elif a.cmd == "verify":
+            problems = verify(store, a.ids)
+            for msg in problems:
+                print(msg)
+            print("OK" if not problems else "FAILED")
+            return 1 if problems else 0
+        elif a.cmd == "restore":
+            print(restore(store, a.id, a.dest, a.replace))
+        else:
+            print(prune(store, {name: getattr(a, name) for name in RETENTION}))
+    except BackupError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
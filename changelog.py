@@ -0,0 +1,204 @@
+"""Change-data-capture over ``school.db``.
+
+Triggers created by :data:`db.CHANGELOG_SQL` append one ``change_log`` row per
+inserted, updated or deleted student, instructor, course and registration. This
+module reads that log incrementally, exports only the rows that changed since a
+sequence number, and keeps the log small (compaction and truncation).
+
+Usage::
+
+    python changelog.py tail --since 120
+    python changelog.py export out/          # resumes from out/sync_state.json
+    python changelog.py compact
+    python changelog.py truncate --through 5000
+"""
+
+import argparse
+import csv
+import json
+import os
+from typing import Dict, List, Optional
+
+from db import DEFAULT_DB, connect, writer
+
+# entity -> (primary-key columns, exported columns)
+ENTITIES = {
+    "students": (["student_id"], ["student_id", "name", "age", "email"]),
+    "instructors": (["instructor_id"], ["instructor_id", "name", "age", "email"]),
+    "courses": (["course_id"], ["course_id", "course_name", "instructor_id", "capacity"]),
+    "registrations": (["student_id", "course_id"], ["student_id", "course_id"]),
+}
+KEY_SEP = "|"
+STATE_FILE = "sync_state.json"
+
+
+def _entry(r) -> Dict:
+    return dict(seq=r[0], entity=r[1], op=r[2], key=r[3], old_key=r[4],
+                columns=r[5].split(",") if r[5] else [], ts=r[6])
+
+
+def latest_seq(db_path: str = DEFAULT_DB) -> int:
+    """Highest sequence number ever assigned (0 for an empty log)."""
+    with connect(db_path) as con:
+        r = con.execute("SELECT seq FROM sqlite_sequence WHERE name='change_log'").fetchone()
+    return r[0] if r else 0
+
+
+def changes_since(seq: int, db_path: str = DEFAULT_DB, limit: Optional[int] = None) -> List[Dict]:
+    """Log entries with ``seq`` greater than the given one, oldest first."""
+    with connect(db_path) as con:
+        rows = con.execute("""
+            SELECT seq, entity, op, key, old_key, columns, ts
+            FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?
+        """, (seq, -1 if limit is None else limit)).fetchall()
+    return [_entry(r) for r in rows]
+
+
+def _fetch_current(con, entity: str, keys):
+    """Current rows for ``keys`` of ``entity`` as ``{key: row_tuple}``."""
+    key_cols, cols = ENTITIES[entity]
+    n = len(key_cols)
+    # the keys are split and joined on the key columns themselves, so each is one primary-key
+    # search; the concatenated form is only the key of the result
+    keys = [k for k in (k.split(KEY_SEP, n - 1) for k in keys) if len(k) == n]
+    key_expr = f" || '{KEY_SEP}' || ".join(f"t.{c}" for c in key_cols)
+    match = " AND ".join(f"t.{c} = json_extract(k.value, '$[{i}]')" for i, c in enumerate(key_cols))
+    rows = con.execute(f"SELECT {key_expr}, {', '.join('t.' + c for c in cols)} "
+                       f"FROM json_each(?) k CROSS JOIN {entity} t ON {match}", (json.dumps(keys),))
+    return {row[0]: row[1:] for row in rows}
+
+
+def export_changes(out_dir: str, since: Optional[int] = None, db_path: str = DEFAULT_DB) -> Dict:
+    """Write the net effect of every change after ``since`` as per-entity delta CSVs.
+
+    Each file has an ``op`` column (``upsert`` with the current row, or ``delete``
+    with only the key columns filled). Rows are read from the live tables, so a key
+    touched many times is exported once. When ``since`` is omitted the high-water
+    mark stored in ``out_dir/sync_state.json`` by the previous export is used.
+    Returns ``{"from": ..., "to": ..., "files": {...}, "rows": n}``.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, STATE_FILE)
+    if since is None:
+        since = 0
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                since = json.load(f)["seq"]
+    with connect(db_path) as con:
+        # one snapshot for the log and the rows it points at; a caller's open transaction already is one.
+        # Ended here, not left to connect(): a bound or pooled connection outlives this call, and an open
+        # read transaction would keep its SHARED lock and block every writer's commit.
+        own = not con.in_transaction
+        if own:
+            con.execute("BEGIN")
+        try:
+            log = con.execute("SELECT entity, key, old_key, seq FROM change_log WHERE seq > ? ORDER BY seq",
+                              (since,)).fetchall()
+            touched: Dict[str, set] = {e: set() for e in ENTITIES}
+            for entity, key, old_key, _ in log:
+                touched[entity].add(key)
+                if old_key:
+                    touched[entity].add(old_key)
+            current = {e: _fetch_current(con, e, keys) for e, keys in touched.items() if keys}
+        finally:
+            if own:
+                con.execute("COMMIT")  # nothing was written
+    upto = log[-1][3] if log else since
+    result = {"from": since, "to": upto, "files": {}, "rows": 0}
+    if not log:
+        return result
+    batch_dir = os.path.join(out_dir, f"changes_{since + 1:09d}_{upto:09d}")
+    os.makedirs(batch_dir, exist_ok=True)
+    for entity, rows in current.items():
+        key_cols, cols = ENTITIES[entity]
+        path = os.path.join(batch_dir, f"{entity}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["op"] + cols)
+            for key in sorted(touched[entity]):
+                if key in rows:
+                    w.writerow(["upsert", *rows[key]])
+                else:
+                    parts = dict(zip(key_cols, key.split(KEY_SEP, len(key_cols) - 1)))
+                    w.writerow(["delete"] + [parts.get(c, "") for c in cols])
+                result["rows"] += 1
+        result["files"][entity] = path
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump({"seq": upto}, f)
+    return result
+
+
+def compact(db_path: str = DEFAULT_DB, through: Optional[int] = None) -> int:
+    """Collapse repeated entries for the same key up to ``through`` (default: all).
+
+    The newest entry per key survives; its op is ``D`` if the key ended deleted,
+    ``I`` if the first collapsed entry was an insert, else ``U`` with the union of the
+    changed columns. Key renames (entries with ``old_key``) are kept as they are because a
+    consumer must drop the old key at that point. Returns the number of rows removed.
+    """
+    with writer(db_path) as con:
+        if through is None:
+            through = con.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+        rows = con.execute("""
+            SELECT seq, entity, op, key, columns FROM change_log
+            WHERE seq <= ? AND old_key IS NULL ORDER BY seq
+        """, (through,)).fetchall()
+        groups: Dict[tuple, list] = {}
+        for r in rows:
+            groups.setdefault((r[1], r[3]), []).append(r)
+        drop, updates = [], []
+        for entries in groups.values():
+            if len(entries) < 2:
+                continue
+            first, last = entries[0], entries[-1]
+            op = "D" if last[2] == "D" else ("I" if first[2] == "I" else "U")
+            cols = []
+            for e in entries:
+                for c in (e[4] or "").split(","):
+                    if c and c not in cols:
+                        cols.append(c)
+            updates.append((op, ",".join(cols) if op == "U" else None, last[0]))
+            drop.extend((e[0],) for e in entries[:-1])
+        con.executemany("UPDATE change_log SET op=?, columns=? WHERE seq=?", updates)
+        con.executemany("DELETE FROM change_log WHERE seq=?", drop)
+    return len(drop)
+
+
+def truncate(through: int, db_path: str = DEFAULT_DB) -> int:
+    """Delete entries up to and including ``through`` (all consumers are past it)."""
+    with writer(db_path) as con:
+        return con.execute("DELETE FROM change_log WHERE seq <= ?", (through,)).rowcount
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=DEFAULT_DB)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("tail", help="print log entries after a sequence number")
+    p.add_argument("--since", type=int, default=0)
+    p.add_argument("--limit", type=int)
+    p = sub.add_parser("export", help="write delta CSVs for changes since the last export")
+    p.add_argument("out_dir")
+    p.add_argument("--since", type=int, help="override the stored high-water mark")
+    p = sub.add_parser("compact", help="collapse repeated entries per key")
+    p.add_argument("--through", type=int)
+    p = sub.add_parser("truncate", help="drop entries every consumer has already read")
+    p.add_argument("--through", type=int, required=True)
+    a = ap.parse_args(argv)
+
+    if a.cmd == "tail":
+        for e in changes_since(a.since, a.db, a.limit):
+            print(f"{e['seq']:>8} {e['ts']} {e['op']} {e['entity']:<13} {e['key']}"
+                  + (f" (was {e['old_key']})" if e["old_key"] else "")
+                  + (f" [{','.join(e['columns'])}]" if e["columns"] else ""))
+    elif a.cmd == "export":
+        r = export_changes(a.out_dir, a.since, a.db)
+        print(f"Exported {r['rows']} changed rows (seq {r['from']}..{r['to']}) to {a.out_dir}")
+    elif a.cmd == "compact":
+        print(f"Removed {compact(a.db, a.through)} redundant entries")
+    else:
+        print(f"Truncated {truncate(a.through, a.db)} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""Parallel bulk import of CSV files.
+
+Each file is split at line boundaries into byte ranges of about ``chunk_bytes``.
+Worker processes (a ``ProcessPoolExecutor``) parse their ranges and validate and
+normalize them column by column with :func:`validation.validate_columns`. Clean
+rows go straight to one writer process over a bounded queue, and the writer
+bulk-inserts each chunk in one transaction. Rejected rows are written to an error CSV with their file, line
+and reason. That covers rows that fail validation and rows the database refuses,
+such as duplicate IDs or unknown courses.
+
+Registrations get the same checks as :func:`db.register_student`: a student is
+waitlisted for a full course, and a registration that clashes with the student's
+timetable is rejected. A chunk whose courses have no meeting times is still
+inserted in bulk (the capacity trigger guards the seats). Other chunks, and chunks
+with a full course, go through ``register_student`` one row at a time.
+
+The table is taken from the header (``student_id,name,age,email`` is students,
+``course_id,course_name[,instructor_id,capacity]`` is courses, ``student_id,course_id`` is
+registrations, and so on). Extra columns are ignored, so the PyQt CSV exports import
+as they are. Files are imported table by table in foreign-key order. Fields must not
+contain line breaks, because chunks are cut at newlines.
+
+Usage::
+
+    python csv_import.py students.csv registrations.csv --db school.db --workers 4
+"""
+
+import argparse
+import csv
+import io
+import json
+import multiprocessing as mp
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+import db as DB
+import validation
+
+CHUNK_BYTES = 4 * 2**20
+PUT_TIMEOUT = 6 * DB.WRITE_TIMEOUT  # a worker gives up on a writer that takes no rows for this long
+ORDER = ["instructors", "courses", "students", "registrations"]  # foreign keys first
+ERROR_HEADER = ["file", "line", "error", "row"]
+
+
+class CsvImportError(ValueError):
+    """A file cannot be imported at all (unknown header, unreadable file)."""
+
+
+def detect_kind(header: Sequence[str]) -> str:
+    cols = set(header)
+    if "course_name" in cols:
+        return "courses"
+    if {"student_id", "course_id"} <= cols:
+        return "registrations"
+    if "student_id" in cols:
+        return "students"
+    if "instructor_id" in cols:
+        return "instructors"
+    raise CsvImportError(f"cannot tell which table these columns belong to: {', '.join(header)}")
+
+
+def plan_chunks(path: str, chunk_bytes: int = CHUNK_BYTES):
+    """Header columns and ``(start, end, first_line)`` byte ranges ending at newlines."""
+    with open(path, "rb") as f:
+        first = f.readline()
+        header = next(csv.reader([first.decode("utf-8-sig")]), [])
+        chunks, start, line = [], f.tell(), 2
+        size = os.fstat(f.fileno()).st_size
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # finish the current line
+            end = min(f.tell(), size)
+            f.seek(start)
+            lines = f.read(end - start).count(b"\n")
+            chunks.append((start, end, line))
+            start, line = end, line + lines
+    return [h.strip() for h in header], chunks
+
+
+def _as_csv(values) -> str:
+    """``values`` as one CSV line (no terminator), quoted so it parses back into the same fields."""
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="").writerow(values)
+    return buf.getvalue()
+
+
+# worker processes --------------------------------------------------------
+_rows_q = None
+
+
+def _init_worker(rows_q):
+    global _rows_q
+    _rows_q = rows_q
+
+
+def _validate_chunk(path: str, kind: str, header: List[str], start: int, end: int, first_line: int):
+    """Validate one byte range; clean rows go to the writer. Returns (sent, clean, errors)."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    width, lines, rows = len(header), [], []
+    for n, values in enumerate(csv.reader(io.StringIO(text)), start=first_line):
+        if values and any(v.strip() for v in values):
+            lines.append(n); rows.append((values + [""] * width)[:width])
+    columns = dict(zip(header, zip(*rows))) if rows else {}
+    valid, invalid = validation.validate_columns(kind, columns)
+    clean = [(lines[i], rec) for i, rec in valid]
+    errors = [(path, lines[i], msg, _as_csv(rows[i])) for i, msg in invalid]
+    if clean:
+        try:
+            _rows_q.put((kind, path, clean), timeout=PUT_TIMEOUT)
+        except queue.Full:
+            raise RuntimeError(f"the import writer took no rows for {PUT_TIMEOUT:.0f}s") from None
+    return bool(clean), len(clean), errors
+
+
+# writer process ----------------------------------------------------------
+def _bulk_insert(con, kind: str, sql: str, rows) -> bool:
+    """Insert the whole chunk, or nothing and False if some row needs a closer look."""
+    if kind == "registrations" and con.execute(
+            "SELECT 1 FROM course_slots WHERE course_id IN (SELECT value FROM json_each(?)) LIMIT 1",
+            (json.dumps(sorted({r[1] for _, r in rows})),)).fetchone():
+        return False  # schedule conflicts are checked student by student
+    con.execute("SAVEPOINT chunk")
+    try:
+        con.executemany(sql, [r for _, r in rows])
+    except sqlite3.IntegrityError:  # a refused row, or a full course (the capacity trigger)
+        con.execute("ROLLBACK TO chunk")
+        return False
+    finally:
+        con.execute("RELEASE chunk")
+    return True
+
+
+def _register(con, db_path: str, student_id: str, course_id: str) -> str:
+    if con.execute("SELECT 1 FROM registrations WHERE student_id=? AND course_id=?",
+                   (student_id, course_id)).fetchone():
+        raise sqlite3.IntegrityError("already registered")  # register_student would accept it silently
+    return DB.register_student(student_id, course_id, db_path)  # a savepoint on the bound connection
+
+
+def _writer(db_path: str, rows_q, done_q):
+    while True:
+        msg = rows_q.get()
+        if msg is None:
+            return
+        kind, path, rows = msg
+        cols = validation.COLUMNS[kind]
+        sql = f"INSERT INTO {kind}({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+        errors, inserted, waitlisted = [], 0, 0
+        try:
+            with DB.writer(db_path) as con, DB.bind(con, db_path):
+                if _bulk_insert(con, kind, sql, rows):
+                    inserted = len(rows)
+                else:  # one row at a time, to find the refused ones
+                    for line, row in rows:
+                        try:
+                            if kind != "registrations":
+                                con.execute(sql, row); inserted += 1
+                            elif _register(con, db_path, *row) == DB.WAITLISTED:
+                                waitlisted += 1
+                            else:
+                                inserted += 1
+                        except sqlite3.IntegrityError as e:
+                            errors.append((path, line, f"rejected by database: {e}", _as_csv(row)))
+                        except DB.ScheduleConflict as e:
+                            errors.append((path, line, f"rejected: {e}", _as_csv(row)))
+        except Exception as e:  # the whole chunk failed (e.g. WriteTimeout)
+            inserted, waitlisted = 0, 0
+            errors = [(path, line, f"not written: {e}", _as_csv(row)) for line, row in rows]
+        done_q.put((kind, inserted, waitlisted, errors))
+
+
+# driver ------------------------------------------------------------------
+def _check_writer(writer, futures=()):
+    """Raise if the writer process is gone, cancelling the chunks not started yet."""
+    if writer.is_alive():
+        return
+    for fut in futures:
+        fut.cancel()
+    raise RuntimeError(f"import writer process died (exit code {writer.exitcode})")
+
+
+def _drain_orphaned(writer, rows_q, stop):
+    """Once the writer is gone, read what workers still send, so they (and the pool) can finish."""
+    while not stop.wait(0.5):
+        while not writer.is_alive() and not stop.is_set():
+            try:
+                rows_q.get(timeout=0.5)
+            except queue.Empty:
+                pass
+
+
+def import_files(paths: Sequence[str], db_path: str = DB.DEFAULT_DB, errors_path: str = "import_errors.csv",
+                 workers: Optional[int] = None, chunk_bytes: int = CHUNK_BYTES) -> Dict:
+    """Import ``paths`` into ``db_path``; returns counts, waitlisted and rejected rows, and timing."""
+    t0 = time.perf_counter()
+    DB.init_db(db_path)
+    plans = {}
+    for path in paths:
+        header, chunks = plan_chunks(path, chunk_bytes)
+        plans.setdefault(detect_kind(header), []).append((path, header, chunks))
+
+    workers = workers or os.cpu_count() or 1
+    ctx = mp.get_context("spawn")
+    rows_q, done_q = ctx.Queue(maxsize=2 * workers), ctx.Queue()
+    writer = ctx.Process(target=_writer, args=(db_path, rows_q, done_q), name="csv-import-writer")
+    writer.start()
+    stop_drain = threading.Event()
+    drain = threading.Thread(target=_drain_orphaned, args=(writer, rows_q, stop_drain), daemon=True)
+    drain.start()
+    summary = dict(read=0, valid=0, inserted={k: 0 for k in ORDER}, waitlisted=0, rejected=0)
+    try:
+        with open(errors_path, "w", newline="", encoding="utf-8") as ef, \
+                ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker, initargs=(rows_q,)) as pool:
+            out = csv.writer(ef); out.writerow(ERROR_HEADER)
+
+            def reject(errors):
+                out.writerows(errors); summary["rejected"] += len(errors)
+
+            for kind in ORDER:  # a table's rows are all in before the next table starts
+                futures = [pool.submit(_validate_chunk, path, kind, header, *chunk)
+                           for path, header, chunks in plans.get(kind, []) for chunk in chunks]
+                sent, pending = 0, futures
+                while pending:
+                    finished, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                    _check_writer(writer, pending)
+                    for fut in finished:
+                        was_sent, clean, errors = fut.result()
+                        sent += was_sent
+                        summary["valid"] += clean; summary["read"] += clean + len(errors)
+                        reject(errors)
+                for _ in range(sent):
+                    while True:
+                        try:
+                            done_kind, inserted, waitlisted, errors = done_q.get(timeout=1.0)
+                            break
+                        except queue.Empty:
+                            _check_writer(writer)
+                    summary["inserted"][done_kind] += inserted; summary["waitlisted"] += waitlisted
+                    reject(errors)
+    finally:
+        if writer.is_alive():
+            rows_q.put(None, timeout=PUT_TIMEOUT)
+        else:
+            rows_q.cancel_join_thread()  # nobody reads it any more; don't wait on its feeder thread at exit
+        writer.join()
+        stop_drain.set(); drain.join()
+    summary["errors_path"] = errors_path
+    summary["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--db", default=DB.DEFAULT_DB)
+    ap.add_argument("--errors", default="import_errors.csv", help="where rejected rows are written")
+    ap.add_argument("--workers", type=int, default=None, help="validation processes (default: CPU count)")
+    ap.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / 2**20)
+    a = ap.parse_args(argv)
+    try:
+        s = import_files(a.files, a.db, a.errors, a.workers, int(a.chunk_mb * 2**20))
+    except (CsvImportError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"{s['read']} rows read, {sum(s['inserted'].values())} inserted {s['inserted']}, "
+          f"{s['waitlisted']} waitlisted, {s['rejected']} rejected (see {s['errors_path']}) in {s['elapsed_s']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
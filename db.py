@@ -1,8 +1,17 @@
 import sqlite3
 from contextlib import contextmanager
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Tuple
 import shutil
+import json
 import os
+import random
+import re
+import threading
+import time
+from urllib.parse import quote
+
+import timetable as T
+import validation as V
 
 DEFAULT_DB = "school.db"
 
@@ -43,8 +52,375 @@ CREATE TABLE IF NOT EXISTS registrations (
 );
 """
 
+# Summary tables behind stats.py. Inserts/deletes adjust counts by one; key renames and
+# moved rows recount only the keys involved, so the result never depends on whether
+# ON UPDATE CASCADE runs before or after our triggers.
+STATS_SQL = """
+CREATE INDEX IF NOT EXISTS idx_registrations_course ON registrations(course_id);
+CREATE INDEX IF NOT EXISTS idx_courses_instructor ON courses(instructor_id);
+
+CREATE TABLE IF NOT EXISTS course_stats (
+    course_id TEXT PRIMARY KEY,
+    enrolled  INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS student_stats (
+    student_id TEXT PRIMARY KEY,
+    courses    INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS instructor_stats (
+    instructor_id TEXT PRIMARY KEY,
+    courses       INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT OR REPLACE INTO course_stats(course_id, enrolled)
+    SELECT c.course_id, (SELECT COUNT(*) FROM registrations r WHERE r.course_id = c.course_id) FROM courses c;
+INSERT OR REPLACE INTO student_stats(student_id, courses)
+    SELECT s.student_id, (SELECT COUNT(*) FROM registrations r WHERE r.student_id = s.student_id) FROM students s;
+INSERT OR REPLACE INTO instructor_stats(instructor_id, courses)
+    SELECT i.instructor_id, (SELECT COUNT(*) FROM courses c WHERE c.instructor_id = i.instructor_id) FROM instructors i;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_student_ins AFTER INSERT ON students BEGIN
+    INSERT OR IGNORE INTO student_stats(student_id) VALUES (NEW.student_id);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_student_del AFTER DELETE ON students BEGIN
+    DELETE FROM student_stats WHERE student_id = OLD.student_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_student_key AFTER UPDATE OF student_id ON students
+WHEN NEW.student_id IS NOT OLD.student_id BEGIN
+    DELETE FROM student_stats WHERE student_id = OLD.student_id;
+    INSERT OR REPLACE INTO student_stats(student_id, courses)
+        VALUES (NEW.student_id, (SELECT COUNT(*) FROM registrations WHERE student_id = NEW.student_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_instructor_ins AFTER INSERT ON instructors BEGIN
+    INSERT OR IGNORE INTO instructor_stats(instructor_id) VALUES (NEW.instructor_id);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_instructor_del AFTER DELETE ON instructors BEGIN
+    DELETE FROM instructor_stats WHERE instructor_id = OLD.instructor_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_instructor_key AFTER UPDATE OF instructor_id ON instructors
+WHEN NEW.instructor_id IS NOT OLD.instructor_id BEGIN
+    DELETE FROM instructor_stats WHERE instructor_id = OLD.instructor_id;
+    INSERT OR REPLACE INTO instructor_stats(instructor_id, courses)
+        VALUES (NEW.instructor_id, (SELECT COUNT(*) FROM courses WHERE instructor_id = NEW.instructor_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_course_ins AFTER INSERT ON courses BEGIN
+    INSERT OR IGNORE INTO course_stats(course_id) VALUES (NEW.course_id);
+    UPDATE instructor_stats SET courses = courses + 1 WHERE instructor_id = NEW.instructor_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_course_del AFTER DELETE ON courses BEGIN
+    DELETE FROM course_stats WHERE course_id = OLD.course_id;
+    UPDATE instructor_stats SET courses = courses - 1 WHERE instructor_id = OLD.instructor_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_course_key AFTER UPDATE OF course_id ON courses
+WHEN NEW.course_id IS NOT OLD.course_id BEGIN
+    DELETE FROM course_stats WHERE course_id = OLD.course_id;
+    INSERT OR REPLACE INTO course_stats(course_id, enrolled)
+        VALUES (NEW.course_id, (SELECT COUNT(*) FROM registrations WHERE course_id = NEW.course_id));
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_course_instructor AFTER UPDATE OF instructor_id ON courses
+WHEN NEW.instructor_id IS NOT OLD.instructor_id BEGIN
+    UPDATE instructor_stats
+       SET courses = (SELECT COUNT(*) FROM courses c WHERE c.instructor_id = instructor_stats.instructor_id)
+     WHERE instructor_id IN (OLD.instructor_id, NEW.instructor_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_reg_ins AFTER INSERT ON registrations BEGIN
+    UPDATE student_stats SET courses = courses + 1 WHERE student_id = NEW.student_id;
+    UPDATE course_stats SET enrolled = enrolled + 1 WHERE course_id = NEW.course_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_reg_del AFTER DELETE ON registrations BEGIN
+    UPDATE student_stats SET courses = courses - 1 WHERE student_id = OLD.student_id;
+    UPDATE course_stats SET enrolled = enrolled - 1 WHERE course_id = OLD.course_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_stats_reg_upd AFTER UPDATE ON registrations BEGIN
+    UPDATE student_stats
+       SET courses = (SELECT COUNT(*) FROM registrations r WHERE r.student_id = student_stats.student_id)
+     WHERE student_id IN (OLD.student_id, NEW.student_id);
+    UPDATE course_stats
+       SET enrolled = (SELECT COUNT(*) FROM registrations r WHERE r.course_id = course_stats.course_id)
+     WHERE course_id IN (OLD.course_id, NEW.course_id);
+END;
+"""
+
+def _change_log_triggers(table: str, key_cols, cols) -> str:
+    """Triggers appending one ``change_log`` row per inserted/updated/deleted row of ``table``."""
+    key = lambda ref: " || '|' || ".join(f"{ref}.{c}" for c in key_cols)
+    changed = " OR ".join(f"NEW.{c} IS NOT OLD.{c}" for c in cols)
+    key_changed = " OR ".join(f"NEW.{c} IS NOT OLD.{c}" for c in key_cols)
+    col_list = " || ".join(f"CASE WHEN NEW.{c} IS NOT OLD.{c} THEN '{c},' ELSE '' END" for c in cols)
+    return f"""
+CREATE TRIGGER IF NOT EXISTS trg_log_{table}_ins AFTER INSERT ON {table} BEGIN
+    INSERT INTO change_log(entity, op, key) VALUES ('{table}', 'I', {key("NEW")});
+END;
+CREATE TRIGGER IF NOT EXISTS trg_log_{table}_upd AFTER UPDATE ON {table} WHEN {changed} BEGIN
+    INSERT INTO change_log(entity, op, key, old_key, columns)
+    VALUES ('{table}', 'U', {key("NEW")},
+            CASE WHEN {key_changed} THEN {key("OLD")} END, rtrim({col_list}, ','));
+END;
+CREATE TRIGGER IF NOT EXISTS trg_log_{table}_del AFTER DELETE ON {table} BEGIN
+    INSERT INTO change_log(entity, op, key) VALUES ('{table}', 'D', {key("OLD")});
+END;
+"""
+
+# Append-only change-data-capture log read by changelog.py. ``seq`` is AUTOINCREMENT so it
+# keeps growing even after old entries are truncated. Registration keys are "student|course".
+CHANGELOG_SQL = """
+CREATE TABLE IF NOT EXISTS change_log (
+    seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity  TEXT NOT NULL,
+    op      TEXT NOT NULL CHECK(op IN ('I', 'U', 'D')),
+    key     TEXT NOT NULL,
+    old_key TEXT,
+    columns TEXT,
+    ts      TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_change_log_key ON change_log(entity, key);
+""" + "".join([
+    _change_log_triggers("students", ["student_id"], ["student_id", "name", "age", "email"]),
+    _change_log_triggers("instructors", ["instructor_id"], ["instructor_id", "name", "age", "email"]),
+    _change_log_triggers("courses", ["course_id"], ["course_id", "course_name", "instructor_id"]),
+    _change_log_triggers("registrations", ["student_id", "course_id"], ["student_id", "course_id"]),
+])
+
+# Course capacity (NULL = unlimited) and an ordered waitlist. The triggers keep every
+# write path honest, not just register_student(): an insert into a full course is
+# refused, a freed seat or a raised capacity promotes from the head of the waitlist,
+# and a student who gets a seat leaves the waitlist.
+_OPEN_SEATS = """IFNULL((SELECT CASE WHEN capacity IS NULL THEN -1
+    ELSE max(0, capacity - (SELECT COUNT(*) FROM registrations WHERE course_id = {c})) END
+    FROM courses WHERE course_id = {c}), 0)"""  # -1 = no limit, 0 once the course is deleted
+
+def _promote(course: str) -> str:
+    return f"""INSERT INTO registrations(student_id, course_id)
+        SELECT student_id, course_id FROM waitlist WHERE course_id = {course}
+        ORDER BY seq LIMIT {_OPEN_SEATS.format(c=course)};"""
+
+ENROLLMENT_SQL = f"""
+ALTER TABLE courses ADD COLUMN capacity INTEGER CHECK(capacity IS NULL OR capacity >= 0);
+
+CREATE TABLE IF NOT EXISTS waitlist (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_id  TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    UNIQUE(course_id, student_id),
+    FOREIGN KEY(student_id) REFERENCES students(student_id)
+        ON UPDATE CASCADE ON DELETE CASCADE,
+    FOREIGN KEY(course_id)  REFERENCES courses(course_id)
+        ON UPDATE CASCADE ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_waitlist_student ON waitlist(student_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_capacity_guard BEFORE INSERT ON registrations
+WHEN (SELECT capacity FROM courses WHERE course_id = NEW.course_id)
+     <= (SELECT COUNT(*) FROM registrations WHERE course_id = NEW.course_id)
+BEGIN
+    SELECT RAISE(ABORT, 'course is full');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_capacity_shrink BEFORE UPDATE OF capacity ON courses
+WHEN NEW.capacity < (SELECT COUNT(*) FROM registrations WHERE course_id = NEW.course_id)
+BEGIN
+    SELECT RAISE(ABORT, 'capacity is below the current enrollment');
+END;
+CREATE TRIGGER IF NOT EXISTS trg_waitlist_seated AFTER INSERT ON registrations BEGIN
+    DELETE FROM waitlist WHERE course_id = NEW.course_id AND student_id = NEW.student_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_waitlist_promote AFTER DELETE ON registrations
+WHEN EXISTS (SELECT 1 FROM waitlist WHERE course_id = OLD.course_id) BEGIN
+    {_promote("OLD.course_id")}
+END;
+CREATE TRIGGER IF NOT EXISTS trg_waitlist_capacity AFTER UPDATE OF capacity ON courses
+WHEN NEW.capacity IS NOT OLD.capacity BEGIN
+    {_promote("NEW.course_id")}
+END;
+
+DROP TRIGGER IF EXISTS trg_log_courses_upd;
+""" + _change_log_triggers("courses", ["course_id"], ["course_id", "course_name", "instructor_id", "capacity"])
+
+# Weekly meeting times; conflict checks live in timetable.py.
+TIMETABLE_SQL = """
+CREATE TABLE IF NOT EXISTS course_slots (
+    slot_id   INTEGER PRIMARY KEY,
+    course_id TEXT NOT NULL,
+    day       INTEGER NOT NULL CHECK(day BETWEEN 0 AND 6),
+    start_min INTEGER NOT NULL CHECK(start_min >= 0),
+    end_min   INTEGER NOT NULL CHECK(end_min > start_min AND end_min <= 1440),
+    FOREIGN KEY(course_id) REFERENCES courses(course_id)
+        ON UPDATE CASCADE ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_course_slots_course ON course_slots(course_id);
+"""
+
+# Trigram index over names for fuzzy search (fuzzy.py). Grams come from ' ' || lower(name) || ' '
+# (SQLite's lower() folds ASCII only; fuzzy.normalize does the same). Trigger bodies cannot
+# use WITH, so the character positions are read from the small trigram_pos table.
+TRIGRAM_MAX = 256  # longest name indexed in full
+
+TRIGRAM_SOURCES = {"students": ("student_id", "name"), "instructors": ("instructor_id", "name"),
+                   "courses": ("course_id", "course_name")}
+
+def trigram_fill(entity: str) -> List[str]:
+    """Statements that index every existing name of ``entity`` (see fuzzy.rebuild)."""
+    key, col = TRIGRAM_SOURCES[entity]
+    return [f"""INSERT OR IGNORE INTO name_trigrams(entity, gram, key)
+                SELECT '{entity}', substr(' ' || lower(t.{col}) || ' ', p.i, 3), t.{key}
+                FROM {entity} t JOIN trigram_pos p ON p.i <= length(t.{col})""",
+            f"""INSERT OR REPLACE INTO name_index(entity, key, ngrams)
+                SELECT entity, key, COUNT(*) FROM name_trigrams WHERE entity = '{entity}' GROUP BY key"""]
+
+def _trigram_triggers(entity: str) -> str:
+    key, col = TRIGRAM_SOURCES[entity]
+    grams = lambda ref: (f"SELECT substr(' ' || lower({ref}.{col}) || ' ', i, 3) AS g FROM trigram_pos "
+                         f"WHERE i <= length({ref}.{col})")
+    # changes() is the number of distinct grams the INSERT OR IGNORE just added
+    add = f"""
+    INSERT OR IGNORE INTO name_trigrams(entity, gram, key) SELECT '{entity}', g, NEW.{key} FROM ({grams("NEW")});
+    INSERT OR REPLACE INTO name_index(entity, key, ngrams) VALUES ('{entity}', NEW.{key}, changes());"""
+    drop = f"""
+    DELETE FROM name_trigrams WHERE entity = '{entity}' AND key = OLD.{key} AND gram IN ({grams("OLD")});
+    DELETE FROM name_index WHERE entity = '{entity}' AND key = OLD.{key};"""
+    return f"""
+CREATE TRIGGER IF NOT EXISTS trg_trgm_{entity}_ins AFTER INSERT ON {entity} BEGIN{add}
+END;
+CREATE TRIGGER IF NOT EXISTS trg_trgm_{entity}_upd AFTER UPDATE OF {key}, {col} ON {entity}
+WHEN NEW.{key} IS NOT OLD.{key} OR NEW.{col} IS NOT OLD.{col} BEGIN{drop}{add}
+END;
+CREATE TRIGGER IF NOT EXISTS trg_trgm_{entity}_del AFTER DELETE ON {entity} BEGIN{drop}
+END;
+"""
+
+TRIGRAM_SQL = f"""
+CREATE TABLE IF NOT EXISTS trigram_pos (i INTEGER PRIMARY KEY);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {TRIGRAM_MAX})
+INSERT OR IGNORE INTO trigram_pos(i) SELECT i FROM n;
+
+CREATE TABLE IF NOT EXISTS name_trigrams (
+    entity TEXT NOT NULL,
+    gram   TEXT NOT NULL,
+    key    TEXT NOT NULL,
+    PRIMARY KEY(entity, gram, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS name_index (
+    entity TEXT NOT NULL,
+    key    TEXT NOT NULL,
+    ngrams INTEGER NOT NULL,  -- distinct trigrams of the name, for the similarity score
+    PRIMARY KEY(entity, key)
+) WITHOUT ROWID;
+""" + "".join(";\n".join(trigram_fill(e)) + ";\n" + _trigram_triggers(e) for e in TRIGRAM_SOURCES)
+
+# History of maintenance.py runs: what ran, how long it took and the file before and after.
+MAINTENANCE_SQL = """
+CREATE TABLE IF NOT EXISTS maintenance_log (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    task         TEXT NOT NULL,
+    started_at   REAL NOT NULL,  -- unix time
+    seconds      REAL NOT NULL,
+    size_before  INTEGER,        -- file size in bytes
+    size_after   INTEGER,
+    free_before  INTEGER,        -- PRAGMA freelist_count
+    free_after   INTEGER,
+    ok           INTEGER NOT NULL DEFAULT 1,
+    detail       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_maintenance_task ON maintenance_log(task, started_at);
+"""
+
+# Indexes behind the structured Records filters (see filter_records): one per filterable
+# column, the email domain as an expression index, and the counts kept in the stats tables.
+FILTER_SQL = """
+CREATE INDEX IF NOT EXISTS idx_students_age ON students(age);
+CREATE INDEX IF NOT EXISTS idx_instructors_age ON instructors(age);
+CREATE INDEX IF NOT EXISTS idx_students_domain ON students(substr(email, instr(email, '@') + 1));
+CREATE INDEX IF NOT EXISTS idx_instructors_domain ON instructors(substr(email, instr(email, '@') + 1));
+CREATE INDEX IF NOT EXISTS idx_student_stats_courses ON student_stats(courses);
+CREATE INDEX IF NOT EXISTS idx_course_stats_enrolled ON course_stats(enrolled);
+"""
+
+# validation.person lower-cases the domain of new addresses, and the domain filter
+# compares lower-case; rows stored before that would never match it.
+_LOWER_DOMAIN = """UPDATE {t} SET email = substr(email, 1, instr(email, '@')) || lower(substr(email, instr(email, '@') + 1))
+WHERE instr(email, '@') > 0 AND substr(email, instr(email, '@') + 1) != lower(substr(email, instr(email, '@') + 1));"""
+EMAIL_DOMAIN_SQL = _LOWER_DOMAIN.format(t="students") + "\n" + _LOWER_DOMAIN.format(t="instructors")
+
+def _incremental_auto_vacuum(con: sqlite3.Connection):
+    """Switch an existing file to ``auto_vacuum = INCREMENTAL`` (new files start that way).
+
+    The mode only takes effect through VACUUM, which rewrites the file and cannot run
+    inside a transaction, so :func:`init_db` runs this step before its BEGIN. It is a
+    no-op once the mode is set, so a second process repeating it costs nothing.
+    """
+    if con.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        con.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        con.execute("VACUUM")
+_incremental_auto_vacuum.transactional = False
+
+_bound = threading.local()
+
+def _bound_connection(db_path: str) -> Optional[sqlite3.Connection]:
+    return getattr(_bound, "cons", {}).get(db_path)
+
+@contextmanager
+def bind(con: sqlite3.Connection, db_path: str = DEFAULT_DB):
+    """Make every db.py call on ``db_path`` from this thread reuse ``con``.
+
+    Used by connection pools (see :mod:`dbpool`): :func:`connect` and :func:`writer`
+    neither open nor close a bound connection. ``con`` must be in autocommit mode
+    (``isolation_level=None``) so :func:`writer` can manage its transactions.
+    """
+    cons = getattr(_bound, "cons", {})
+    prev = cons.get(db_path)
+    _bound.cons = {**cons, db_path: con}
+    try:
+        yield con
+    finally:
+        if prev is None:
+            _bound.cons.pop(db_path, None)
+        else:
+            _bound.cons[db_path] = prev
+
+# Read-only mode for reporting: ``mode=ro`` never takes the write lock, ``query_only``
+# rejects stray writes, and a large mmap lets reads come straight from the page cache.
+# Per call: ``with read_only(path): ...``; per process: set SCHOOL_DB_READONLY to 1
+# (or to "immutable" for files nobody modifies, such as backups). Writers are unaffected.
+READONLY_ENV = "SCHOOL_DB_READONLY"
+READONLY_MMAP_SIZE = 256 * 2**20
+
+def open_readonly(db_path: str = DEFAULT_DB, immutable: bool = False) -> sqlite3.Connection:
+    """Read-only connection to an existing ``db_path`` (``immutable`` skips all locking)."""
+    path = os.path.abspath(db_path).replace(os.sep, "/")
+    uri = f"file:{quote(path if path.startswith('/') else '/' + path, safe='/:')}?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    con = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=False)
+    con.execute(f"PRAGMA mmap_size = {READONLY_MMAP_SIZE}")
+    con.execute("PRAGMA query_only = ON")
+    return con
+
+@contextmanager
+def read_only(db_path: str = DEFAULT_DB, immutable: bool = False):
+    """Run every db.py call on ``db_path`` in this block over one read-only connection."""
+    con = open_readonly(db_path, immutable)
+    try:
+        with bind(con, db_path):
+            yield con
+    finally:
+        con.close()
+
 @contextmanager
 def connect(db_path: str = DEFAULT_DB):
+    bound = _bound_connection(db_path)
+    if bound is not None:
+        yield bound
+        return
+    mode = os.environ.get(READONLY_ENV, "")
+    if mode not in ("", "0"):
+        con = open_readonly(db_path, immutable=(mode == "immutable"))
+        try:
+            yield con
+        finally:
+            con.close()
+        return
     con = sqlite3.connect(db_path)
     try:
         con.execute("PRAGMA foreign_keys = ON;")
@@ -53,17 +429,197 @@ def connect(db_path: str = DEFAULT_DB):
     finally:
         con.close()
 
+# Writers take the lock up front with BEGIN IMMEDIATE. When another process holds it we
+# back off exponentially with full jitter (capped at WRITE_BACKOFF_MAX) instead of letting
+# "database is locked" reach the caller, until the per-call timeout runs out.
+WRITE_TIMEOUT = 10.0
+WRITE_BUSY_TIMEOUT = 0.05
+WRITE_BACKOFF_BASE = 0.005
+WRITE_BACKOFF_MAX = 0.25
+
+class WriteTimeout(sqlite3.OperationalError):
+    """The write lock could not be obtained within the call's timeout."""
+
+ScheduleConflict = T.ScheduleConflict
+
+def _no_conflicts(conflicts):
+    if conflicts:
+        raise ScheduleConflict(conflicts)
+
+_write_stats_lock = threading.Lock()
+_write_stats = dict(writes=0, retries=0, timeouts=0, wait_total_s=0.0, wait_max_s=0.0)
+
+def write_stats() -> Dict:
+    """Contention counters for writes made by this process."""
+    with _write_stats_lock:
+        return dict(_write_stats)
+
+def reset_write_stats():
+    with _write_stats_lock:
+        _write_stats.update(writes=0, retries=0, timeouts=0, wait_total_s=0.0, wait_max_s=0.0)
+
+def _record_write(retries: int, waited: float, ok: bool):
+    with _write_stats_lock:
+        _write_stats["retries"] += retries
+        _write_stats["writes" if ok else "timeouts"] += 1
+        _write_stats["wait_total_s"] += waited
+        _write_stats["wait_max_s"] = max(_write_stats["wait_max_s"], waited)
+
+def _is_busy(e: sqlite3.OperationalError) -> bool:
+    msg = str(e)
+    return "locked" in msg or "busy" in msg
+
+def _with_backoff(con, sql: str, deadline: float, start: float, retries: int) -> int:
+    """Run ``sql`` (BEGIN IMMEDIATE / COMMIT), retrying while the database is busy."""
+    while True:
+        try:
+            con.execute(sql)
+            return retries
+        except sqlite3.OperationalError as e:
+            now = time.monotonic()
+            if not _is_busy(e) or now >= deadline:
+                if _is_busy(e):
+                    _record_write(retries, now - start, ok=False)
+                    raise WriteTimeout(f"database is locked: gave up after {now - start:.2f}s "
+                                       f"and {retries} retries") from e
+                raise
+            delay = random.uniform(0, min(WRITE_BACKOFF_MAX, WRITE_BACKOFF_BASE * 2 ** retries))
+            time.sleep(min(delay, deadline - now))
+            retries += 1
+
+@contextmanager
+def writer(db_path: str = DEFAULT_DB, timeout: Optional[float] = None):
+    """Connection inside a ``BEGIN IMMEDIATE`` transaction, committed on normal exit.
+
+    ``timeout`` (default :data:`WRITE_TIMEOUT`) bounds the total time spent waiting
+    for the lock and for the commit; :class:`WriteTimeout` is raised past it.
+
+    On a bound connection that is already inside a transaction the block runs in a
+    savepoint instead, so a failing call is undone without aborting the surrounding
+    batch (group commit, see :mod:`aiodb`).
+    """
+    bound = _bound_connection(db_path)
+    if bound is not None and bound.in_transaction:
+        bound.execute("SAVEPOINT db_writer")
+        try:
+            yield bound
+        except BaseException:
+            bound.execute("ROLLBACK TO db_writer")
+            raise
+        finally:
+            bound.execute("RELEASE db_writer")
+        return
+    start = time.monotonic()
+    deadline = start + (WRITE_TIMEOUT if timeout is None else timeout)
+    con = bound or sqlite3.connect(db_path, timeout=WRITE_BUSY_TIMEOUT, isolation_level=None)
+    try:
+        if bound is None:
+            con.execute("PRAGMA foreign_keys = ON;")
+        retries = _with_backoff(con, "BEGIN IMMEDIATE", deadline, start, 0)
+        try:
+            yield con
+            retries = _with_backoff(con, "COMMIT", deadline, start, retries)
+        except BaseException:
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            raise
+        _record_write(retries, time.monotonic() - start, ok=True)
+    finally:
+        if bound is None:
+            con.close()
+
+@contextmanager
+def transaction(db_path: str = DEFAULT_DB, timeout: Optional[float] = None):
+    """Run every db.py call on ``db_path`` in this block in one write transaction.
+
+    Each call's own :func:`writer` becomes a savepoint on the shared connection, so
+    either all of them are committed or, if the block raises, none.
+    """
+    if _bound_connection(db_path) is not None:  # e.g. a SerialWriter job
+        with writer(db_path, timeout) as con:
+            yield con
+        return
+    con = sqlite3.connect(db_path, timeout=WRITE_BUSY_TIMEOUT, isolation_level=None)
+    try:
+        con.execute("PRAGMA foreign_keys = ON;")
+        with bind(con, db_path), writer(db_path, timeout):
+            yield con
+    finally:
+        con.close()
+
+# MIGRATIONS[i] upgrades a database from ``PRAGMA user_version`` i to i+1. Append new
+# steps (an SQL script or a callable taking the connection); never edit shipped ones.
+# A callable with ``transactional = False`` runs before the step's transaction and
+# must be idempotent.
+MIGRATIONS = [
+    SCHEMA_SQL,
+    STATS_SQL,
+    CHANGELOG_SQL,
+    ENROLLMENT_SQL,
+    TIMETABLE_SQL,
+    TRIGRAM_SQL,
+    MAINTENANCE_SQL,
+    _incremental_auto_vacuum,
+    FILTER_SQL,
+    EMAIL_DOMAIN_SQL,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def _statements(script: str):
+    buf = ""
+    for part in script.split(";"):
+        buf += part + ";"
+        if sqlite3.complete_statement(buf):
+            if buf.strip(" \n;"):
+                yield buf.strip()
+            buf = ""
+
+def schema_version(db_path: str = DEFAULT_DB) -> int:
+    with connect(db_path) as con:
+        return con.execute("PRAGMA user_version").fetchone()[0]
+
 def init_db(db_path: str = DEFAULT_DB):
+    """Create or upgrade the schema; cheap no-op when it is already current."""
     with connect(db_path) as con:
-        con.executescript(SCHEMA_SQL)
+        if con.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        con.isolation_level = None
+        if not con.execute("SELECT 1 FROM sqlite_master").fetchone():
+            con.execute("PRAGMA auto_vacuum = INCREMENTAL")  # a new file: applies from the first table
+        for version, step in enumerate(MIGRATIONS, start=1):
+            outside = callable(step) and not getattr(step, "transactional", True)
+            if outside and con.execute("PRAGMA user_version").fetchone()[0] < version:
+                step(con)
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                # re-check under the write lock: another process may have migrated meanwhile
+                if con.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    con.execute("ROLLBACK"); continue
+                if callable(step):
+                    if not outside:
+                        step(con)
+                else:
+                    for stmt in _statements(step):
+                        con.execute(stmt)
+                con.execute(f"PRAGMA user_version = {version}")
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+
+def _page(limit: Optional[int], offset: int):
+    return (-1 if limit is None else limit, offset)
+
 def add_student(student_id: str, name: str, age: int, email: str, db_path: str = DEFAULT_DB):
-    with connect(db_path) as con:
+    student_id, name, age, email = V.person(student_id, name, age, email, "student_id")
+    with writer(db_path) as con:
         con.execute("INSERT INTO students(student_id, name, age, email) VALUES (?, ?, ?, ?)",
                     (student_id, name, age, email))
 
-def list_students(db_path: str = DEFAULT_DB) -> List[Dict]:
+def list_students(db_path: str = DEFAULT_DB, *, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
     with connect(db_path) as con:
-        rows = con.execute("SELECT student_id, name, age, email FROM students ORDER BY student_id").fetchall()
+        rows = con.execute("SELECT student_id, name, age, email FROM students ORDER BY student_id LIMIT ? OFFSET ?",
+                           _page(limit, offset)).fetchall()
     return [dict(student_id=r[0], name=r[1], age=r[2], email=r[3]) for r in rows]
 
 def get_student(student_id: str, db_path: str = DEFAULT_DB) -> Optional[Dict]:
@@ -74,8 +630,8 @@ def get_student(student_id: str, db_path: str = DEFAULT_DB) -> Optional[Dict]:
 
 def update_student(student_id: str, *, new_id: Optional[str]=None, name: Optional[str]=None,
                    age: Optional[int]=None, email: Optional[str]=None, db_path: str = DEFAULT_DB):
-    with connect(db_path) as con:
-        
+    new_id, name, age, email = V.person_changes(new_id or None, name, age, email, "student_id")
+    with writer(db_path) as con:
         if new_id and new_id != student_id:
             con.execute("UPDATE students SET student_id=? WHERE student_id=?", (new_id, student_id))
             student_id = new_id
@@ -88,18 +644,20 @@ def update_student(student_id: str, *, new_id: Optional[str]=None, name: Optiona
             con.execute(f"UPDATE students SET {', '.join(sets)} WHERE student_id=?", vals)
 
 def delete_student(student_id: str, db_path: str = DEFAULT_DB):
-    with connect(db_path) as con:
+    with writer(db_path) as con:
         con.execute("DELETE FROM students WHERE student_id=?", (student_id,))
 
 
 def add_instructor(instructor_id: str, name: str, age: int, email: str, db_path: str = DEFAULT_DB):
-    with connect(db_path) as con:
+    instructor_id, name, age, email = V.person(instructor_id, name, age, email, "instructor_id")
+    with writer(db_path) as con:
         con.execute("INSERT INTO instructors(instructor_id, name, age, email) VALUES (?, ?, ?, ?)",
                     (instructor_id, name, age, email))
 
-def list_instructors(db_path: str = DEFAULT_DB) -> List[Dict]:
+def list_instructors(db_path: str = DEFAULT_DB, *, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
     with connect(db_path) as con:
-        rows = con.execute("SELECT instructor_id, name, age, email FROM instructors ORDER BY instructor_id").fetchall()
+        rows = con.execute("SELECT instructor_id, name, age, email FROM instructors ORDER BY instructor_id LIMIT ? OFFSET ?",
+                           _page(limit, offset)).fetchall()
     return [dict(instructor_id=r[0], name=r[1], age=r[2], email=r[3]) for r in rows]
 
 def get_instructor(instructor_id: str, db_path: str = DEFAULT_DB) -> Optional[Dict]:
@@ -110,7 +668,8 @@ def get_instructor(instructor_id: str, db_path: str = DEFAULT_DB) -> Optional[Di
 
 def update_instructor(instructor_id: str, *, new_id: Optional[str]=None, name: Optional[str]=None,
                       age: Optional[int]=None, email: Optional[str]=None, db_path: str = DEFAULT_DB):
-    with connect(db_path) as con:
+    new_id, name, age, email = V.person_changes(new_id or None, name, age, email, "instructor_id")
+    with writer(db_path) as con:
         if new_id and new_id != instructor_id:
             con.execute("UPDATE instructors SET instructor_id=? WHERE instructor_id=?", (new_id, instructor_id))
             instructor_id = new_id
@@ -123,54 +682,139 @@ def update_instructor(instructor_id: str, *, new_id: Optional[str]=None, name: O
             con.execute(f"UPDATE instructors SET {', '.join(sets)} WHERE instructor_id=?", vals)
 
 def delete_instructor(instructor_id: str, db_path: str = DEFAULT_DB):
-    with connect(db_path) as con:
+    with writer(db_path) as con:
         
         con.execute("DELETE FROM instructors WHERE instructor_id=?", (instructor_id,))
 
 
-def add_course(course_id: str, course_name: str, instructor_id: Optional[str], db_path: str = DEFAULT_DB):
-    with connect(db_path) as con:
-        con.execute("INSERT INTO courses(course_id, course_name, instructor_id) VALUES (?, ?, ?)",
-                    (course_id, course_name, instructor_id))
+def add_course(course_id: str, course_name: str, instructor_id: Optional[str], db_path: str = DEFAULT_DB,
+               capacity: Optional[int] = None, slots=None, *, allow_conflicts: bool = False):
+    """Insert a course; ``slots`` are its meeting times (see :func:`set_course_slots`)."""
+    course_id, course_name, instructor_id, capacity = V.course(
+        dict(course_id=course_id, course_name=course_name, instructor_id=instructor_id, capacity=capacity))
+    slots = _parse_slots(slots, course_id)
+    with writer(db_path) as con:
+        con.execute("INSERT INTO courses(course_id, course_name, instructor_id, capacity) VALUES (?, ?, ?, ?)",
+                    (course_id, course_name, instructor_id, capacity))
+        if slots:
+            _insert_slots(con, course_id, slots)
+            if not allow_conflicts:
+                _no_conflicts(T.instructor_conflicts(con, instructor_id, [course_id]))
 
-def list_courses(db_path: str = DEFAULT_DB) -> List[Dict]:
+def list_courses(db_path: str = DEFAULT_DB, *, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
     with connect(db_path) as con:
         rows = con.execute("""
-            SELECT c.course_id, c.course_name, c.instructor_id, i.name
+            SELECT c.course_id, c.course_name, c.instructor_id, i.name, c.capacity
             FROM courses c
             LEFT JOIN instructors i ON i.instructor_id = c.instructor_id
             ORDER BY c.course_id
-        """).fetchall()
-    return [dict(course_id=r[0], course_name=r[1], instructor_id=r[2], instructor_name=(r[3] or "-")) for r in rows]
+            LIMIT ? OFFSET ?
+        """, _page(limit, offset)).fetchall()
+    return [dict(course_id=r[0], course_name=r[1], instructor_id=r[2], instructor_name=(r[3] or "-"), capacity=r[4])
+            for r in rows]
 
 def get_course(course_id: str, db_path: str = DEFAULT_DB) -> Optional[Dict]:
     with connect(db_path) as con:
-        r = con.execute("SELECT course_id, course_name, instructor_id FROM courses WHERE course_id=?",
+        r = con.execute("SELECT course_id, course_name, instructor_id, capacity FROM courses WHERE course_id=?",
                         (course_id,)).fetchone()
-    return None if not r else dict(course_id=r[0], course_name=r[1], instructor_id=r[2])
+    return None if not r else dict(course_id=r[0], course_name=r[1], instructor_id=r[2], capacity=r[3])
 
 def update_course(course_id: str, *, new_id: Optional[str]=None, course_name: Optional[str]=None,
-                  instructor_id: Optional[str]=None, db_path: str = DEFAULT_DB):
-    with connect(db_path) as con:
+                  instructor_id: Optional[str]=None, slots=None, db_path: str = DEFAULT_DB,
+                  allow_conflicts: bool = False):
+    """Change a course; ``slots`` (if not None) replace its meeting times in the same transaction."""
+    new_id = V.check_id(new_id, "course_id") if new_id else None
+    course_name = None if course_name is None else V.check_name(course_name, "course_name")
+    instructor_id = V.optional_id(instructor_id, "instructor_id")
+    with writer(db_path) as con:
         if new_id and new_id != course_id:
             con.execute("UPDATE courses SET course_id=? WHERE course_id=?", (new_id, course_id))
             course_id = new_id
+        if slots is not None:  # new times first, so the instructor check below sees them
+            slots = _parse_slots(slots, course_id)
+            if not allow_conflicts:
+                _no_conflicts(T.course_conflicts(con, course_id, slots))
+            con.execute("DELETE FROM course_slots WHERE course_id=?", (course_id,))
+            _insert_slots(con, course_id, slots)
         if any(v is not None for v in (course_name, instructor_id)):
             sets, vals = [], []
             if course_name is not None: sets.append("course_name=?"); vals.append(course_name)
             sets.append("instructor_id=?"); vals.append(instructor_id)  # can be None
             vals.append(course_id)
             con.execute(f"UPDATE courses SET {', '.join(sets)} WHERE course_id=?", vals)
+            if instructor_id and not allow_conflicts:
+                _no_conflicts(T.instructor_conflicts(con, instructor_id, [course_id]))
 
 def delete_course(course_id: str, db_path: str = DEFAULT_DB):
-    with connect(db_path) as con:
+    with writer(db_path) as con:
         con.execute("DELETE FROM courses WHERE course_id=?", (course_id,))
 
+def _parse_slots(slots, course_id: str) -> List[T.Slot]:
+    """Meeting times given as text ("Mon 09:00-10:15, Wed ...") or a list of texts or Slots."""
+    if not slots:
+        return []
+    try:
+        items = T.parse_slots(slots) if isinstance(slots, str) else [
+            T.parse_slot(s) if isinstance(s, str) else T.Slot(*s) for s in slots]
+    except ValueError as e:
+        raise V.ValidationError("slots", str(e)) from None
+    return [s._replace(course_id=course_id) for s in items]
 
-def register_student(student_id: str, course_id: str, db_path: str = DEFAULT_DB):
+def _insert_slots(con, course_id: str, slots: List[T.Slot]):
+    con.executemany("INSERT INTO course_slots(course_id, day, start_min, end_min) VALUES (?, ?, ?, ?)",
+                    [(course_id, s.day, s.start, s.end) for s in slots])
+
+def list_course_slots(course_id: str, db_path: str = DEFAULT_DB) -> List[Dict]:
     with connect(db_path) as con:
-        con.execute("INSERT OR IGNORE INTO registrations(student_id, course_id) VALUES (?, ?)",
-                    (student_id, course_id))
+        rows = con.execute("SELECT day, start_min, end_min FROM course_slots WHERE course_id=? "
+                           "ORDER BY day, start_min", (course_id,)).fetchall()
+    return [dict(day=r[0], start_min=r[1], end_min=r[2], text=T.format_slot(T.Slot(course_id, *r))) for r in rows]
+
+def set_course_slots(course_id: str, slots, db_path: str = DEFAULT_DB, *, allow_conflicts: bool = False):
+    """Replace a course's meeting times.
+
+    Refused with :class:`ScheduleConflict` when the new times would double-book its
+    instructor or any student registered in it, unless ``allow_conflicts``.
+    """
+    slots = _parse_slots(slots, course_id)
+    with writer(db_path) as con:
+        if not allow_conflicts:
+            _no_conflicts(T.course_conflicts(con, course_id, slots))
+        con.execute("DELETE FROM course_slots WHERE course_id=?", (course_id,))
+        _insert_slots(con, course_id, slots)
+
+
+REGISTERED, WAITLISTED, FULL = "registered", "waitlisted", "full"
+
+def register_student(student_id: str, course_id: str, db_path: str = DEFAULT_DB, *, waitlist: bool = True,
+                     allow_conflicts: bool = False) -> str:
+    """Enroll a student, or queue them on the waitlist when the course is full.
+
+    The seat check and the insert run in one ``BEGIN IMMEDIATE`` transaction, so
+    concurrent registrations cannot over-fill a course. Returns :data:`REGISTERED`,
+    :data:`WAITLISTED`, or :data:`FULL` when ``waitlist`` is false. Registering
+    again changes nothing and returns the current state. A course that meets at
+    the same time as one the student is registered or waitlisted for raises
+    :class:`ScheduleConflict` unless ``allow_conflicts``.
+    """
+    with writer(db_path) as con:
+        if con.execute("SELECT 1 FROM registrations WHERE student_id=? AND course_id=?",
+                       (student_id, course_id)).fetchone():
+            return REGISTERED
+        if not allow_conflicts:
+            _no_conflicts(T.student_conflicts(con, student_id, [course_id]))
+        row = con.execute("""
+            SELECT capacity, (SELECT COUNT(*) FROM registrations r WHERE r.course_id = c.course_id)
+            FROM courses c WHERE course_id=?
+        """, (course_id,)).fetchone()
+        capacity, enrolled = row or (None, 0)  # an unknown course fails the foreign key below
+        if capacity is None or enrolled < capacity:
+            con.execute("INSERT INTO registrations(student_id, course_id) VALUES (?, ?)", (student_id, course_id))
+            return REGISTERED
+        if not waitlist:
+            return FULL
+        con.execute("INSERT OR IGNORE INTO waitlist(student_id, course_id) VALUES (?, ?)", (student_id, course_id))
+        return WAITLISTED
 
 def list_registrations_for_student(student_id: str, db_path: str = DEFAULT_DB) -> List[Dict]:
     with connect(db_path) as con:
@@ -192,13 +836,223 @@ def list_registrations_for_course(course_id: str, db_path: str = DEFAULT_DB) ->
         """, (course_id,)).fetchall()
     return [dict(student_id=r[0], name=r[1]) for r in rows]
 
-def unregister_student(student_id: str, course_id: str, db_path: str = DEFAULT_DB):
-    with connect(db_path) as con:
+def unregister_student(student_id: str, course_id: str, db_path: str = DEFAULT_DB) -> Optional[str]:
+    """Drop a registration or a waitlist place.
+
+    Returns the student promoted from the waitlist into the freed seat, if any.
+    """
+    with writer(db_path) as con:
+        head = con.execute("SELECT student_id FROM waitlist WHERE course_id=? ORDER BY seq LIMIT 1",
+                           (course_id,)).fetchone()
+        con.execute("DELETE FROM waitlist WHERE student_id=? AND course_id=?", (student_id, course_id))
         con.execute("DELETE FROM registrations WHERE student_id=? AND course_id=?",
                     (student_id, course_id))
+        if head and head[0] != student_id and con.execute(
+                "SELECT 1 FROM registrations WHERE student_id=? AND course_id=?", (head[0], course_id)).fetchone():
+            return head[0]
+    return None
+
+def list_waitlist(course_id: str, db_path: str = DEFAULT_DB) -> List[Dict]:
+    """Waiting students in promotion order, with their 1-based position."""
+    with connect(db_path) as con:
+        rows = con.execute("""
+            SELECT w.student_id, s.name
+            FROM waitlist w JOIN students s ON s.student_id = w.student_id
+            WHERE w.course_id=?
+            ORDER BY w.seq
+        """, (course_id,)).fetchall()
+    return [dict(student_id=r[0], name=r[1], position=i) for i, r in enumerate(rows, start=1)]
+
+def set_course_capacity(course_id: str, capacity: Optional[int], db_path: str = DEFAULT_DB) -> List[str]:
+    """Change a course's capacity (None = unlimited); returns the students promoted from the waitlist.
+
+    Lowering it below the current enrollment raises ``sqlite3.IntegrityError``.
+    """
+    capacity = V.check_capacity(capacity)
+    with writer(db_path) as con:
+        waiting = [r[0] for r in con.execute("SELECT student_id FROM waitlist WHERE course_id=? ORDER BY seq",
+                                             (course_id,))]
+        con.execute("UPDATE courses SET capacity=? WHERE course_id=?", (capacity, course_id))
+        left = {r[0] for r in con.execute("SELECT student_id FROM waitlist WHERE course_id=?", (course_id,))}
+    return [sid for sid in waiting if sid not in left]
+
+# Set-based deletes: the keys go into a temp table and one DELETE removes them all in a
+# single transaction (the foreign keys cascade as usual). Each returns the number of
+# rows deleted per table, plus what the cascade touched.
+_DELETES = {
+    "students": ("student_id", [("registrations", "DELETE", "student_id"), ("waitlist", "DELETE", "student_id")]),
+    "instructors": ("instructor_id", [("courses", "SET NULL", "instructor_id")]),
+    "courses": ("course_id", [("registrations", "DELETE", "course_id"), ("waitlist", "DELETE", "course_id")]),
+}
+
+# Named predicates for delete_where(), as SQL conditions on the target table.
+DELETE_PREDICATES = {
+    ("students", "unregistered"):
+        "NOT EXISTS (SELECT 1 FROM registrations r WHERE r.student_id = students.student_id)",
+    ("instructors", "unassigned"):
+        "NOT EXISTS (SELECT 1 FROM courses c WHERE c.instructor_id = instructors.instructor_id)",
+    ("courses", "empty"):
+        "NOT EXISTS (SELECT 1 FROM registrations r WHERE r.course_id = courses.course_id)",
+    ("courses", "unassigned"): "instructor_id IS NULL",
+}
+
+def _bulk_keys(con):
+    """The connection with an empty ``temp.bulk_keys`` table to stage keys in."""
+    con.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_keys(k TEXT PRIMARY KEY) WITHOUT ROWID")
+    con.execute("DELETE FROM temp.bulk_keys")
+    return con
+
+def _bulk_delete(con, table: str, fill) -> Dict[str, int]:
+    key, cascades = _DELETES[table]
+    fill(_bulk_keys(con))
+    counts = {}
+    for child, action, col in cascades:
+        n = con.execute(f"SELECT COUNT(*) FROM {child} WHERE {col} IN (SELECT k FROM temp.bulk_keys)").fetchone()[0]
+        counts[child if action == "DELETE" else f"{child}_unassigned"] = n
+    cur = con.execute(f"DELETE FROM {table} WHERE {key} IN (SELECT k FROM temp.bulk_keys)")
+    con.execute("DELETE FROM temp.bulk_keys")
+    return {table: cur.rowcount, **counts}
+
+def _delete_ids(table: str, ids: Iterable[str], db_path: str) -> Dict[str, int]:
+    keys = [(str(k),) for k in ids]
+    with writer(db_path) as con:
+        return _bulk_delete(con, table, lambda c: c.executemany(
+            "INSERT OR IGNORE INTO temp.bulk_keys(k) VALUES (?)", keys))
+
+def delete_students(student_ids: Iterable[str], db_path: str = DEFAULT_DB) -> Dict[str, int]:
+    """Delete many students at once; ``{"students": n, "registrations": m, "waitlist": w}``."""
+    return _delete_ids("students", student_ids, db_path)
 
+def delete_instructors(instructor_ids: Iterable[str], db_path: str = DEFAULT_DB) -> Dict[str, int]:
+    """Delete many instructors at once; ``{"instructors": n, "courses_unassigned": m}``."""
+    return _delete_ids("instructors", instructor_ids, db_path)
 
-def search_students(q: str, db_path: str = DEFAULT_DB) -> List[Dict]:
+def delete_courses(course_ids: Iterable[str], db_path: str = DEFAULT_DB) -> Dict[str, int]:
+    """Delete many courses at once; ``{"courses": n, "registrations": m, "waitlist": w}``."""
+    return _delete_ids("courses", course_ids, db_path)
+
+def delete_where(table: str, predicate: str, db_path: str = DEFAULT_DB) -> Dict[str, int]:
+    """Delete every row of ``table`` matching a :data:`DELETE_PREDICATES` entry.
+
+    ``delete_where("students", "unregistered")`` removes all students without a
+    registration. Matching and deleting happen in the same transaction.
+    """
+    if (table, predicate) not in DELETE_PREDICATES:
+        raise ValueError(f"unknown predicate {predicate!r} for {table}")
+    key, _ = _DELETES[table]
+    sql = f"INSERT INTO temp.bulk_keys(k) SELECT {key} FROM {table} WHERE {DELETE_PREDICATES[table, predicate]}"
+    with writer(db_path) as con:
+        return _bulk_delete(con, table, lambda c: c.execute(sql))
+
+# Set-based reassignment. Both return the course IDs whose instructor actually changed, and
+# refuse (ScheduleConflict) to double-book the new instructor unless allow_conflicts.
+def assign_instructor_bulk(course_ids: Iterable[str], instructor_id: Optional[str],
+                           db_path: str = DEFAULT_DB, *, allow_conflicts: bool = False) -> List[str]:
+    """Give every course in ``course_ids`` to ``instructor_id`` (None unassigns them) in one UPDATE."""
+    instructor_id = V.optional_id(instructor_id, "instructor_id")
+    keys = [(str(k),) for k in course_ids]
+    with writer(db_path) as con:
+        _bulk_keys(con).executemany("INSERT OR IGNORE INTO temp.bulk_keys(k) VALUES (?)", keys)
+        where = "course_id IN (SELECT k FROM temp.bulk_keys) AND instructor_id IS NOT ?"
+        changed = [r[0] for r in con.execute(f"SELECT course_id FROM courses WHERE {where} ORDER BY course_id",
+                                             (instructor_id,))]
+        con.execute(f"UPDATE courses SET instructor_id = ? WHERE {where}", (instructor_id, instructor_id))
+        con.execute("DELETE FROM temp.bulk_keys")
+        if not allow_conflicts:
+            _no_conflicts(T.instructor_conflicts(con, instructor_id, changed))
+    return changed
+
+def reassign_courses(from_instructor_id: str, to_instructor_id: Optional[str],
+                     db_path: str = DEFAULT_DB, *, allow_conflicts: bool = False) -> List[str]:
+    """Move all of one instructor's courses to another (None unassigns them) in one UPDATE."""
+    to_instructor_id = V.optional_id(to_instructor_id, "instructor_id")
+    if to_instructor_id == from_instructor_id:
+        return []
+    with writer(db_path) as con:
+        changed = [r[0] for r in con.execute(
+            "SELECT course_id FROM courses WHERE instructor_id = ? ORDER BY course_id", (from_instructor_id,))]
+        con.execute("UPDATE courses SET instructor_id = ? WHERE instructor_id = ?",
+                    (to_instructor_id, from_instructor_id))
+        if not allow_conflicts:
+            _no_conflicts(T.instructor_conflicts(con, to_instructor_id, changed))
+    return changed
+
+# One query for a whole table instead of one list_registrations_* call per row.
+# ``keys`` limits it to those rows (passed as one JSON array, so no temp table is needed).
+def _grouped(sql: str, db_path: str, key_col: str, keys: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    params = ()
+    if keys is not None:
+        sql = sql.replace("{where}", f"WHERE {key_col} IN (SELECT value FROM json_each(?))")
+        params = (json.dumps(list(keys)),)
+    else:
+        sql = sql.replace("{where}", "")
+    out: Dict[str, List[str]] = {}
+    with connect(db_path) as con:
+        for key, value in con.execute(sql, params):
+            out.setdefault(key, []).append(value)
+    return out
+
+def course_names_by_student(db_path: str = DEFAULT_DB, keys: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    return _grouped("""
+        SELECT r.student_id, c.course_name
+        FROM registrations r JOIN courses c ON c.course_id = r.course_id
+        {where}
+        ORDER BY r.student_id, r.course_id
+    """, db_path, "r.student_id", keys)
+
+def student_names_by_course(db_path: str = DEFAULT_DB, keys: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    return _grouped("""
+        SELECT r.course_id, s.name
+        FROM registrations r JOIN students s ON s.student_id = r.student_id
+        {where}
+        ORDER BY r.course_id, r.student_id
+    """, db_path, "r.course_id", keys)
+
+def course_names_by_instructor(db_path: str = DEFAULT_DB, keys: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    rows = _grouped("""
+        SELECT instructor_id, course_name FROM courses
+        {where}
+        ORDER BY instructor_id, course_id
+    """, db_path, "instructor_id", keys)
+    rows.pop(None, None)  # unassigned courses
+    return rows
+
+def students_by_id(student_ids: Iterable[str], db_path: str = DEFAULT_DB) -> List[Dict]:
+    """:func:`list_students` restricted to ``student_ids``."""
+    with connect(db_path) as con:
+        rows = con.execute("""
+            SELECT student_id, name, age, email FROM students
+            WHERE student_id IN (SELECT value FROM json_each(?))
+            ORDER BY student_id
+        """, (json.dumps(list(student_ids)),)).fetchall()
+    return [dict(student_id=r[0], name=r[1], age=r[2], email=r[3]) for r in rows]
+
+def instructors_by_id(instructor_ids: Iterable[str], db_path: str = DEFAULT_DB) -> List[Dict]:
+    """:func:`list_instructors` restricted to ``instructor_ids``."""
+    with connect(db_path) as con:
+        rows = con.execute("""
+            SELECT instructor_id, name, age, email FROM instructors
+            WHERE instructor_id IN (SELECT value FROM json_each(?))
+            ORDER BY instructor_id
+        """, (json.dumps(list(instructor_ids)),)).fetchall()
+    return [dict(instructor_id=r[0], name=r[1], age=r[2], email=r[3]) for r in rows]
+
+def courses_by_id(course_ids: Iterable[str], db_path: str = DEFAULT_DB) -> List[Dict]:
+    """:func:`list_courses` restricted to ``course_ids``."""
+    with connect(db_path) as con:
+        rows = con.execute("""
+            SELECT c.course_id, c.course_name, c.instructor_id, i.name, c.capacity
+            FROM courses c
+            LEFT JOIN instructors i ON i.instructor_id = c.instructor_id
+            WHERE c.course_id IN (SELECT value FROM json_each(?))
+            ORDER BY c.course_id
+        """, (json.dumps(list(course_ids)),)).fetchall()
+    return [dict(course_id=r[0], course_name=r[1], instructor_id=r[2], instructor_name=(r[3] or "-"), capacity=r[4])
+            for r in rows]
+
+
+def search_students(q: str, db_path: str = DEFAULT_DB, *, limit: Optional[int] = None,
+                    offset: int = 0) -> List[Dict]:
     pat = f"%{q}%"
     with connect(db_path) as con:
         rows = con.execute("""
@@ -206,10 +1060,12 @@ def search_students(q: str, db_path: str = DEFAULT_DB) -> List[Dict]:
             FROM students
             WHERE student_id LIKE ? OR name LIKE ? OR email LIKE ?
             ORDER BY student_id
-        """, (pat, pat, pat)).fetchall()
+            LIMIT ? OFFSET ?
+        """, (pat, pat, pat, *_page(limit, offset))).fetchall()
     return [dict(student_id=r[0], name=r[1], age=r[2], email=r[3]) for r in rows]
 
-def search_instructors(q: str, db_path: str = DEFAULT_DB) -> List[Dict]:
+def search_instructors(q: str, db_path: str = DEFAULT_DB, *, limit: Optional[int] = None,
+                       offset: int = 0) -> List[Dict]:
     pat = f"%{q}%"
     with connect(db_path) as con:
         rows = con.execute("""
@@ -217,20 +1073,148 @@ def search_instructors(q: str, db_path: str = DEFAULT_DB) -> List[Dict]:
             FROM instructors
             WHERE instructor_id LIKE ? OR name LIKE ? OR email LIKE ?
             ORDER BY instructor_id
-        """, (pat, pat, pat)).fetchall()
+            LIMIT ? OFFSET ?
+        """, (pat, pat, pat, *_page(limit, offset))).fetchall()
     return [dict(instructor_id=r[0], name=r[1], age=r[2], email=r[3]) for r in rows]
 
-def search_courses(q: str, db_path: str = DEFAULT_DB) -> List[Dict]:
+def search_courses(q: str, db_path: str = DEFAULT_DB, *, limit: Optional[int] = None,
+                   offset: int = 0) -> List[Dict]:
     pat = f"%{q}%"
     with connect(db_path) as con:
         rows = con.execute("""
-            SELECT c.course_id, c.course_name, c.instructor_id, COALESCE(i.name, '-')
+            SELECT c.course_id, c.course_name, c.instructor_id, COALESCE(i.name, '-'), c.capacity
             FROM courses c LEFT JOIN instructors i ON i.instructor_id=c.instructor_id
             WHERE c.course_id LIKE ? OR c.course_name LIKE ? OR COALESCE(i.name,'') LIKE ?
             ORDER BY c.course_id
-        """, (pat, pat, pat)).fetchall()
-    return [dict(course_id=r[0], course_name=r[1], instructor_id=r[2], instructor_name=r[3]) for r in rows]
+            LIMIT ? OFFSET ?
+        """, (pat, pat, pat, *_page(limit, offset))).fetchall()
+    return [dict(course_id=r[0], course_name=r[1], instructor_id=r[2], instructor_name=r[3], capacity=r[4])
+            for r in rows]
+
+
+# Structured filters for the Records views. Each filter compiles to a parameterized
+# condition on a column or expression that FILTER_SQL indexes (the expressions must match
+# the index text); ranges are inclusive ``(lo, hi)`` pairs, None leaving an end open.
+# Results are ordered by primary key and paged with limit/offset or, cheaper for deep
+# pages, ``after`` = the last key of the previous page.
+_DOMAIN = "substr({0}, instr({0}, '@') + 1)"
+FILTERS = {
+    "students": {"age": "range", "email_domain": "domain", "courses": "range"},
+    "instructors": {"age": "range", "email_domain": "domain", "courses": "range"},
+    "courses": {"enrolled": "range", "has_instructor": "present", "instructor_id": "equal"},
+}
+_FILTER_COLUMNS = {
+    "students": {"age": "s.age", "email_domain": _DOMAIN.format("s.email"), "courses": "st.courses"},
+    "instructors": {"age": "i.age", "email_domain": _DOMAIN.format("i.email"), "courses": "ist.courses"},
+    "courses": {"enrolled": "cs.enrolled", "has_instructor": "c.instructor_id", "instructor_id": "c.instructor_id"},
+}
+_FILTER_QUERIES = {  # key column, selected columns, FROM table, joins by alias, columns searched by q
+    "students": ("s.student_id", "s.student_id, s.name, s.age, s.email, st.courses", "students s",
+                 {"st": "JOIN student_stats st ON st.student_id = s.student_id"},
+                 ("s.student_id", "s.name", "s.email")),
+    "instructors": ("i.instructor_id", "i.instructor_id, i.name, i.age, i.email, ist.courses", "instructors i",
+                    {"ist": "JOIN instructor_stats ist ON ist.instructor_id = i.instructor_id"},
+                    ("i.instructor_id", "i.name", "i.email")),
+    "courses": ("c.course_id", "c.course_id, c.course_name, c.instructor_id, COALESCE(i.name, '-'), c.capacity, "
+                "cs.enrolled", "courses c",
+                {"cs": "JOIN course_stats cs ON cs.course_id = c.course_id",
+                 "i": "LEFT JOIN instructors i ON i.instructor_id = c.instructor_id"},
+                ("c.course_id", "c.course_name", "COALESCE(i.name, '')")),
+}
+_FILTER_DICTS = {
+    "students": lambda r: dict(student_id=r[0], name=r[1], age=r[2], email=r[3], courses=r[4]),
+    "instructors": lambda r: dict(instructor_id=r[0], name=r[1], age=r[2], email=r[3], courses=r[4]),
+    "courses": lambda r: dict(course_id=r[0], course_name=r[1], instructor_id=r[2], instructor_name=r[3],
+                              capacity=r[4], enrolled=r[5]),
+}
+
+def _filter_where(table: str, q: str, filters: Dict, by_key: bool = False) -> Tuple[List[str], List]:
+    """SQL conditions and parameters for ``filters`` (see :data:`FILTERS`) and a LIKE search ``q``.
+
+    ``by_key`` writes the columns as ``+col``, which keeps SQLite off their indexes.
+    """
+    if table not in FILTERS:
+        raise ValueError(f"unknown table {table!r}")
+    where, params = [], []
+    for field, value in filters.items():
+        kind = FILTERS[table].get(field)
+        if kind is None:
+            raise ValueError(f"unknown filter {field!r} for {table} (choose from {', '.join(FILTERS[table])})")
+        col = ("+" if by_key else "") + _FILTER_COLUMNS[table][field]
+        if value is None:
+            continue
+        if kind == "range":
+            lo, hi = V.check_range(*value, field)
+            if lo is not None:
+                where.append(f"{col} >= ?"); params.append(lo)
+            if hi is not None:
+                where.append(f"{col} <= ?"); params.append(hi)
+        elif kind == "domain":
+            domain = str(value).strip().lstrip("@").lower()
+            if domain:
+                where.append(f"{col} = ?"); params.append(domain)
+        elif kind == "present":
+            where.append(f"{col} IS {'NOT ' if value else ''}NULL")
+        else:
+            where.append(f"{col} = ?"); params.append(value)
+    if q:
+        pat = f"%{q}%"
+        searched = _FILTER_QUERIES[table][4]
+        where.append("(" + " OR ".join(f"{c} LIKE ?" for c in searched) + ")"); params += [pat] * len(searched)
+    return where, params
+
+def _filter_from(table: str, where: List[str], joins: bool = True) -> str:
+    """``FROM`` clause for ``table`` with every join, or (``joins=False``) only those ``where`` refers to."""
+    _, _, base, all_joins, _ = _FILTER_QUERIES[table]
+    cond = " ".join(where)
+    return " ".join([f"FROM {base}"] + [j for alias, j in all_joins.items()
+                                        if joins or re.search(rf"\b{alias}\.", cond)])
+
+def filter_records(table: str, db_path: str = DEFAULT_DB, *, q: str = "", limit: Optional[int] = None,
+                   offset: int = 0, after: Optional[str] = None, keys: Optional[Iterable[str]] = None,
+                   by_key: bool = False, **filters) -> List[Dict]:
+    """One page of ``table`` rows matching every filter, by primary key.
+
+    ``filter_records("students", age=(18, 20), email_domain="gmail.com", limit=200)``;
+    see :data:`FILTERS` for each table's filters. The rows are the dicts of
+    ``list_*`` plus the count the table's stats row keeps (``courses`` or
+    ``enrolled``). ``keys`` limits the result to those primary keys and ``after``
+    to keys above it (keyset paging).
+
+    SQLite picks the index of a filter even when most rows match, and then sorts
+    them all for the page; ``by_key=True`` walks the primary key instead and stops
+    once the page is full, which is faster for broad filters (see :func:`prefer_key_order`).
+    """
+    where, params = _filter_where(table, q, filters, by_key)
+    key, columns, _, _, _ = _FILTER_QUERIES[table]
+    if after is not None:
+        where.append(f"{key} > ?"); params.append(after)
+    if keys is not None:
+        where.append(f"{key} IN (SELECT value FROM json_each(?))"); params.append(json.dumps(list(keys)))
+    sql = (f"SELECT {columns} {_filter_from(table, where)}" + (" WHERE " + " AND ".join(where) if where else "")
+           + f" ORDER BY {key} LIMIT ? OFFSET ?")
+    with connect(db_path) as con:
+        rows = con.execute(sql, (*params, *_page(limit, offset))).fetchall()
+    return [_FILTER_DICTS[table](r) for r in rows]
+
+def count_records(table: str, db_path: str = DEFAULT_DB, *, q: str = "", **filters) -> int:
+    """How many rows :func:`filter_records` would return without paging.
+
+    Joins only the tables the conditions use, so age and domain counts are read
+    from their (covering) indexes alone.
+    """
+    where, params = _filter_where(table, q, filters)
+    sql = f"SELECT COUNT(*) {_filter_from(table, where, joins=False)}" + (" WHERE " + " AND ".join(where) if where else "")
+    with connect(db_path) as con:
+        return con.execute(sql, params).fetchone()[0]
+
+def prefer_key_order(matching: int, rows: int, limit: int) -> bool:
+    """Whether walking the primary key beats the filter indexes for a page of ``limit``.
 
+    In key order a page reads about ``limit * rows / matching`` rows; through an
+    index, all ``matching`` rows plus a sort.
+    """
+    return matching > 0 and limit * rows < matching * matching
 
 def backup_database(src_path: str = DEFAULT_DB, dest_path: str = "school_backup.db"):
     if not os.path.exists(src_path):
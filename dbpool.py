@@ -0,0 +1,94 @@
+"""Connection reuse for long-running services built on db.py.
+
+:class:`ReadPool` keeps a fixed set of open read connections and :class:`SerialWriter`
+funnels every write of the process through one thread and one connection, so the
+process never competes with itself for the SQLite write lock. Both bind their
+connection with :func:`db.bind`, so the ordinary db.py functions run on it unchanged::
+
+    pool, wr = ReadPool("school.db"), SerialWriter("school.db")
+    rows = pool.run(DB.list_students, "school.db", limit=50)
+    wr.run(DB.add_student, "S1", "Layla", 20, "layla@example.com", "school.db")
+"""
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import db as DB
+
+
+def open_connection(db_path: str, timeout: float = 5.0) -> sqlite3.Connection:
+    """Autocommit connection usable from any thread, ready for :func:`db.bind`."""
+    con = sqlite3.connect(db_path, timeout=timeout, isolation_level=None, check_same_thread=False)
+    con.execute("PRAGMA foreign_keys = ON;")
+    return con
+
+
+class ReadPool:
+    """A fixed number of read connections shared by many threads."""
+
+    def __init__(self, db_path: str = DB.DEFAULT_DB, size: int = 4):
+        self.db_path = db_path
+        self._idle = queue.LifoQueue()
+        self._all = [open_connection(db_path) for _ in range(size)]
+        for con in self._all:
+            self._idle.put(con)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection (blocking while all are busy), bound for db.py calls."""
+        con = self._idle.get()
+        try:
+            with DB.bind(con, self.db_path):
+                yield con
+        finally:
+            self._idle.put(con)
+
+    def run(self, fn, *args, **kwargs):
+        with self.connection():
+            return fn(*args, **kwargs)
+
+    def close(self):
+        for con in self._all:
+            con.close()
+
+
+class SerialWriter:
+    """One background thread executing every submitted write, in submission order."""
+
+    def __init__(self, db_path: str = DB.DEFAULT_DB):
+        self.db_path = db_path
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        fut = Future()
+        self._jobs.put((fut, fn, args, kwargs))
+        return fut
+
+    def run(self, fn, *args, **kwargs):
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _loop(self):
+        con = open_connection(self.db_path, timeout=DB.WRITE_BUSY_TIMEOUT)
+        try:
+            with DB.bind(con, self.db_path):
+                while True:
+                    job = self._jobs.get()
+                    if job is None:
+                        return
+                    fut, fn, args, kwargs = job
+                    if fut.set_running_or_notify_cancel():
+                        try:
+                            fut.set_result(fn(*args, **kwargs))
+                        except BaseException as e:
+                            fut.set_exception(e)
+        finally:
+            con.close()
+
+    def close(self):
+        self._jobs.put(None)
+        self._thread.join()
@@ -0,0 +1,278 @@
+"""Find and merge duplicate students and instructors.
+
+Repeated imports leave the same person under two IDs. Records are only compared
+within a *block*, the records sharing a blocking key, so the work grows with the
+block sizes and never with every pair:
+
+* ``email`` -- the address lower-cased, with any ``+tag`` removed from the local
+  part. Records sharing it are duplicates without further checks.
+* ``name`` -- the age plus either a phonetic key (Soundex of the first word and
+  of the rest, so ``"Ahmad El Jazaerli"``, ``"Ahmad ElJazaerli"`` and
+  ``"Ahmed ElJazairli"`` agree), the first word, or the rest of the name. Records
+  sharing one are duplicates when the trigram similarity of their names (see
+  :mod:`fuzzy`) is at least ``name_min``.
+
+Matching pairs are joined into clusters with a union-find. The record with the
+most registrations (courses, for instructors) survives, lowest ID first on ties.
+:func:`merge_clusters` merges any number of clusters in one transaction: the
+duplicates' registrations and waitlist entries move to the survivor, entries the
+survivor already has are dropped, and the duplicates are deleted. Instructors'
+courses move to the survivor. The triggers keep the summary tables, waitlists and
+change log right as usual.
+
+Usage::
+
+    python dedupe.py find students --db school.db
+    python dedupe.py merge students --all --by email     # merge every email cluster
+    python dedupe.py merge students S001 S104 S377       # merge S104 and S377 into S001
+"""
+
+import argparse
+import sys
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import db as DB
+import fuzzy
+
+KINDS = {"students": ("student_id", "student_stats"), "instructors": ("instructor_id", "instructor_stats")}
+BLOCKS = ("email", "name")
+NAME_MIN = 0.5
+BLOCK_MAX = 1000  # larger name blocks are skipped (reported in ``skipped``), not compared pair by pair
+_SOUNDEX = {c: str(d) for d, letters in enumerate(["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"])
+            for c in letters}
+
+
+class Cluster(NamedTuple):
+    keep: str                  # surviving ID
+    merge: List[str]           # IDs merged into it
+    reasons: Tuple[str, ...]   # blocking keys that linked them ("email", "name")
+    rows: List[Dict]           # the records, survivor first
+
+
+# keys ------------------------------------------------------------------------
+def fold(text: str) -> str:
+    """Lower-case ASCII letters, digits and spaces only (accents removed)."""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return " ".join("".join(c if c.isalnum() else " " for c in text.lower()).split())
+
+
+def soundex(word: str) -> str:
+    letters = [c for c in fold(word) if c.isalpha()]
+    if not letters:
+        return ""
+    out, last = [letters[0].upper()], _SOUNDEX[letters[0]]
+    for c in letters[1:]:
+        code = _SOUNDEX[c]
+        if code != "0" and code != last:
+            out.append(code)
+        if c not in "hw":  # h and w do not separate equal codes
+            last = code
+    return "".join(out)[:4].ljust(4, "0")
+
+
+def name_key(name: str) -> str:
+    words = fold(name).split()
+    return f"{soundex(words[0])}-{soundex(''.join(words[1:]))}" if words else ""
+
+
+def name_blocks(name: str) -> List[str]:
+    """:func:`name_key`, plus the first word and the rest as typed: a typo changes at most one of them."""
+    words = fold(name).split()
+    if not words:
+        return []
+    return [name_key(name), f"first:{words[0]}"] + ([f"rest:{''.join(words[1:])}"] if len(words) > 1 else [])
+
+
+def email_key(email: str) -> str:
+    local, _, domain = (email or "").strip().lower().rpartition("@")
+    return f"{local.split('+', 1)[0]}@{domain}" if local else ""
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of the trigram sets of two names."""
+    ga, gb = fuzzy.trigrams(fold(a)), fuzzy.trigrams(fold(b))
+    return len(ga & gb) / len(ga | gb) if ga and gb else 0.0
+
+
+# finding -----------------------------------------------------------------------
+def _load(kind: str, db_path: str) -> List[Dict]:
+    key, stats = KINDS[kind]
+    with DB.connect(db_path) as con:
+        rows = con.execute(f"""
+            SELECT p.{key}, p.name, p.age, p.email, COALESCE(s.courses, 0)
+            FROM {kind} p LEFT JOIN {stats} s ON s.{key} = p.{key}
+            ORDER BY p.{key}
+        """).fetchall()
+    return [{key: r[0], "name": r[1], "age": r[2], "email": r[3], "courses": r[4]} for r in rows]
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def find_duplicates(kind: str = "students", db_path: str = DB.DEFAULT_DB, *, by: Sequence[str] = BLOCKS,
+                    name_min: float = NAME_MIN, block_max: int = BLOCK_MAX,
+                    skipped: Optional[List[str]] = None) -> List[Cluster]:
+    """Clusters of likely duplicates, largest first. Oversized name blocks are appended to ``skipped``."""
+    if kind not in KINDS:
+        raise ValueError(f"unknown kind: {kind!r}")
+    unknown = set(by) - set(BLOCKS)
+    if unknown:
+        raise ValueError(f"unknown blocking key: {', '.join(sorted(unknown))}")
+    rows = _load(kind, db_path)
+    parent = list(range(len(rows)))
+    links: List[Tuple[int, str]] = []
+
+    def union(i, j, reason):
+        a, b = _find(parent, i), _find(parent, j)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+        links.append((i, reason))
+
+    blocks: Dict[Tuple[str, object], List[int]] = {}
+    for i, r in enumerate(rows):
+        if "email" in by and email_key(r["email"]):
+            blocks.setdefault(("email", email_key(r["email"])), []).append(i)
+        if "name" in by:
+            for k in name_blocks(r["name"]):
+                blocks.setdefault(("name", (k, r["age"])), []).append(i)
+    for (reason, block_key), members in blocks.items():
+        if len(members) < 2:
+            continue
+        if reason == "email":
+            for j in members[1:]:
+                union(members[0], j, reason)
+        elif len(members) > block_max:
+            if skipped is not None:
+                skipped.append(f"{block_key[0]} age {block_key[1]}: {len(members)} records")
+        else:
+            names = [rows[i]["name"] for i in members]
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    if name_similarity(names[x], names[y]) >= name_min:
+                        union(members[x], members[y], reason)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(rows)):
+        groups.setdefault(_find(parent, i), []).append(i)
+    reasons: Dict[int, set] = {}
+    for i, why in links:
+        reasons.setdefault(_find(parent, i), set()).add(why)
+    key = KINDS[kind][0]
+    clusters = []
+    for root, members in groups.items():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda i: (-rows[i]["courses"], rows[i][key]))
+        clusters.append(Cluster(rows[members[0]][key], [rows[i][key] for i in members[1:]],
+                                tuple(r for r in BLOCKS if r in reasons.get(root, ())), [rows[i] for i in members]))
+    clusters.sort(key=lambda c: (-len(c.merge), c.keep))
+    return clusters
+
+
+# merging -----------------------------------------------------------------------
+def _merge_student(con, keep: str, dup: str, counts: Dict[str, int]):
+    held = con.execute("SELECT COUNT(*) FROM registrations WHERE student_id = ?", (dup,)).fetchone()[0]
+    # OR IGNORE leaves the courses the survivor already has; deleting the duplicate removes those
+    moved = con.execute("UPDATE OR IGNORE registrations SET student_id = ? WHERE student_id = ?",
+                        (keep, dup)).rowcount
+    counts["registrations_moved"] += moved
+    counts["registrations_dropped"] += held - moved
+    counts["waitlist_moved"] += con.execute("""
+        UPDATE OR IGNORE waitlist SET student_id = ? WHERE student_id = ?
+        AND course_id NOT IN (SELECT course_id FROM registrations WHERE student_id = ?)
+    """, (keep, dup, keep)).rowcount
+    # a moved registration seats the survivor where they were only waiting
+    con.execute("""DELETE FROM waitlist WHERE student_id = ?
+                   AND course_id IN (SELECT course_id FROM registrations WHERE student_id = ?)""", (keep, keep))
+    counts["students"] += con.execute("DELETE FROM students WHERE student_id = ?", (dup,)).rowcount
+
+
+def _merge_instructor(con, keep: str, dup: str, counts: Dict[str, int]):
+    counts["courses_moved"] += con.execute("UPDATE courses SET instructor_id = ? WHERE instructor_id = ?",
+                                           (keep, dup)).rowcount
+    counts["instructors"] += con.execute("DELETE FROM instructors WHERE instructor_id = ?", (dup,)).rowcount
+
+
+def merge_clusters(kind: str, clusters: Iterable, db_path: str = DB.DEFAULT_DB) -> Dict[str, int]:
+    """Merge every ``(keep, merge)`` (e.g. a :class:`Cluster`) in one transaction; returns counts.
+
+    Raises ValueError, changing nothing, when a survivor does not exist or an ID
+    appears in two clusters.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"unknown kind: {kind!r}")
+    key = KINDS[kind][0]
+    pairs, seen = [], set()
+    for c in clusters:
+        keep, dups = c[0], [d for d in c[1] if d != c[0]]
+        for i in [keep, *dups]:
+            if i in seen:
+                raise ValueError(f"{i} is in more than one cluster")
+            seen.add(i)
+        pairs += [(keep, d) for d in dups]
+    if kind == "students":
+        counts = dict(students=0, registrations_moved=0, registrations_dropped=0, waitlist_moved=0)
+        step = _merge_student
+    else:
+        counts, step = dict(instructors=0, courses_moved=0), _merge_instructor
+    with DB.writer(db_path) as con:
+        missing = [k for k in dict.fromkeys(k for k, _ in pairs)
+                   if not con.execute(f"SELECT 1 FROM {kind} WHERE {key} = ?", (k,)).fetchone()]
+        if missing:
+            raise ValueError(f"not found: {', '.join(missing)}")
+        for keep, dup in pairs:
+            step(con, keep, dup, counts)
+    return counts
+
+
+def merge(kind: str, keep: str, duplicates: Iterable[str], db_path: str = DB.DEFAULT_DB) -> Dict[str, int]:
+    return merge_clusters(kind, [(keep, list(duplicates))], db_path)
+
+
+def describe(cluster: Cluster) -> str:
+    key = next(iter(cluster.rows[0]))
+    people = "; ".join(f"{r[key]} {r['name']} <{r['email']}>" for r in cluster.rows)
+    return f"[{'+'.join(cluster.reasons)}] {people}"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("find", "merge"):
+        p = sub.add_parser(name)
+        p.add_argument("kind", choices=sorted(KINDS))
+        p.add_argument("--db", default=DB.DEFAULT_DB)
+        p.add_argument("--by", choices=BLOCKS, action="append", help="blocking key (repeatable; default: both)")
+        p.add_argument("--name-min", type=float, default=NAME_MIN)
+    merge_p = sub.choices["merge"]
+    merge_p.add_argument("ids", nargs="*", help="survivor followed by the IDs to merge into it")
+    merge_p.add_argument("--all", action="store_true", help="merge every cluster found")
+    a = ap.parse_args(argv)
+    if a.cmd == "merge" and (len(a.ids) == 1 or not a.ids and not a.all):
+        ap.error("give the surviving ID and its duplicates, or --all to merge every cluster found")
+    try:
+        if a.cmd == "merge" and a.ids:
+            print(merge(a.kind, a.ids[0], a.ids[1:], a.db))
+            return 0
+        skipped: List[str] = []
+        clusters = find_duplicates(a.kind, a.db, by=a.by or BLOCKS, name_min=a.name_min, skipped=skipped)
+        for c in clusters:
+            print(describe(c))
+        for s in skipped:
+            print(f"skipped oversized block {s}", file=sys.stderr)
+        print(f"{len(clusters)} clusters, {sum(len(c.merge) for c in clusters)} duplicates")
+        if a.cmd == "merge":
+            print(merge_clusters(a.kind, clusters, a.db))
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
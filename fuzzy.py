@@ -0,0 +1,127 @@
+"""Typo-tolerant name search over a trigram index.
+
+Every student, instructor and course name is split into the trigrams of
+``" " + lower(name) + " "`` (``"Ana"`` -> ``" an"``, ``"ana"``, ``"na "``), which
+triggers in :data:`db.TRIGRAM_SQL` keep in ``name_trigrams`` together with the
+number of distinct trigrams per name (``name_index``). A query is split the same
+way. Candidates come from the ``(entity, gram)`` primary key: only names that
+share at least ``threshold`` of the query's trigrams are counted, and the base
+tables are never scanned. They are ranked by the share of the query's trigrams
+found in the name, so a surname typed with a typo (``"Jazairli"``) still ranks
+``"Ahmad El Jazaerli"`` first; ties go to the closer overall match, the Jaccard
+similarity ``shared / (query trigrams + name trigrams - shared)``.
+
+Lower-casing folds ASCII letters only, like SQLite's ``lower()`` in the triggers.
+
+Usage::
+
+    python fuzzy.py students "jhon smiht" --db school.db
+    python fuzzy.py rebuild --db school.db      # re-index every name
+"""
+
+import argparse
+import json
+import math
+import sys
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import db as DB
+
+THRESHOLD = 0.3
+LIMIT = 50
+_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+_FETCH: Dict[str, Callable] = {"students": DB.students_by_id, "instructors": DB.instructors_by_id,
+                               "courses": DB.courses_by_id}
+
+
+def normalize(text: str) -> str:
+    """Collapse whitespace and lower-case ASCII letters, as the index does."""
+    return " ".join((text or "").split()).translate(_LOWER)
+
+
+def trigrams(text: str) -> Set[str]:
+    t = f" {normalize(text)} "
+    return {t[i:i + 3] for i in range(len(t) - 2)} if t.strip() else set()
+
+
+def similarity(q: str, name: str) -> float:
+    """Share of the trigrams of ``q`` that occur in ``name``, 0.0 to 1.0 (the ranking score)."""
+    gq = trigrams(q)
+    return len(gq & trigrams(name)) / len(gq) if gq else 0.0
+
+
+def matches(entity: str, q: str, db_path: str = DB.DEFAULT_DB, *, limit: Optional[int] = LIMIT,
+            threshold: float = THRESHOLD) -> List[Tuple[str, float]]:
+    """``(key, score)`` of the names of ``entity`` most similar to ``q``, best first (all of them if ``limit`` is None)."""
+    if entity not in DB.TRIGRAM_SOURCES:
+        raise ValueError(f"unknown entity: {entity!r}")
+    grams = trigrams(q)
+    if not grams:
+        return []
+    n = len(grams)
+    with DB.connect(db_path) as con:
+        rows = con.execute("""
+            SELECT h.key, CAST(h.shared AS REAL) / ? AS score
+            FROM (SELECT key, COUNT(*) AS shared FROM name_trigrams
+                  WHERE entity = ? AND gram IN (SELECT value FROM json_each(?))
+                  GROUP BY key HAVING shared >= ?) h
+            JOIN name_index x ON x.entity = ? AND x.key = h.key
+            ORDER BY h.shared DESC, CAST(h.shared AS REAL) / (? + x.ngrams - h.shared) DESC, h.key
+            LIMIT ?
+        """, (n, entity, json.dumps(sorted(grams)), max(1, math.ceil(threshold * n - 1e-9)), entity, n,
+              -1 if limit is None else limit)).fetchall()
+    return [(k, round(s, 3)) for k, s in rows]
+
+
+def search(entity: str, q: str, db_path: str = DB.DEFAULT_DB, *, limit: int = LIMIT,
+           threshold: float = THRESHOLD) -> List[Dict]:
+    """The records of the best :func:`matches`, as ``db`` returns them plus ``score``."""
+    scores = dict(matches(entity, q, db_path, limit=limit, threshold=threshold))
+    key = DB.TRIGRAM_SOURCES[entity][0]
+    rows = [dict(r, score=scores[r[key]]) for r in _FETCH[entity](scores, db_path)]
+    order = {k: i for i, k in enumerate(scores)}
+    return sorted(rows, key=lambda r: order[r[key]])
+
+
+def search_students(q: str, db_path: str = DB.DEFAULT_DB, **kw) -> List[Dict]:
+    return search("students", q, db_path, **kw)
+
+
+def search_instructors(q: str, db_path: str = DB.DEFAULT_DB, **kw) -> List[Dict]:
+    return search("instructors", q, db_path, **kw)
+
+
+def search_courses(q: str, db_path: str = DB.DEFAULT_DB, **kw) -> List[Dict]:
+    return search("courses", q, db_path, **kw)
+
+
+def rebuild(db_path: str = DB.DEFAULT_DB) -> None:
+    """Re-index every name from the base tables (repair after manual edits)."""
+    DB.init_db(db_path)
+    with DB.writer(db_path) as con:
+        con.execute("DELETE FROM name_trigrams")
+        con.execute("DELETE FROM name_index")
+        for entity in DB.TRIGRAM_SOURCES:
+            for stmt in DB.trigram_fill(entity):
+                con.execute(stmt)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("entity", choices=sorted(DB.TRIGRAM_SOURCES) + ["rebuild"])
+    ap.add_argument("query", nargs="?", default="")
+    ap.add_argument("--db", default=DB.DEFAULT_DB)
+    ap.add_argument("--limit", type=int, default=20)
+    ap.add_argument("--threshold", type=float, default=THRESHOLD)
+    a = ap.parse_args(argv)
+    if a.entity == "rebuild":
+        rebuild(a.db)
+        return 0
+    key, col = DB.TRIGRAM_SOURCES[a.entity]
+    for r in search(a.entity, a.query, a.db, limit=a.limit, threshold=a.threshold):
+        print(f"{r['score']:.3f}  {r[key]}  {r[col]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""Routine database maintenance, on demand or from a background scheduler.
+
+Tasks (each returns a :class:`Report` and is logged to ``maintenance_log`` and
+the ``maintenance`` logger with its timing and the file size before and after):
+
+* ``optimize`` -- ``ANALYZE`` (with ``PRAGMA analysis_limit``) the first time, so
+  the query planner has statistics, then ``PRAGMA optimize``, which re-analyzes
+  only tables that changed a lot since.
+* ``vacuum`` -- ``PRAGMA incremental_vacuum``: returns free pages left behind by
+  deletes to the file system, a batch of pages per write transaction so writers
+  are never blocked for long. Needs ``auto_vacuum = INCREMENTAL``, which a
+  migration in ``db.py`` sets; it is skipped while few pages are free.
+* ``quick_check`` / ``integrity_check`` -- ``PRAGMA quick_check`` (fast, no index
+  contents) and the full ``PRAGMA integrity_check``, on a read connection.
+* ``backup`` -- a deduplicated backup into the store of ``backup_store.py``, then
+  :func:`backup_store.prune` with the default retention.
+
+:class:`Scheduler` runs the tasks that are due (see :data:`SCHEDULE`, judged from
+``maintenance_log``, so restarts do not repeat them) on a daemon thread, but only
+once the application has been idle for ``idle_s`` seconds: the GUIs call
+:meth:`Scheduler.touch` whenever they write. Set ``SCHOOL_MAINTENANCE=0`` to keep
+the GUIs from starting it.
+
+Usage::
+
+    python maintenance.py run --db school.db                 # every task now
+    python maintenance.py run vacuum integrity_check --db school.db
+    python maintenance.py status --db school.db              # last run of each task
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import backup_store
+import db as DB
+
+log = logging.getLogger("maintenance")
+
+MAINTENANCE_ENV = "SCHOOL_MAINTENANCE"
+ANALYSIS_LIMIT = 1000        # rows sampled per index by ANALYZE
+VACUUM_MIN_FREE = 256        # free pages before a vacuum is worth it
+VACUUM_BATCH = 512           # pages released per write transaction
+IDLE_S = 60.0
+TICK_S = 30.0
+HOUR = 3600.0
+SCHEDULE: Dict[str, float] = {  # task -> seconds between runs
+    "vacuum": 1 * HOUR,
+    "optimize": 6 * HOUR,
+    "quick_check": 24 * HOUR,
+    "integrity_check": 7 * 24 * HOUR,
+    "backup": 1 * HOUR,
+}
+
+
+class Report(NamedTuple):
+    task: str
+    started_at: float
+    seconds: float
+    size_before: int
+    size_after: int
+    free_before: int
+    free_after: int
+    ok: bool
+    detail: str
+
+    def __str__(self):
+        return (f"{self.task}: {'ok' if self.ok else 'FAILED'} in {self.seconds:.3f}s, "
+                f"{self.size_before} -> {self.size_after} bytes, free pages {self.free_before} -> "
+                f"{self.free_after}" + (f" ({self.detail})" if self.detail else ""))
+
+
+def _size(db_path: str) -> int:
+    return os.path.getsize(db_path) if os.path.exists(db_path) else 0
+
+
+def _free_pages(db_path: str) -> int:
+    with DB.connect(db_path) as con:
+        return con.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+# tasks -----------------------------------------------------------------------
+def optimize(db_path: str) -> str:
+    with DB.writer(db_path) as con:
+        con.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+        if not con.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            con.execute("ANALYZE")
+            return "analyzed"
+        con.execute("PRAGMA optimize")
+    return "optimized"
+
+
+def vacuum(db_path: str, min_free: int = VACUUM_MIN_FREE, batch: int = VACUUM_BATCH) -> str:
+    with DB.connect(db_path) as con:
+        mode = con.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode != 2:
+        return "skipped: auto_vacuum is not INCREMENTAL"
+    free = _free_pages(db_path)
+    if free < min_free:
+        return f"skipped: {free} free pages"
+    released = 0
+    while free:
+        with DB.writer(db_path) as con:
+            # each step releases one page, but sqlite3 steps a PRAGMA without result columns only
+            # once (fetchall() gets nothing more); executemany steps it once per parameter set
+            con.executemany("PRAGMA incremental_vacuum", [()] * min(batch, free))
+        left = _free_pages(db_path)
+        if left >= free:
+            break
+        released, free = released + free - left, left
+    return f"{released} pages released"
+
+
+def _check(db_path: str, pragma: str) -> str:
+    with DB.connect(db_path) as con:
+        problems = [r[0] for r in con.execute(f"PRAGMA {pragma}") if r[0] != "ok"]
+    if problems:
+        raise sqlite3.DatabaseError("; ".join(problems[:20]))
+    return ""
+
+
+def quick_check(db_path: str) -> str:
+    return _check(db_path, "quick_check")
+
+
+def integrity_check(db_path: str) -> str:
+    return _check(db_path, "integrity_check")
+
+
+def backup(db_path: str) -> str:
+    store = backup_store.default_store(db_path)
+    snap = backup_store.backup(db_path, store)
+    pruned = backup_store.prune(store)
+    return (f"{snap.id}: {snap.new_chunks} new pages ({snap.new_bytes} bytes), "
+            f"{pruned['backups_removed']} old backups removed")
+
+
+TASKS: Dict[str, Callable[[str], str]] = {"optimize": optimize, "vacuum": vacuum,
+                                          "quick_check": quick_check, "integrity_check": integrity_check,
+                                          "backup": backup}
+
+
+def run_task(task: str, db_path: str = DB.DEFAULT_DB) -> Report:
+    """Run one task, record it in ``maintenance_log`` and log it; failures are reported, not raised."""
+    DB.init_db(db_path)
+    fn = TASKS[task]
+    size, free = _size(db_path), _free_pages(db_path)
+    started, t0 = time.time(), time.perf_counter()
+    try:
+        ok, detail = True, fn(db_path)
+    except (sqlite3.Error, OSError, backup_store.BackupError) as e:
+        ok, detail = False, str(e)
+    report = Report(task, started, time.perf_counter() - t0, size, _size(db_path), free, _free_pages(db_path),
+                    ok, detail)
+    with DB.writer(db_path) as con:
+        con.execute("""INSERT INTO maintenance_log(task, started_at, seconds, size_before, size_after,
+                                                   free_before, free_after, ok, detail)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", report)
+    (log.info if ok else log.error)("%s", report)
+    return report
+
+
+def run(tasks: Iterable[str] = tuple(TASKS), db_path: str = DB.DEFAULT_DB) -> List[Report]:
+    return [run_task(t, db_path) for t in tasks]
+
+
+def last_runs(db_path: str = DB.DEFAULT_DB) -> Dict[str, Report]:
+    """The latest :class:`Report` of every task that has run."""
+    DB.init_db(db_path)
+    with DB.connect(db_path) as con:
+        rows = con.execute("""
+            SELECT task, started_at, seconds, size_before, size_after, free_before, free_after, ok, detail
+            FROM maintenance_log WHERE seq IN (SELECT MAX(seq) FROM maintenance_log GROUP BY task)
+        """).fetchall()
+    return {r[0]: Report(*r[:7], bool(r[7]), r[8] or "") for r in rows}
+
+
+def due(db_path: str = DB.DEFAULT_DB, schedule: Dict[str, float] = SCHEDULE,
+        now: Optional[float] = None) -> List[str]:
+    now = time.time() if now is None else now
+    last = last_runs(db_path)
+    return [t for t, every in schedule.items() if t not in last or now - last[t].started_at >= every]
+
+
+# scheduler -------------------------------------------------------------------
+class Scheduler:
+    """Runs due tasks on a daemon thread while the application is idle.
+
+    ``on_report`` is called on the scheduler thread with each :class:`Report`; GUIs
+    hand it to their event loop themselves.
+    """
+
+    def __init__(self, db_path: str = DB.DEFAULT_DB, schedule: Dict[str, float] = SCHEDULE,
+                 idle_s: float = IDLE_S, tick_s: float = TICK_S,
+                 on_report: Optional[Callable[[Report], None]] = None):
+        self.db_path, self.schedule = db_path, dict(schedule)
+        self.idle_s, self.tick_s, self.on_report = idle_s, tick_s, on_report
+        self._last_activity = time.monotonic()
+        self._stop, self._wake = threading.Event(), threading.Event()
+        self._forced: List[str] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.environ.get(MAINTENANCE_ENV, "1") not in ("0", "")
+
+    def start(self) -> "Scheduler":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="maintenance", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop after the running task (if any) finishes."""
+        self._stop.set(); self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def touch(self):
+        """Note user activity: postpones maintenance by ``idle_s``."""
+        self._last_activity = time.monotonic()
+
+    def run_soon(self, tasks: Iterable[str] = tuple(TASKS)):
+        """Run ``tasks`` on the scheduler thread right away, due and idle or not."""
+        with self._lock:
+            self._forced.extend(t for t in tasks if t not in self._forced)
+        self._wake.set()
+
+    def idle(self) -> bool:
+        return time.monotonic() - self._last_activity >= self.idle_s
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.tick_s); self._wake.clear()
+            with self._lock:
+                forced, self._forced = self._forced, []
+            pending = list(forced)
+            if self.idle():
+                try:
+                    pending += [t for t in due(self.db_path, self.schedule) if t not in forced]
+                except sqlite3.Error as e:  # e.g. locked for longer than the write timeout
+                    log.warning("cannot read the maintenance schedule: %s", e)
+            for task in pending:
+                if self._stop.is_set() or (task not in forced and not self.idle()):
+                    break  # the application is busy again; due tasks wait for the next idle spell
+                try:
+                    report = run_task(task, self.db_path)
+                    if self.on_report is not None:
+                        self.on_report(report)
+                except Exception:  # e.g. the log write itself failed; keep the thread for the next task
+                    log.exception("maintenance task %s failed", task)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("run"); p.add_argument("tasks", nargs="*", metavar="TASK", help=", ".join(TASKS))
+    p.add_argument("--db", default=DB.DEFAULT_DB)
+    p = sub.add_parser("status"); p.add_argument("--db", default=DB.DEFAULT_DB)
+    a = ap.parse_args(argv)
+    unknown = [t for t in getattr(a, "tasks", ()) if t not in TASKS]
+    if unknown:
+        ap.error(f"unknown task: {', '.join(unknown)} (choose from {', '.join(TASKS)})")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if a.cmd == "status":
+        last = last_runs(a.db)
+        for task, every in SCHEDULE.items():
+            r = last.get(task)
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(r.started_at)) if r else "never"
+            print(f"{task:16} every {every / HOUR:g}h, last {when}" + (f": {r}" if r else ""))
+        return 0
+    reports = run(a.tasks or list(TASKS), a.db)
+    return 0 if all(r.ok for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
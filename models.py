@@ -1,22 +1,24 @@
 import json
-from typing import Dict
-import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import validation as V
 
 class Person:
     def __init__(self, name: str, age: int, email: str):
-        if not isinstance(name, str) or not name:
-            raise ValueError("Name must be  non-empty string")
-        if not isinstance(age, int) or age < 0:
-            raise ValueError("Age must be  non-negative integer")
-        
-        self.name = name
-        self.age = age
-        self._email = email   
-
-    def validate_email(email: str):
-        EMAIL_RE = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
-        if not isinstance(email, str) or not  EMAIL_RE.match(email):
-            raise ValueError("Invalid email address")
+        if not isinstance(name, str):
+            raise V.ValidationError("name", "must be a string")
+        if not isinstance(age, int) or isinstance(age, bool):
+            raise V.ValidationError("age", "must be an integer")
+
+        self.name = V.check_name(name)
+        self.age = V.check_age(age)
+        self._email = V.check_email(email)
+
+    @staticmethod
+    def validate_email(email: str) -> str:
+        """Return the normalized address or raise :class:`validation.ValidationError`."""
+        return V.check_email(email)
 
     def introduce(self):
         print(f"Hi, my name is {self.name}, I am {self.age} years old.")
@@ -39,7 +41,7 @@ class Person:
 class Student(Person):
     def __init__(self, name: str, age: int, email: str, student_id: str):
         super().__init__(name, age, email)  
-        self.student_id = student_id
+        self.student_id = V.check_id(student_id, "student_id")
         self.registered_courses = []
 
     def register_course(self, course):
@@ -48,11 +50,9 @@ class Student(Person):
 
 class Instructor(Person):
     def __init__(self, name: str, age: int, email: str, instructor_id: str):
-        if not isinstance(instructor_id, str) or not instructor_id:
-            raise ValueError("Instructor ID must be a non-empty string")
         super().__init__(name, age, email)
 
-        self.instructor_id = instructor_id
+        self.instructor_id = V.check_id(instructor_id, "instructor_id")
         self.assigned_courses = []  
 
     def assign_course(self, course):
@@ -84,13 +84,9 @@ class Course:
     def __init__(self, course_id: str, course_name: str, instructor=None):
         if not isinstance(instructor, Instructor):
             raise ValueError("Instructor has to be a valid Instructor object.")
-        if not isinstance(course_name, str) or not course_name:
-            raise ValueError("Course name has to be a non-empty string.")
-        if not isinstance(instructor, Instructor):
-            raise ValueError("Instructor has to be a valid Instructor object.")
-        
-        self.course_id = course_id
-        self.course_name = course_name
+
+        self.course_id = V.check_id(course_id, "course_id")
+        self.course_name = V.check_name(course_name, "course_name")
         self.instructor = instructor  
         self.enrolled_students = []  
 
@@ -121,30 +117,205 @@ class Course:
         course.enrolled_students=students
         return course 
 
+def _matches(value, cond) -> bool:
+    if isinstance(cond, tuple):
+        lo, hi = cond
+        return value is not None and (lo is None or value >= lo) and (hi is None or value <= hi)
+    return value == cond
+
+
+def _filter_ids(ids, key_of: Dict[str, Any], cond) -> List[str]:
+    if not isinstance(cond, tuple):
+        return [i for i in ids if key_of.get(i) == cond]
+    lo, hi = cond
+    ids = [i for i in ids if i in key_of]
+    if lo is not None:
+        ids = [i for i in ids if key_of[i] >= lo]
+    if hi is not None:
+        ids = [i for i in ids if key_of[i] <= hi]
+    return ids
+
+
+def email_domain(person) -> str:
+    return person._email.rpartition("@")[2]
+
+
+def course_instructor_id(course) -> Optional[str]:
+    return course.instructor.instructor_id if course.instructor else None
+
+
+class HashIndex:
+    """Key -> IDs with that key, for equality lookups; also remembers each ID's key."""
+    def __init__(self, key: Callable[[Any], Any]):
+        self.key = key
+        self.key_of: Dict[str, Any] = {}
+        self._buckets: Dict[Any, Dict[str, None]] = {}  # dicts as insertion-ordered sets
+
+    def add(self, ident: str, obj):
+        k = self.key(obj)
+        if k is None:
+            return
+        self.key_of[ident] = k
+        bucket = self._buckets.get(k)
+        if bucket is None:
+            bucket = self._buckets[k] = {}
+            self._new_key(k)
+        bucket[ident] = None
+
+    def remove(self, ident: str):
+        """Drop ``ident`` under the key it was added with, even if the object changed since."""
+        k = self.key_of.pop(ident, None)
+        bucket = self._buckets.get(k)
+        if bucket is not None:
+            bucket.pop(ident, None)
+            if not bucket:
+                del self._buckets[k]
+                self._old_key(k)
+
+    def _new_key(self, k):
+        pass
+
+    def _old_key(self, k):
+        pass
+
+    def count(self, value) -> int:
+        return len(self._buckets.get(value, ()))
+
+    def get(self, value) -> List[str]:
+        return list(self._buckets.get(value, ()))
+
+
+class SortedIndex(HashIndex):
+    """A :class:`HashIndex` plus its distinct keys in order, for ``bisect`` range lookups."""
+    def __init__(self, key: Callable[[Any], Any]):
+        super().__init__(key)
+        self._keys: List[Any] = []
+
+    def _new_key(self, k):
+        self._keys.insert(bisect_left(self._keys, k), k)
+
+    def _old_key(self, k):
+        del self._keys[bisect_left(self._keys, k)]
+
+    def _span(self, lo, hi) -> List[Any]:
+        return self._keys[0 if lo is None else bisect_left(self._keys, lo):
+                          len(self._keys) if hi is None else bisect_right(self._keys, hi)]
+
+    def count_range(self, lo=None, hi=None) -> int:
+        return sum(len(self._buckets[k]) for k in self._span(lo, hi))
+
+    def range(self, lo=None, hi=None) -> List[str]:
+        """IDs with ``lo <= key <= hi`` (``None`` leaves that end open), by key."""
+        return [ident for k in self._span(lo, hi) for ident in self._buckets[k]]
+
+
 class DataStore:
     """
     Keeps collections and handles JSON serialization.
     Relationships are stored by IDs; caller can resolve links after loading if needed.
+
+    Secondary indexes (declared in ``INDEXES``) follow every ``add_*``/``remove_*``;
+    after changing an indexed attribute in place, call :meth:`reindex`.
+    :meth:`query` answers conditions through the most selective index.
     """
-    def __init__(self):
+    INDEXES: Dict[str, Dict[str, Tuple[type, Callable[[Any], Any]]]] = {
+        "students": {"age": (SortedIndex, lambda s: s.age), "email_domain": (HashIndex, email_domain)},
+        "instructors": {"age": (SortedIndex, lambda i: i.age), "email_domain": (HashIndex, email_domain)},
+        "courses": {"instructor_id": (HashIndex, course_instructor_id)},
+    }
+
+    def __init__(self, indexes: Optional[Dict[str, Dict[str, Tuple[type, Callable[[Any], Any]]]]] = None):
         self.students: Dict[str, Student] = {}
         self.instructors: Dict[str, Instructor] = {}
         self.courses: Dict[str, Course] = {}
+        spec = self.INDEXES if indexes is None else indexes
+        self.indexes = {kind: {name: cls(key) for name, (cls, key) in spec.get(kind, {}).items()}
+                        for kind in ("students", "instructors", "courses")}
+
+    def _add(self, kind: str, ident: str, obj, label: str):
+        table = getattr(self, kind)
+        if ident in table:
+            raise ValueError(f"{label} ID already exists: {ident}")
+        table[ident] = obj
+        for index in self.indexes[kind].values():
+            index.add(ident, obj)
+
+    def _remove(self, kind: str, ident: str, label: str):
+        table = getattr(self, kind)
+        if ident not in table:
+            raise ValueError(f"Unknown {label.lower()} ID: {ident}")
+        for index in self.indexes[kind].values():
+            index.remove(ident)
+        return table.pop(ident)
+
+    def reindex(self, kind: str, ident: str):
+        """Bring the indexes of one object up to date after changing its attributes in place."""
+        obj = getattr(self, kind)[ident]
+        for index in self.indexes[kind].values():
+            index.remove(ident)
+            index.add(ident, obj)
 
     def add_student(self, student: Student):
-        if student.student_id in self.students:
-            raise ValueError(f"Student ID already exists: {student.student_id}")
-        self.students[student.student_id] = student
+        self._add("students", student.student_id, student, "Student")
 
     def add_instructor(self, instructor: Instructor):
-        if instructor.instructor_id in self.instructors:
-            raise ValueError(f"Instructor ID already exists: {instructor.instructor_id}")
-        self.instructors[instructor.instructor_id] = instructor
+        self._add("instructors", instructor.instructor_id, instructor, "Instructor")
 
     def add_course(self, course: Course):
-        if course.course_id in self.courses:
-            raise ValueError(f"Course ID already exists: {course.course_id}")
-        self.courses[course.course_id] = course
+        self._add("courses", course.course_id, course, "Course")
+
+    def remove_student(self, student_id: str) -> Student:
+        return self._remove("students", student_id, "Student")
+
+    def remove_instructor(self, instructor_id: str) -> Instructor:
+        return self._remove("instructors", instructor_id, "Instructor")
+
+    def remove_course(self, course_id: str) -> Course:
+        return self._remove("courses", course_id, "Course")
+
+    def plan(self, kind: str, **conditions) -> Tuple[Optional[str], int]:
+        """The index :meth:`query` would use and how many objects it yields (``None``: a full scan)."""
+        best: Tuple[Optional[str], int] = (None, len(getattr(self, kind)))
+        for field, cond in conditions.items():
+            index = self.indexes[kind].get(field)
+            if isinstance(index, SortedIndex) and isinstance(cond, tuple):
+                n = index.count_range(*cond)
+            elif index is not None and not isinstance(cond, tuple):
+                n = index.count(cond)
+            else:
+                continue
+            if n < best[1]:
+                best = (field, n)
+        return best
+
+    def query(self, kind: str, where: Optional[Callable[[Any], bool]] = None, **conditions) -> List[Any]:
+        """Objects of ``kind`` ("students", "instructors", "courses") meeting every condition.
+
+        A condition is ``field=value`` or, for a range, ``field=(lo, hi)`` (inclusive,
+        ``None`` for an open end). Fields are index names or object attributes;
+        ``where`` is an extra predicate. Candidates come from the most selective
+        index (see :meth:`plan`), in its order; the other conditions are checked
+        per candidate.
+        """
+        table, indexes = getattr(self, kind), self.indexes[kind]
+        field, _ = self.plan(kind, **conditions)
+        if field is None:
+            ids = table
+        else:
+            cond, index = conditions[field], indexes[field]
+            if isinstance(index, SortedIndex) and isinstance(cond, tuple):
+                ids = index.range(*cond)
+            else:
+                ids = index.get(cond)
+        # indexed fields are checked against the index's copy of the key, a pass each
+        for name, cond in conditions.items():
+            if name != field and name in indexes:
+                ids = _filter_ids(ids, indexes[name].key_of, cond)
+        objs = [table[i] for i in ids]
+        for name, cond in conditions.items():
+            if name not in indexes:
+                objs = [obj for obj in objs if _matches(getattr(obj, name), cond)]
+        return objs if where is None else [obj for obj in objs if where(obj)]
 
     def to_json(self) -> str:
         payload = {
@@ -160,11 +331,11 @@ class DataStore:
         ds = cls()
        
         for sid, sdata in raw.get("students", {}).items():
-            ds.students[sid] = Student.from_dict(sdata)
+            ds._add("students", sid, Student.from_dict(sdata), "Student")
         for iid, idata in raw.get("instructors", {}).items():
-            ds.instructors[iid] = Instructor.from_dict(idata)
+            ds._add("instructors", iid, Instructor.from_dict(idata), "Instructor")
         for cid, cdata in raw.get("courses", {}).items():
-            ds.courses[cid] = Course.from_dict(cdata)
+            ds._add("courses", cid, Course.from_dict(cdata), "Course")
         return ds
 
     def save_file(self, path: str):
@@ -0,0 +1,130 @@
+"""Notice commits made by other connections and processes to ``school.db``.
+
+:class:`Watcher` keeps one read-only connection open and polls ``PRAGMA
+data_version`` on it from a daemon thread every ``poll_s`` seconds. The value
+changes whenever any other connection commits, from this process or another
+(the other GUI, ``csv_import.py``, the API server), and a poll costs a few
+microseconds, so no server, socket or file watching is needed. When it changes,
+``on_change()`` is called once on the watcher thread, however many commits
+there were.
+
+The GUIs call :meth:`viewmodel.RecordsModel.refresh` from ``on_change``: the
+model then reads only the change-log entries since its last refresh and re-reads
+the rows they touch, so an update costs in proportion to the changes, not to the
+database. Its listeners hand the changed keys to the GUI thread (a Qt signal, a
+Tk queue), which updates the Records tables, combos and statistics. Set
+``SCHOOL_NOTIFY=0`` to keep the GUIs from starting a watcher.
+
+Usage::
+
+    python notify.py --db school.db    # print change-log entries as other processes commit them
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from typing import Callable, Optional
+
+import changelog
+import db as DB
+
+log = logging.getLogger("notify")
+
+NOTIFY_ENV = "SCHOOL_NOTIFY"
+POLL_S = 0.5
+
+
+class Watcher:
+    """Calls ``on_change()`` after other connections commit to ``db_path``.
+
+    :meth:`check` polls once and can be used without the thread.
+    """
+
+    def __init__(self, db_path: str = DB.DEFAULT_DB, on_change: Optional[Callable[[], None]] = None,
+                 poll_s: float = POLL_S):
+        self.db_path, self.on_change, self.poll_s = db_path, on_change, poll_s
+        self.changes = 0  # polls that saw a change
+        self._con: Optional[sqlite3.Connection] = None
+        self._version: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.environ.get(NOTIFY_ENV, "1") not in ("0", "")
+
+    def start(self) -> "Watcher":
+        if self._thread is None:
+            self.check()  # the current version is the baseline
+            self._thread = threading.Thread(target=self._loop, name="notify", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._close()
+
+    def check(self) -> bool:
+        """Whether another connection committed since the previous check (False on the first)."""
+        if self._con is None:
+            self._con = DB.open_readonly(self.db_path)
+        version = self._con.execute("PRAGMA data_version").fetchone()[0]
+        changed = self._version is not None and version != self._version
+        self._version = version
+        if changed:
+            self.changes += 1
+        return changed
+
+    def _close(self):
+        if self._con is not None:
+            self._con.close()
+            self._con, self._version = None, None
+
+    def _loop(self):
+        while not self._stop.wait(self.poll_s):
+            try:
+                changed = self.check()
+            except sqlite3.Error as e:  # e.g. the file was replaced; start over with a new connection
+                log.warning("cannot poll %s: %s", self.db_path, e)
+                self._close()
+                continue
+            if changed and self.on_change is not None:
+                try:
+                    self.on_change()
+                except sqlite3.Error as e:  # e.g. locked for longer than the timeout; the next change retries
+                    log.warning("change handler failed: %s", e)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=DB.DEFAULT_DB)
+    ap.add_argument("--poll", type=float, default=POLL_S, help="seconds between polls")
+    a = ap.parse_args(argv)
+    DB.init_db(a.db)
+    seq = changelog.latest_seq(a.db)
+
+    def show():
+        nonlocal seq
+        for e in changelog.changes_since(seq, a.db):
+            print(f"{e['seq']:>8} {e['op']} {e['entity']:<13} {e['key']}"
+                  + (f" (was {e['old_key']})" if e["old_key"] else "")
+                  + (f" [{', '.join(e['columns'])}]" if e["columns"] else ""), flush=True)
+            seq = e["seq"]
+
+    watcher = Watcher(a.db, show, a.poll).start()
+    print(f"watching {a.db} (Ctrl-C to stop)", flush=True)
+    try:
+        watcher._stop.wait()
+    except KeyboardInterrupt:
+        pass
+    watcher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""Performance harnesses, stress tests and benchmarks for the School Management System.
+
+Every module in this package is a runnable script; launch them from the project
+root with ``python -m perf.<module> --help``.
+"""
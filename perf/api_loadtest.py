@@ -0,0 +1,116 @@
+"""Load test for ``api_server.py`` on localhost.
+
+Each client thread keeps one HTTP/1.1 connection alive and issues a mix of page
+reads, searches, single-record reads and writes for ``--duration`` seconds. The
+report gives requests/second and p50/p95/p99 latency per request type.
+
+Usage::
+
+    python -m perf.api_loadtest --clients 16 --duration 10              # own server + data
+    python -m perf.api_loadtest --url http://127.0.0.1:8000 --clients 8  # running server
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from perf import datagen
+
+# (name, weight) — the write share is what stresses the serialized writer
+MIX = [("page", 45), ("search", 15), ("get", 30), ("write", 10)]
+
+
+def _percentile(sorted_vals, p):
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(p / 100 * len(sorted_vals)))]
+
+
+def _client(host, port, students, stop_at, cid, out):
+    rng = random.Random(cid)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    names, weights = zip(*MIX)
+    n = 0
+    while time.perf_counter() < stop_at:
+        kind = rng.choices(names, weights)[0]
+        body = None
+        if kind == "page":
+            method, path = "GET", f"/students?limit=50&offset={rng.randrange(max(1, students - 50))}"
+        elif kind == "search":
+            method, path = "GET", f"/students?q={rng.choice(datagen.LAST)}&limit=50"
+        elif kind == "get":
+            method, path = "GET", f"/students/S{rng.randrange(students):06d}"
+        else:
+            n += 1
+            method, path = "POST", "/students"
+            body = json.dumps({"student_id": f"L{cid:03d}_{n:07d}", "name": "Load Test",
+                               "age": 20, "email": f"load{cid}.{n}@example.com"}).encode()
+        t0 = time.perf_counter()
+        conn.request(method, path, body=body, headers={"Content-Type": "application/json"} if body else {})
+        resp = conn.getresponse()
+        resp.read()
+        out.append((kind, time.perf_counter() - t0, resp.status))
+    conn.close()
+
+
+def run(url, clients, duration, students):
+    parts = urlsplit(url)
+    results = [[] for _ in range(clients)]
+    stop_at = time.perf_counter() + duration
+    threads = [threading.Thread(target=_client, args=(parts.hostname, parts.port, students, stop_at, i, results[i]))
+               for i in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    samples = [s for r in results for s in r]
+    errors = sum(1 for _, _, status in samples if status >= 400)
+    print(f"{len(samples)} requests in {elapsed:.1f}s with {clients} keep-alive clients: "
+          f"{len(samples) / elapsed:.0f} req/s, {errors} errors")
+    print(f"{'type':8} {'count':>7} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for kind in [k for k, _ in MIX] + ["all"]:
+        lat = sorted(d for k, d, _ in samples if kind in ("all", k))
+        print(f"{kind:8} {len(lat):>7} {len(lat) / elapsed:>7.0f} {_percentile(lat, 50) * 1000:>8.2f} "
+              f"{_percentile(lat, 95) * 1000:>8.2f} {_percentile(lat, 99) * 1000:>8.2f}")
+    return errors
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", help="existing server (its data should come from perf.datagen)")
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--students", type=int, default=10000, help="rows to generate / assume")
+    ap.add_argument("--readers", type=int, default=4, help="read pool size for the local server")
+    a = ap.parse_args(argv)
+    if a.url:
+        return 1 if run(a.url, a.clients, a.duration, a.students) else 0
+
+    import api_server
+    with tempfile.TemporaryDirectory(prefix="api_load_") as d:
+        db_path = datagen.generate(os.path.join(d, "load.db"), students=a.students,
+                                   instructors=max(5, a.students // 100), courses=max(10, a.students // 25))
+        srv = api_server.ApiServer(("127.0.0.1", 0), db_path, a.readers)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        try:
+            errors = run(f"http://127.0.0.1:{srv.server_address[1]}", a.clients, a.duration, a.students)
+        finally:
+            srv.shutdown(); srv.server_close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
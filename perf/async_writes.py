@@ -0,0 +1,76 @@
+"""Group-commit benchmark for :mod:`aiodb`.
+
+Issues ``--writes`` concurrent ``add_student`` + ``register_student`` coroutines
+(``--concurrency`` in flight at a time) while ``--readers`` tasks keep searching, once
+with one transaction per write (``group_max=1``) and once with group commit, and
+prints writes/s and the number of transactions used.
+
+Usage::
+
+    python -m perf.async_writes --writes 2000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from aiodb import GROUP_MAX, AsyncDB
+
+
+async def _run(db_path, writes, concurrency, readers, group_max):
+    async with AsyncDB(db_path, group_max=group_max) as adb:
+        await adb.add_instructor("I0", "Bench Instructor", 40, "bench@example.com")
+        await adb.add_course("C0", "Bench Course", "I0")
+        sem = asyncio.Semaphore(concurrency)
+        stop = asyncio.Event()
+
+        async def one(i):
+            async with sem:
+                sid = f"A{i:07d}"
+                await adb.add_student(sid, "Async Writer", 20, f"a{i}@example.com")
+                await adb.register_student(sid, "C0")
+
+        async def reader():
+            reads = 0
+            while not stop.is_set():
+                await adb.search_students("Writer", limit=50); reads += 1
+            return reads
+
+        read_tasks = [asyncio.create_task(reader()) for _ in range(readers)]
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(writes)))
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        reads = sum(await asyncio.gather(*read_tasks))
+        regs = len(await adb.list_registrations_for_course("C0"))
+        return elapsed, adb.batches, reads, regs
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--writes", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--readers", type=int, default=2)
+    a = ap.parse_args(argv)
+    ok = True
+    with tempfile.TemporaryDirectory(prefix="aiodb_") as d:
+        for label, group_max in (("one txn per write", 1), ("group commit", GROUP_MAX)):
+            path = os.path.join(d, f"g{group_max}.db")
+            elapsed, batches, reads, regs = asyncio.run(_run(path, a.writes, a.concurrency, a.readers, group_max))
+            ops = 2 * a.writes
+            print(f"{label:18} {ops / elapsed:8.0f} writes/s  {batches:6d} transactions  "
+                  f"{reads / elapsed:6.0f} reads/s")
+            ok = ok and regs == a.writes
+    print("OK" if ok else "FAILED: missing registrations")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
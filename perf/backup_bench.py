@@ -0,0 +1,88 @@
+"""Deduplicated backup store against full copies.
+
+Generates a database with ``--students`` students and takes a first backup with
+:mod:`backup_store`, then ``--rounds`` more, each after updating ``--changes``
+random students. For every backup it prints the time and the bytes added to the
+store next to the time of ``DB.backup_database`` (a full file copy) and the bytes
+that many copies would take. It finishes with the time of ``verify`` over all
+backups and of restoring the latest one, and checks that the restored file has
+the same rows as the database.
+
+Usage::
+
+    python -m perf.backup_bench --students 100000 --rounds 5 --changes 100
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import backup_store
+import db as DB
+from perf import datagen
+
+
+def _change(path, rng, students, changes):
+    ids = [(rng.randint(17, 30), f"S{i:06d}") for i in rng.sample(range(1, students + 1), changes)]
+    with DB.writer(path) as con:
+        con.executemany("UPDATE students SET age = ? WHERE student_id = ?", ids)
+
+
+def _dump(path):
+    with DB.connect(path) as con:
+        return [con.execute(f"SELECT * FROM {t} ORDER BY 1, 2").fetchall()
+                for t in ("students", "instructors", "courses", "registrations")]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--students", type=int, default=100_000)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--changes", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args(argv)
+    rng = random.Random(a.seed)
+    with tempfile.TemporaryDirectory(prefix="backup_") as d:
+        path, store = os.path.join(d, "school.db"), os.path.join(d, "store")
+        datagen.generate(path, students=a.students, seed=a.seed)
+        size = os.path.getsize(path)
+        print(f"database: {size / 1e6:.1f} MB")
+        for n in range(a.rounds + 1):
+            if n:
+                _change(path, rng, a.students, a.changes)
+            t0 = time.perf_counter()
+            DB.backup_database(path, os.path.join(d, "copy.db"))
+            t_copy = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            snap = backup_store.backup(path, store)
+            t_store = time.perf_counter() - t0
+            print(f"backup {n} ({'full' if not n else f'{a.changes} changes'}): {t_store:.3f}s, "
+                  f"{snap.new_chunks} pages / {snap.new_bytes / 1e3:.1f} kB added; "
+                  f"full copy {t_copy:.3f}s / {os.path.getsize(path) / 1e3:.1f} kB")
+        copies = (a.rounds + 1) * size
+        print(f"store: {backup_store.usage(store) / 1e6:.2f} MB for {a.rounds + 1} backups "
+              f"(full copies: {copies / 1e6:.1f} MB)")
+
+        t0 = time.perf_counter()
+        problems = backup_store.verify(store)
+        print(f"verify: {time.perf_counter() - t0:.3f}s for {a.rounds + 1} backups")
+        t0 = time.perf_counter()
+        backup_store.restore(store, "latest", os.path.join(d, "restored.db"))
+        print(f"restore: {time.perf_counter() - t0:.3f}s")
+        if _dump(os.path.join(d, "restored.db")) != _dump(path):
+            problems.append("restored rows differ from the database")
+        for p in problems:
+            print("  problem:", p)
+    print("OK" if not problems else "FAILED")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
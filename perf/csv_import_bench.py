@@ -0,0 +1,58 @@
+"""Throughput of ``csv_import`` as the number of worker processes grows.
+
+Writes a students CSV of ``--rows`` rows (about 1% of them invalid) and imports it
+into a fresh database once per ``--workers`` value, printing rows/s.
+
+Usage::
+
+    python -m perf.csv_import_bench --rows 1000000 --workers 1 2 4 8
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import csv_import
+from perf import datagen
+
+
+def write_csv(path, rows, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["student_id", "name", "age", "email"])
+        for i in range(rows):
+            first, last = rng.choice(datagen.FIRST), rng.choice(datagen.LAST)
+            age = rng.randint(17, 30) if rng.random() > 0.005 else "n/a"
+            email = f"{first}.{last}{i}@example.com".lower() if rng.random() > 0.005 else "broken"
+            w.writerow([f"S{i:07d}", f"{first} {last}", age, email])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=200000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--chunk-mb", type=float, default=1.0)
+    a = ap.parse_args(argv)
+    print(f"cpu_count={os.cpu_count()}")
+    with tempfile.TemporaryDirectory(prefix="csvimp_") as d:
+        src = os.path.join(d, "students.csv")
+        write_csv(src, a.rows)
+        print(f"{a.rows} rows, {os.path.getsize(src) / 2**20:.1f} MB")
+        for n in a.workers:
+            s = csv_import.import_files([src], os.path.join(d, f"w{n}.db"), os.path.join(d, f"err{n}.csv"),
+                                        workers=n, chunk_bytes=int(a.chunk_mb * 2**20))
+            print(f"workers={n:<3} {s['read'] / s['elapsed_s']:>9.0f} rows/s  "
+                  f"inserted={s['inserted']['students']} rejected={s['rejected']} ({s['elapsed_s']}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Synthetic school databases for the performance harnesses.
+
+Usage::
+
+    python -m perf.datagen big.db --students 50000 --instructors 500 --courses 2000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db as DB
+
+FIRST = ["Ahmad", "Layla", "Omar", "Sara", "Karim", "Nour", "Rami", "Maya", "Hadi", "Lina",
+         "Ziad", "Dana", "Fadi", "Rana", "Samir", "Yara", "Tarek", "Hiba", "Jad", "Mira"]
+LAST = ["ElJazaerli", "Monzer", "Haddad", "Khoury", "Nassar", "Saleh", "Aoun", "Fares",
+        "Mansour", "Karam", "Hamdan", "Najjar", "Sabbagh", "Rizk", "Daher", "Chami"]
+DOMAINS = ["gmail.com", "mail.aub.edu", "outlook.com", "yahoo.com"]
+SUBJECTS = ["Algebra", "Physics", "Chemistry", "Biology", "History", "Databases",
+            "Networks", "Compilers", "Statistics", "Literature", "Economics", "Design"]
+
+
+def _person(rng: random.Random, i: int):
+    first, last = rng.choice(FIRST), rng.choice(LAST)
+    email = f"{first}.{last}{i}@{rng.choice(DOMAINS)}".lower()
+    return f"{first} {last}", email
+
+
+def generate(db_path: str, students: int = 1000, instructors: int = 50, courses: int = 100,
+             regs_per_student: int = 3, seed: int = 0) -> str:
+    """Create (or overwrite) ``db_path`` filled with deterministic random data."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    DB.init_db(db_path)
+    rng = random.Random(seed)
+    ins_rows, stu_rows, cou_rows, reg_rows = [], [], [], []
+    for i in range(instructors):
+        name, email = _person(rng, i)
+        ins_rows.append((f"I{i:05d}", name, rng.randint(28, 70), email))
+    for i in range(courses):
+        iid = ins_rows[rng.randrange(instructors)][0] if instructors else None
+        cou_rows.append((f"C{i:05d}", f"{rng.choice(SUBJECTS)} {100 + i}", iid))
+    for i in range(students):
+        name, email = _person(rng, i)
+        sid = f"S{i:06d}"
+        stu_rows.append((sid, name, rng.randint(17, 30), email))
+        if courses:
+            for cid in rng.sample(range(courses), min(regs_per_student, courses)):
+                reg_rows.append((sid, f"C{cid:05d}"))
+    con = sqlite3.connect(db_path)
+    try:
+        with con:
+            con.executemany("INSERT INTO instructors(instructor_id, name, age, email) VALUES (?, ?, ?, ?)", ins_rows)
+            con.executemany("INSERT INTO courses(course_id, course_name, instructor_id) VALUES (?, ?, ?)", cou_rows)
+            con.executemany("INSERT INTO students(student_id, name, age, email) VALUES (?, ?, ?, ?)", stu_rows)
+            con.executemany("INSERT INTO registrations(student_id, course_id) VALUES (?, ?)", reg_rows)
+    finally:
+        con.close()
+    return db_path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("db_path")
+    ap.add_argument("--students", type=int, default=1000)
+    ap.add_argument("--instructors", type=int, default=50)
+    ap.add_argument("--courses", type=int, default=100)
+    ap.add_argument("--regs-per-student", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args(argv)
+    generate(a.db_path, a.students, a.instructors, a.courses, a.regs_per_student, a.seed)
+    print(f"Wrote {a.db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""``models.DataStore`` secondary indexes against linear scans.
+
+Fills a store with ``--students`` students, ``--instructors`` instructors and
+one course per ``--students / 100`` students (synthetic names from
+:mod:`perf.fuzzy_bench`, a few email domains), once with the default indexes and
+once with none, and reports the time of the ``add_*`` calls both ways. Then, for
+each query below, prints the index :meth:`DataStore.plan` picks and the time per
+query of :meth:`DataStore.query` against a list comprehension over every
+object, checking that both return the same objects:
+
+* students aged 18-21 with a gmail.com address,
+* students aged exactly 25,
+* instructors at a given domain,
+* courses taught by one instructor.
+
+Usage::
+
+    python -m perf.datastore_bench --students 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import models as M
+from perf.fuzzy_bench import _name
+
+DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "uni.edu", "example.org", "proton.me", "mail.lb", "aub.edu.lb"]
+
+
+def _fill(ds, people, teachers, courses):
+    t0 = time.perf_counter()
+    for i, (name, age, email) in enumerate(teachers):
+        ds.add_instructor(M.Instructor(name, age, email, f"I{i:05d}"))
+    ins = list(ds.instructors.values())
+    for i, (name, n) in enumerate(courses):
+        ds.add_course(M.Course(f"C{i:05d}", name, ins[n]))
+    for i, (name, age, email) in enumerate(people):
+        ds.add_student(M.Student(name, age, email, f"S{i:06d}"))
+    return time.perf_counter() - t0
+
+
+def _time(fn, reps):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        out = fn()
+    return (time.perf_counter() - t0) / reps, out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--students", type=int, default=100_000)
+    ap.add_argument("--instructors", type=int, default=2000)
+    ap.add_argument("--reps", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args(argv)
+    rng = random.Random(a.seed)
+    people = [(_name(rng), rng.randint(17, 30), f"user{i}@{rng.choice(DOMAINS)}") for i in range(a.students)]
+    teachers = [(_name(rng), rng.randint(28, 65), f"staff{i}@{rng.choice(DOMAINS)}") for i in range(a.instructors)]
+    courses = [(f"Course {i}", rng.randrange(a.instructors)) for i in range(max(a.students // 100, 1))]
+
+    plain = M.DataStore(indexes={})
+    t_plain = _fill(plain, people, teachers, courses)
+    ds = M.DataStore()
+    t_indexed = _fill(ds, people, teachers, courses)
+    print(f"add: {t_indexed:.2f}s with indexes, {t_plain:.2f}s without")
+
+    queries = [
+        ("students aged 18-21 at gmail.com", "students", dict(age=(18, 21), email_domain="gmail.com"),
+         lambda s: 18 <= s.age <= 21 and M.email_domain(s) == "gmail.com"),
+        ("students aged 25", "students", dict(age=25), lambda s: s.age == 25),
+        ("instructors at uni.edu", "instructors", dict(email_domain="uni.edu"),
+         lambda i: M.email_domain(i) == "uni.edu"),
+        ("courses taught by I00007", "courses", dict(instructor_id="I00007"),
+         lambda c: M.course_instructor_id(c) == "I00007"),
+    ]
+    problems = []
+    for label, kind, cond, pred in queries:
+        field, estimate = ds.plan(kind, **cond)
+        t_query, found = _time(lambda: ds.query(kind, **cond), a.reps)
+        t_scan, expected = _time(lambda: [o for o in getattr(ds, kind).values() if pred(o)], a.reps)
+        print(f"{label}: {len(found)} found via {field or 'scan'} ({estimate} candidates); "
+              f"query {t_query * 1e3:.3f} ms, scan {t_scan * 1e3:.3f} ms ({t_scan / t_query:.0f}x)")
+        if {id(o) for o in found} != {id(o) for o in expected}:
+            problems.append(f"{label}: query and scan disagree")
+    for p in problems:
+        print("  problem:", p)
+    print("OK" if not problems else "FAILED")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
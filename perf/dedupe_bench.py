@@ -0,0 +1,105 @@
+"""Duplicate detection and merging at scale.
+
+Fills a temporary database with ``--students`` students (varied synthetic names,
+see :mod:`perf.fuzzy_bench`) registered in a few courses each, then adds
+``--duplicates`` copies of random students under new IDs: half with the email in
+different case or with a ``+tag``, half with a typo in the name and a different
+email. It reports
+
+* the time of :func:`dedupe.find_duplicates` and how many name comparisons the
+  blocks needed, against the number of pairs a full comparison would make,
+* recall (copies found in the same cluster as their original) and the number of
+  clusters that contain no injected copy,
+* the time to merge every cluster in one transaction, and checks the capacity,
+  waitlist and statistics invariants afterwards (see :mod:`perf.registration_day`).
+
+Usage::
+
+    python -m perf.dedupe_bench --students 100000 --duplicates 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db as DB
+import dedupe
+from perf.fuzzy_bench import _name, _typo
+from perf.registration_day import check
+
+
+def _fill(path, rng, students, duplicates, courses):
+    people = [(f"S{i:06d}", _name(rng), rng.randint(17, 30)) for i in range(students)]
+    rows = [(sid, name, age, f"{name.replace(' ', '.').lower()}{i}@example.com")
+            for i, (sid, name, age) in enumerate(people)]
+    copies = {}
+    for n, i in enumerate(rng.sample(range(students), duplicates)):
+        sid, name, age, email = rows[i]
+        dup = f"D{n:06d}"
+        if n % 2:
+            local, _, domain = email.partition("@")
+            rows.append((dup, name, age, rng.choice([email.upper(), f"{local}+import@{domain}"])))
+        else:
+            rows.append((dup, _typo(rng, name, 1), age, f"other{n}@example.org"))
+        copies[dup] = sid
+    regs = [(r[0], f"C{c:03d}") for r in rows for c in rng.sample(range(courses), 2)]
+    with DB.writer(path) as con:
+        con.executemany("INSERT INTO courses(course_id, course_name, capacity) VALUES (?, ?, NULL)",
+                        [(f"C{c:03d}", f"Course {c}") for c in range(courses)])
+        con.executemany("INSERT INTO students(student_id, name, age, email) VALUES (?, ?, ?, ?)", rows)
+        con.executemany("INSERT OR IGNORE INTO registrations(student_id, course_id) VALUES (?, ?)", regs)
+    return copies
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--students", type=int, default=100_000)
+    ap.add_argument("--duplicates", type=int, default=2000)
+    ap.add_argument("--courses", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args(argv)
+    rng = random.Random(a.seed)
+    with tempfile.TemporaryDirectory(prefix="dedupe_") as d:
+        path = os.path.join(d, "dedupe.db")
+        DB.init_db(path)
+        copies = _fill(path, rng, a.students, a.duplicates, a.courses)
+        total = a.students + a.duplicates
+
+        calls = [0]
+        similarity = dedupe.name_similarity
+        def counted(x, y):
+            calls[0] += 1
+            return similarity(x, y)
+        dedupe.name_similarity = counted
+        t0 = time.perf_counter()
+        clusters = dedupe.find_duplicates("students", path)
+        t_find = time.perf_counter() - t0
+        dedupe.name_similarity = similarity
+        print(f"find: {t_find:.2f}s for {total} students, {calls[0]} name comparisons "
+              f"(all pairs: {total * (total - 1) // 2})")
+
+        home = {i: c.keep for c in clusters for i in [c.keep, *c.merge]}
+        found = sum(1 for dup, orig in copies.items() if dup in home and home.get(orig) == home[dup])
+        stray = sum(1 for c in clusters if not any(i in copies for i in [c.keep, *c.merge]))
+        print(f"recall {found / len(copies):.1%} ({found}/{len(copies)}), {len(clusters)} clusters, "
+              f"{stray} without an injected copy")
+
+        t0 = time.perf_counter()
+        counts = dedupe.merge_clusters("students", clusters, path)
+        print(f"merge: {time.perf_counter() - t0:.2f}s, {counts}")
+        problems = check(path)
+        for p in problems:
+            print("  problem:", p)
+    print("OK" if not problems else "FAILED")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
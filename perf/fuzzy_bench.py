@@ -0,0 +1,104 @@
+"""Fuzzy name search: trigram index against comparing every name in Python.
+
+Fills a temporary database with ``--names`` students with varied synthetic names
+(the inserts go through the trigram triggers, so the indexing cost is timed too),
+then searches for ``--queries`` of those names with one or two typos (a letter
+swapped, dropped or replaced) and reports
+
+* insert time with the index maintained,
+* latency per query through :func:`fuzzy.search` (median and worst),
+* the same queries by scoring every name with :func:`fuzzy.similarity`,
+* recall: how often the misspelled student is among the first ``--limit`` results.
+
+Usage::
+
+    python -m perf.fuzzy_bench --names 100000 --queries 200
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db as DB
+import fuzzy
+
+ONSETS = ["", "b", "d", "f", "h", "j", "k", "l", "m", "n", "r", "s", "t", "z", "sh", "kh", "gh"]
+VOWELS = ["a", "e", "i", "o", "u", "aa", "ei", "ou"]
+CODAS = ["", "", "l", "m", "n", "r", "s", "d", "t"]
+
+
+def _word(rng, syllables):
+    return "".join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS) for _ in range(syllables)).title()
+
+
+def _name(rng):
+    return f"{_word(rng, rng.randint(1, 3))} {_word(rng, rng.randint(2, 4))}"
+
+
+def _typo(rng, name, edits):
+    s = list(name)
+    for _ in range(edits):
+        i = rng.randrange(1, len(s) - 1)
+        op = rng.choice(("swap", "drop", "replace"))
+        if op == "swap":
+            s[i], s[i + 1] = s[i + 1], s[i]
+        elif op == "drop" and len(s) > 4:
+            del s[i]
+        else:
+            s[i] = rng.choice("aeiourstln")
+    return "".join(s)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--names", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--limit", type=int, default=20)
+    ap.add_argument("--scan-queries", type=int, default=20, help="queries also answered by the full scan")
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args(argv)
+    rng = random.Random(a.seed)
+    names = [_name(rng) for _ in range(a.names)]
+    picks = rng.sample(range(a.names), a.queries)
+    queries = [(f"S{i:06d}", _typo(rng, names[i], rng.choice((1, 2)))) for i in picks]
+
+    with tempfile.TemporaryDirectory(prefix="fuzzy_") as d:
+        path = os.path.join(d, "fuzzy.db")
+        DB.init_db(path)
+        t0 = time.perf_counter()
+        with DB.writer(path) as con:
+            con.executemany("INSERT INTO students(student_id, name, age, email) VALUES (?, ?, 20, ?)",
+                            [(f"S{i:06d}", n, f"s{i}@example.com") for i, n in enumerate(names)])
+        t_insert = time.perf_counter() - t0
+        print(f"{a.names} names inserted and indexed in {t_insert:.2f}s "
+              f"({t_insert / a.names * 1e6:.0f} us/name)")
+
+        times, found = [], 0
+        for sid, q in queries:
+            t0 = time.perf_counter()
+            rows = fuzzy.search_students(q, path, limit=a.limit)
+            times.append(time.perf_counter() - t0)
+            found += any(r["student_id"] == sid for r in rows)
+        print(f"index: median {statistics.median(times) * 1000:.1f} ms, worst {max(times) * 1000:.1f} ms, "
+              f"recall@{a.limit} {found / len(queries):.0%}")
+
+        scan = []
+        for sid, q in queries[:a.scan_queries]:
+            t0 = time.perf_counter()
+            sorted(((fuzzy.similarity(q, n), i) for i, n in enumerate(names)), reverse=True)[:a.limit]
+            scan.append(time.perf_counter() - t0)
+        if scan:
+            print(f"full scan in Python: median {statistics.median(scan) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""Headless GUI performance harness.
+
+Drives the PyQt app (``QT_QPA_PLATFORM=offscreen``) and the Tkinter app (a
+withdrawn root; needs an X display such as Xvfb) against generated databases and
+measures, for each scenario:
+
+- **populate** — wall time from dispatching the action on the event loop until
+  the tables are filled (median of ``--repeat`` runs),
+- **stall** — the longest gap between 10 ms heartbeat timers while the action
+  ran, i.e. how long the UI was unresponsive,
+- **memory** — peak and retained Python allocations (``tracemalloc``).
+
+Scenarios: ``open`` (build the main window and wait for its deferred initial
+load), ``refresh``, ``search`` and
+``insert`` (add a student, then run the app's post-insert update path).
+
+Usage::
+
+    python -m perf.gui_perf --sizes 1000,10000 --max-populate 1.0 --max-stall 0.2
+
+The exit status is 1 when any measurement crosses its budget.
+"""
+
+import abc
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db as DB
+from perf import datagen
+
+HEARTBEAT_MS = 10
+SCENARIOS = ("open", "refresh", "search", "insert")
+
+
+class Driver(abc.ABC):
+    """Runs actions on a GUI event loop and records heartbeat gaps; a subclass per toolkit."""
+
+    name = "?"
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._inserted = 0
+
+    # toolkit hooks -------------------------------------------------------
+    @abc.abstractmethod
+    def pump(self):
+        """Process pending events once."""
+
+    @abc.abstractmethod
+    def schedule(self, ms, fn):
+        """Call ``fn()`` on the event loop after ``ms`` milliseconds."""
+
+    def idle(self) -> bool:
+        """Whether the app has finished any deferred work started by an action."""
+        return True
+
+    def close(self):
+        pass
+
+    def settle(self, timeout=120.0):
+        """Pump the event loop until deferred work (e.g. the initial load) is done."""
+        t0 = time.perf_counter()
+        while not self.idle():
+            self.pump()
+            if time.perf_counter() - t0 > timeout:
+                raise TimeoutError(f"{self.name}: app did not settle within {timeout}s")
+
+    # scenarios -----------------------------------------------------------
+    @abc.abstractmethod
+    def action(self, scenario):
+        """The callable that performs ``scenario`` (one of :data:`SCENARIOS`)."""
+
+    def _new_student(self):
+        self._inserted += 1
+        sid = f"PERF{self._inserted:06d}"
+        DB.add_student(sid, "Perf Student", 20, f"perf{self._inserted}@example.com", self.db_path)
+
+    # measurement ---------------------------------------------------------
+    def timed(self, fn, timeout=120.0):
+        """Dispatch ``fn`` on the event loop; return ``(elapsed, stall)`` in seconds."""
+        beats, state = [], {"ran": False, "end": None}
+
+        def beat():
+            beats.append(time.perf_counter())
+            if state["end"] is None or len(beats) < 2:
+                self.schedule(HEARTBEAT_MS, beat)
+
+        def run():
+            fn()
+            state["ran"] = True
+
+        beat()
+        t0 = time.perf_counter()
+        self.schedule(0, run)
+        while state["end"] is None:
+            self.pump()
+            if state["ran"] and self.idle():
+                state["end"] = time.perf_counter()
+            elif time.perf_counter() - t0 > timeout:
+                raise TimeoutError(f"{self.name}: action did not finish within {timeout}s")
+        last = len(beats)
+        while len(beats) == last:  # wait for the heartbeat that follows the action
+            self.pump()
+        gaps = [b - a for a, b in zip(beats, beats[1:])]
+        stall = max(0.0, max(gaps) - HEARTBEAT_MS / 1000.0)
+        return state["end"] - t0, stall
+
+    def measure(self, scenario, repeat):
+        fn = self.action(scenario)
+        times, stalls = [], []
+        for _ in range(repeat):
+            elapsed, stall = self.timed(fn)
+            times.append(elapsed); stalls.append(stall)
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        self.timed(fn)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return dict(populate_s=statistics.median(times), stall_s=max(stalls),
+                    mem_peak_mb=(peak - base) / 2**20, mem_retained_mb=(current - base) / 2**20)
+
+
+class QtDriver(Driver):
+    name = "pyqt"
+
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtCore import QTimer, QEventLoop
+        import pyqt_main
+        self._QTimer, self._QEventLoop = QTimer, QEventLoop
+        self.mod = pyqt_main
+        self.mod.DB_PATH = db_path
+        self.app = QApplication.instance() or QApplication([])
+        self.win = None
+
+    def pump(self):
+        self.app.processEvents(self._QEventLoop.AllEvents, 5)
+
+    def idle(self):
+        return self.win is None or self.win.loaded
+
+    def schedule(self, ms, fn):
+        self._QTimer.singleShot(ms, fn)
+
+    def _open(self):
+        if self.win is not None:
+            self.win.close(); self.win.deleteLater()
+        self.win = self.mod.MainWindow(); self.win.show()
+
+    def action(self, scenario):
+        if scenario == "open":
+            return self._open
+        if self.win is None:
+            self._open(); self.settle()
+        rt = self.win.records_tab
+        if scenario == "refresh":
+            return rt.refresh
+        if scenario == "search":
+            def search():
+                rt.search_e.setText("Ha"); rt.apply_search()
+            return search
+        if scenario == "insert":
+            def insert():
+                self._new_student(); self.win.notify_data_changed()
+            return insert
+        raise ValueError(scenario)
+
+    def close(self):
+        if self.win is not None:
+            self.win.close(); self.win.deleteLater(); self.win = None
+        self.pump()
+
+
+class TkDriver(Driver):
+    name = "tkinter"
+
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        import tkinter as tk
+        import tkinter_main
+        self.mod = tkinter_main
+        self.mod.DB_PATH = db_path
+        # Heartbeats run on their own hidden interpreter so "open" can replace the app.
+        self.clock = tk.Tk(); self.clock.withdraw()
+        self.app = None
+
+    def pump(self):
+        self.clock.update()
+        if self.app is not None:
+            self.app.update()
+
+    def schedule(self, ms, fn):
+        self.clock.after(ms, fn)
+
+    def idle(self):
+        return self.app is None or (self.app.loaded and not self.app.busy())
+
+    def _open(self):
+        if self.app is not None:
+            self.app.destroy()
+        self.app = self.mod.App(); self.app.withdraw()
+
+    def action(self, scenario):
+        if scenario == "open":
+            return self._open
+        if self.app is None:
+            self._open(); self.settle()
+        if scenario == "refresh":
+            return self.app.refresh_all
+        if scenario == "search":
+            def search():
+                self.app.search.delete(0, "end"); self.app.search.insert(0, "Ha"); self.app.apply_search()
+            return search
+        if scenario == "insert":
+            def insert():
+                self._new_student(); self.app.refresh_all()
+            return insert
+        raise ValueError(scenario)
+
+    def close(self):
+        if self.app is not None:
+            self.app.destroy(); self.app = None
+        self.clock.destroy()
+
+
+DRIVERS = {"pyqt": QtDriver, "tkinter": TkDriver}
+
+
+def _available(toolkit):
+    if toolkit == "tkinter" and not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        return "no X display (run under xvfb-run)"
+    try:
+        __import__("PyQt5.QtWidgets" if toolkit == "pyqt" else "tkinter")
+    except ImportError as e:
+        return str(e)
+    return None
+
+
+def run(toolkits, sizes, repeat, budgets, workdir):
+    results = []
+    for toolkit in toolkits:
+        reason = _available(toolkit)
+        if reason:
+            print(f"[skip] {toolkit}: {reason}")
+            continue
+        for n in sizes:
+            db_path = os.path.join(workdir, f"perf_{n}.db")
+            datagen.generate(db_path, students=n, instructors=max(5, n // 100), courses=max(10, n // 25))
+            driver = DRIVERS[toolkit](db_path)
+            try:
+                for scenario in SCENARIOS:
+                    m = driver.measure(scenario, repeat)
+                    over = [k for k, limit in budgets.items() if limit is not None and m[k] > limit]
+                    m.update(toolkit=toolkit, rows=n, scenario=scenario, over_budget=over)
+                    results.append(m)
+                    print(f"{toolkit:8} {n:>8} {scenario:8} populate={m['populate_s']:.3f}s "
+                          f"stall={m['stall_s']:.3f}s mem_peak={m['mem_peak_mb']:.1f}MB "
+                          f"retained={m['mem_retained_mb']:.1f}MB {'FAIL ' + ','.join(over) if over else 'ok'}")
+            finally:
+                driver.close()
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--toolkit", choices=["pyqt", "tkinter", "both"], default="both")
+    ap.add_argument("--sizes", default="1000,10000", help="comma-separated student counts")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--max-populate", type=float, default=1.0, help="seconds")
+    ap.add_argument("--max-stall", type=float, default=0.2, help="seconds")
+    ap.add_argument("--max-mem-mb", type=float, default=64.0, help="peak MB")
+    ap.add_argument("--json", help="also write the results to this file")
+    a = ap.parse_args(argv)
+
+    toolkits = ["pyqt", "tkinter"] if a.toolkit == "both" else [a.toolkit]
+    sizes = [int(s) for s in a.sizes.split(",") if s]
+    budgets = {"populate_s": a.max_populate, "stall_s": a.max_stall, "mem_peak_mb": a.max_mem_mb}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="gui_perf_") as workdir:
+        os.chdir(workdir)  # keep the apps' default school.db out of the project folder
+        try:
+            results = run(toolkits, sizes, a.repeat, budgets, workdir)
+        finally:
+            os.chdir(cwd)
+    if a.json:
+        with open(a.json, "w", encoding="utf-8") as f:
+            json.dump({"budgets": budgets, "results": results}, f, indent=2)
+    failed = [r for r in results if r["over_budget"]]
+    print(f"{len(results)} measurements, {len(failed)} over budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Read-only connection benchmark for reporting workloads.
+
+Runs two read workloads against a generated database in each connection mode:
+
+* ``export`` — the Records rows for all students and courses (what a CSV export
+  reads), repeated ``--repeat`` times;
+* ``lookups`` — ``--lookups`` single-student reads, one ``db.py`` call each.
+
+Modes: the default read/write ``connect`` (a new connection per call), the
+process-wide ``SCHOOL_DB_READONLY`` switch (also a connection per call, but
+``mode=ro`` with mmap), and ``db.read_only`` / ``immutable`` blocks that share
+one read-only connection.
+
+Usage::
+
+    python -m perf.readonly_bench --students 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db as DB
+import records
+from perf import datagen
+
+
+@contextmanager
+def _env(value):
+    old = os.environ.get(DB.READONLY_ENV)
+    os.environ[DB.READONLY_ENV] = value
+    try:
+        yield
+    finally:
+        if old is None:
+            del os.environ[DB.READONLY_ENV]
+        else:
+            os.environ[DB.READONLY_ENV] = old
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--students", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--lookups", type=int, default=5000)
+    a = ap.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="ro_") as d:
+        path = datagen.generate(os.path.join(d, "ro.db"), students=a.students,
+                                instructors=max(5, a.students // 100), courses=max(10, a.students // 25))
+        ids = [f"S{i:06d}" for i in random.Random(0).choices(range(a.students), k=a.lookups)]
+        modes = [("read/write connect", lambda: nullcontext()),
+                 (f"{DB.READONLY_ENV}=1", lambda: _env("1")),
+                 ("db.read_only()", lambda: DB.read_only(path)),
+                 ("read_only(immutable)", lambda: DB.read_only(path, immutable=True))]
+        print(f"{a.students} students, {os.path.getsize(path) / 2**20:.1f} MB")
+        print(f"{'mode':22} {'export rows/s':>14} {'lookups/s':>10}")
+        for label, ctx in modes:
+            with ctx():
+                t0 = time.perf_counter()
+                rows = 0
+                for _ in range(a.repeat):
+                    rows += len(records.student_rows("", path)) + len(records.course_rows("", path))
+                t1 = time.perf_counter()
+                for sid in ids:
+                    DB.get_student(sid, path)
+                t2 = time.perf_counter()
+            print(f"{label:22} {rows / (t1 - t0):>14.0f} {a.lookups / (t2 - t1):>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
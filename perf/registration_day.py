@@ -0,0 +1,155 @@
+"""Registration-day load simulator for course capacity and waitlists.
+
+Creates ``--courses`` courses with ``--capacity`` seats each and ``--students``
+students, then starts ``--clerks`` processes that register students at the same
+time. Every clerk works through its share of the students, registering each in
+``--picks`` courses (most of them from a few popular courses, so those fill up and
+build waitlists). Then a ``--drop-rate`` share of them drops one of those courses
+again, which promotes the next student in line. Afterwards it checks that:
+
+* no course holds more students than its capacity,
+* nobody is both registered and waiting for the same course,
+* no course has a free seat while students are still waiting,
+* the ``course_stats`` counts match the registrations.
+
+Usage::
+
+    python -m perf.registration_day --clerks 8 --students 2000 --courses 20 --capacity 30
+
+Exit status 1 means an invariant was violated or a registration failed.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db as DB
+
+
+def _clerk(args):
+    db_path, cid, student_ids, courses, picks, drop_rate, timeout = args
+    DB.WRITE_TIMEOUT = timeout
+    rng = random.Random(cid)
+    popular = courses[:max(1, len(courses) // 5)]
+    outcome = {DB.REGISTERED: 0, DB.WAITLISTED: 0, "dropped": 0, "promoted": 0}
+    errors, chosen = [], {}
+    for sid in student_ids:
+        mine = chosen[sid] = set()
+        while len(mine) < min(picks, len(courses)):
+            mine.add(rng.choice(popular) if rng.random() < 0.7 else rng.choice(courses))
+        try:
+            for course in sorted(mine):
+                outcome[DB.register_student(sid, course, db_path)] += 1
+        except Exception as e:  # counted, the run is then reported as failed
+            errors.append(f"{sid}: {e}")
+    # then some students change their minds, once the popular courses have queues
+    for sid in rng.sample(student_ids, int(len(student_ids) * drop_rate)):
+        try:
+            outcome["dropped"] += 1
+            outcome["promoted"] += DB.unregister_student(sid, rng.choice(sorted(chosen[sid])), db_path) is not None
+        except Exception as e:
+            errors.append(f"{sid}: {e}")
+    return outcome, DB.write_stats(), errors
+
+
+def check(db_path):
+    """Invariant violations, as messages (empty when the data is consistent)."""
+    con = sqlite3.connect(db_path)
+    try:
+        over = con.execute("""
+            SELECT c.course_id, c.capacity, COUNT(r.student_id) FROM courses c
+            JOIN registrations r ON r.course_id = c.course_id
+            GROUP BY c.course_id HAVING COUNT(r.student_id) > c.capacity
+        """).fetchall()
+        both = con.execute("""
+            SELECT COUNT(*) FROM waitlist w
+            JOIN registrations r ON r.student_id = w.student_id AND r.course_id = w.course_id
+        """).fetchone()[0]
+        idle = con.execute("""
+            SELECT c.course_id FROM courses c
+            WHERE EXISTS (SELECT 1 FROM waitlist w WHERE w.course_id = c.course_id)
+              AND (c.capacity IS NULL OR c.capacity > (SELECT COUNT(*) FROM registrations r
+                                                       WHERE r.course_id = c.course_id))
+        """).fetchall()
+        stale = con.execute("""
+            SELECT COUNT(*) FROM course_stats s
+            WHERE s.enrolled != (SELECT COUNT(*) FROM registrations r WHERE r.course_id = s.course_id)
+        """).fetchone()[0]
+    finally:
+        con.close()
+    problems = [f"{c}: {n} students for {cap} seats" for c, cap, n in over]
+    if both:
+        problems.append(f"{both} students are both registered and waitlisted")
+    problems += [f"{c}: free seats while students wait" for (c,) in idle]
+    if stale:
+        problems.append(f"{stale} course_stats rows out of date")
+    return problems
+
+
+def run(db_path, clerks, students, courses, capacity, picks, drop_rate, timeout):
+    DB.init_db(db_path)
+    DB.add_instructor("I000", "Registrar", 40, "registrar@example.com", db_path)
+    course_ids = [f"C{c:03d}" for c in range(courses)]
+    for cid in course_ids:
+        DB.add_course(cid, f"Course {cid}", "I000", db_path, capacity=capacity)
+    with DB.writer(db_path) as con:
+        con.executemany("INSERT INTO students(student_id, name, age, email) VALUES (?, ?, ?, ?)",
+                        [(f"S{i:06d}", f"Student {i}", 20, f"s{i}@example.com") for i in range(students)])
+    sids = [f"S{i:06d}" for i in range(students)]
+
+    ctx = mp.get_context("spawn")
+    t0 = time.perf_counter()
+    with ctx.Pool(clerks) as pool:
+        results = pool.map(_clerk, [(db_path, c, sids[c::clerks], course_ids, picks, drop_rate, timeout)
+                                    for c in range(clerks)])
+    elapsed = time.perf_counter() - t0
+
+    totals = {DB.REGISTERED: 0, DB.WAITLISTED: 0, "dropped": 0, "promoted": 0}
+    retries = timeouts = 0
+    errors = []
+    for outcome, stats, errs in results:
+        for k, v in outcome.items():
+            totals[k] += v
+        retries += stats["retries"]; timeouts += stats["timeouts"]
+        errors.extend(errs)
+    requests = totals[DB.REGISTERED] + totals[DB.WAITLISTED]
+    enrolled = totals[DB.REGISTERED] + totals["promoted"]
+    print(f"{clerks} clerks, {students} students, {courses} courses x {capacity} seats: {elapsed:.2f}s")
+    print(f"{requests} registration requests ({requests / elapsed:.0f}/s), "
+          f"{enrolled} enrollments ({enrolled / elapsed:.0f}/s)")
+    print(f"registered={totals[DB.REGISTERED]} waitlisted={totals[DB.WAITLISTED]} "
+          f"dropped={totals['dropped']} promoted={totals['promoted']} retries={retries} timeouts={timeouts}")
+    problems = check(db_path)
+    for msg in (errors[:10] + problems):
+        print("  problem:", msg)
+    return not errors and not problems
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clerks", type=int, default=8)
+    ap.add_argument("--students", type=int, default=2000)
+    ap.add_argument("--courses", type=int, default=20)
+    ap.add_argument("--capacity", type=int, default=30)
+    ap.add_argument("--picks", type=int, default=3, help="courses each student asks for")
+    ap.add_argument("--drop-rate", type=float, default=0.2, help="share of students who drop one course")
+    ap.add_argument("--timeout", type=float, default=30.0, help="per-write lock timeout (s)")
+    a = ap.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="regday_") as d:
+        ok = run(os.path.join(d, "regday.db"), a.clerks, a.students, a.courses, a.capacity, a.picks,
+                 a.drop_rate, a.timeout)
+    print("OK: no course over-filled" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Snapshot format benchmark: binary columnar snapshot vs JSON vs CSV.
+
+Generates a database with ``--students`` students, then for each format times a
+full dump from SQLite and a full load into a fresh database and reports the file
+size. JSON is written like ``DataStore.to_json`` (``indent=2``) and CSV as one
+file per table, like the PyQt export.
+
+Usage::
+
+    python -m perf.snapshot_bench --students 50000
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db as DB
+import snapshot
+from perf import datagen
+
+
+def _rows(db_path):
+    with DB.connect(db_path) as con:
+        out = {}
+        for t in snapshot.TABLES:
+            cur = con.execute(f"SELECT * FROM {t}")
+            out[t] = ([d[0] for d in cur.description], cur.fetchall())
+    return out
+
+
+def _insert(db_path, tables):
+    DB.init_db(db_path)
+    with DB.writer(db_path) as con:
+        for t in snapshot.TABLES:
+            cols, rows = tables[t]
+            if not rows:  # e.g. waitlist and course_slots, which datagen leaves empty (JSON has no columns then)
+                continue
+            con.executemany(f"INSERT INTO {t}({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", rows)
+
+
+def json_dump(db_path, path):
+    payload = {t: [dict(zip(cols, r)) for r in rows] for t, (cols, rows) in _rows(db_path).items()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+def json_load(path, db_path):
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    tables = {}
+    for t, rows in payload.items():
+        cols = list(rows[0]) if rows else []
+        tables[t] = (cols, [tuple(r[c] for c in cols) for r in rows])
+    _insert(db_path, tables)
+
+
+def csv_dump(db_path, folder):
+    os.makedirs(folder, exist_ok=True)
+    for t, (cols, rows) in _rows(db_path).items():
+        with open(os.path.join(folder, f"{t}.csv"), "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f); w.writerow(cols); w.writerows(rows)
+
+
+def csv_load(folder, db_path):
+    tables = {}
+    for t in snapshot.TABLES:
+        with open(os.path.join(folder, f"{t}.csv"), newline="", encoding="utf-8") as f:
+            r = csv.reader(f); cols = next(r)
+            tables[t] = (cols, [tuple(v if v != "" else None for v in row) for row in r])
+    _insert(db_path, tables)
+
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, n)) for n in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--students", type=int, default=20000)
+    a = ap.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="snap_") as d:
+        src = datagen.generate(os.path.join(d, "src.db"), students=a.students,
+                               instructors=max(5, a.students // 100), courses=max(10, a.students // 25))
+        formats = [(f"snapshot/{c}", lambda s, p, c=c: snapshot.dump(s, p, c), snapshot.load)
+                   for c in ("none", "zlib", "lzma")]
+        formats += [("json indent=2", json_dump, json_load), ("csv", csv_dump, csv_load)]
+        print(f"{a.students} students, {os.path.getsize(src) / 2**20:.1f} MB database")
+        print(f"{'format':16} {'size MB':>8} {'dump s':>8} {'load s':>8}")
+        ok = True
+        for i, (label, dump, load) in enumerate(formats):
+            out, dest = os.path.join(d, f"out{i}"), os.path.join(d, f"dest{i}.db")
+            t0 = time.perf_counter(); dump(src, out); t1 = time.perf_counter()
+            load(out, dest); t2 = time.perf_counter()
+            print(f"{label:16} {_size(out) / 2**20:>8.2f} {t1 - t0:>8.3f} {t2 - t1:>8.3f}")
+            if label.startswith("snapshot"):
+                ok = ok and not snapshot.verify(out, dest)
+    print("snapshots verified" if ok else "FAILED: snapshot does not match its restore")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Cold-start profile for the two GUIs.
+
+Prints two reports per app:
+
+1. the slowest imports from ``python -X importtime -c "import <app>"``
+   (self and cumulative microseconds, like the raw ``-X importtime`` output);
+2. a startup timeline from ``python <app>.py --profile-startup``: seconds from
+   process launch until the app module finished importing (``imported``), the
+   first event-loop pass after the window is shown (``shown``) and the tables
+   and combos being filled (``loaded``).
+
+Usage::
+
+    python -m perf.startup --app pyqt --db big.db --top 15
+"""
+
+import argparse
+import ast
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = {"pyqt": "pyqt_main", "tkinter": "tkinter_main"}
+
+
+def _env():
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def import_times(module, cwd, top=15):
+    """Return ``[(self_us, cumulative_us, name), ...]`` sorted by cumulative time."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=cwd, env=_env(), capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cum_us, name = (p.strip() for p in line[len("import time:"):].split("|"))
+        rows.append((int(self_us), int(cum_us), name))
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+
+def timeline(module, cwd, timeout=120):
+    env = _env()
+    env["SCHOOL_STARTUP_T0"] = repr(time.time())
+    proc = subprocess.run([sys.executable, os.path.join(ROOT, module + ".py"), "--profile-startup"],
+                          cwd=cwd, env=env, capture_output=True, text=True, timeout=timeout)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            return ast.literal_eval(line)
+    raise RuntimeError((proc.stderr.strip() or "no startup report printed").splitlines()[-1])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--app", choices=["pyqt", "tkinter", "both"], default="both")
+    ap.add_argument("--db", help="database to start against (copied; default: a fresh empty one)")
+    ap.add_argument("--top", type=int, default=15)
+    a = ap.parse_args(argv)
+
+    apps = ["pyqt", "tkinter"] if a.app == "both" else [a.app]
+    with tempfile.TemporaryDirectory(prefix="startup_") as cwd:
+        if a.db:
+            shutil.copyfile(a.db, os.path.join(cwd, "school.db"))
+        for app in apps:
+            module = MODULES[app]
+            print(f"== {app} ({module}) ==")
+            try:
+                print(f"{'self [us]':>10} {'cumulative':>11}  imported package")
+                for self_us, cum_us, name in import_times(module, cwd, a.top):
+                    print(f"{self_us:>10} {cum_us:>11}  {name}")
+                marks = timeline(module, cwd)
+                print("timeline (s): " + ", ".join(f"{k}={v:.3f}" for k, v in marks.items()))
+            except (RuntimeError, subprocess.TimeoutExpired) as e:
+                print(f"[skip] {app}: {e}")
+
+
+if __name__ == "__main__":
+    main()
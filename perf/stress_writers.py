@@ -0,0 +1,111 @@
+"""Multi-process write stress test for the ``db.writer`` retry path.
+
+Starts ``--writers`` processes that each add ``--rows`` students, register every
+one of them in a course and rename every tenth, plus ``--readers`` processes that
+keep listing and searching, all against one shared database file. Afterwards it
+checks that no write was lost (every student and registration is present and the
+summary-table counts match) and prints the merged contention metrics.
+
+Usage::
+
+    python -m perf.stress_writers --writers 8 --rows 200 --readers 2
+
+Exit status 1 means a write failed or went missing.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db as DB
+
+COURSES = 20
+
+
+def _writer(args):
+    db_path, wid, rows, timeout = args
+    DB.WRITE_TIMEOUT = timeout
+    rng = random.Random(wid)
+    errors = []
+    for i in range(rows):
+        sid = f"W{wid:03d}_{i:06d}"
+        try:
+            DB.add_student(sid, f"Writer {wid}", 20, f"w{wid}.{i}@example.com", db_path)
+            if i % 10 == 0:
+                DB.update_student(sid, new_id=sid + "R", db_path=db_path); sid += "R"
+            DB.register_student(sid, f"C{rng.randrange(COURSES):03d}", db_path)
+        except Exception as e:  # counted, the run is then reported as failed
+            errors.append(f"{sid}: {e}")
+    return DB.write_stats(), errors
+
+
+def _reader(db_path):
+    while True:  # runs until the pool is terminated
+        DB.list_students(db_path); DB.search_students("Writer 1", db_path)
+
+
+def run(db_path, writers, rows, readers, timeout):
+    DB.init_db(db_path)
+    DB.add_instructor("I000", "Stress Instructor", 40, "stress@example.com", db_path)
+    for c in range(COURSES):
+        DB.add_course(f"C{c:03d}", f"Course {c}", "I000", db_path)
+
+    ctx = mp.get_context("spawn")
+    t0 = time.perf_counter()
+    with ctx.Pool(writers + readers) as pool:
+        for _ in range(readers):
+            pool.apply_async(_reader, (db_path,))
+        results = pool.map(_writer, [(db_path, w, rows, timeout) for w in range(writers)])
+        elapsed = time.perf_counter() - t0
+        pool.terminate()
+
+    merged = dict(writes=0, retries=0, timeouts=0, wait_total_s=0.0, wait_max_s=0.0)
+    errors = []
+    for stats, errs in results:
+        for k in ("writes", "retries", "timeouts", "wait_total_s"):
+            merged[k] += stats[k]
+        merged["wait_max_s"] = max(merged["wait_max_s"], stats["wait_max_s"])
+        errors.extend(errs)
+
+    con = sqlite3.connect(db_path)
+    try:
+        students = con.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+        regs = con.execute("SELECT COUNT(*) FROM registrations").fetchone()[0]
+        enrolled = con.execute("SELECT SUM(enrolled) FROM course_stats").fetchone()[0]
+    finally:
+        con.close()
+    expected = writers * rows
+    print(f"{writers} writers x {rows} rows, {readers} readers: {elapsed:.2f}s, "
+          f"{merged['writes'] / elapsed:.0f} writes/s")
+    print(f"retries={merged['retries']} timeouts={merged['timeouts']} "
+          f"lock wait total={merged['wait_total_s']:.2f}s max={merged['wait_max_s'] * 1000:.1f}ms")
+    print(f"students {students}/{expected}, registrations {regs}/{expected}, course_stats sum {enrolled}")
+    for e in errors[:10]:
+        print("  error:", e)
+    return not errors and students == expected and regs == expected and enrolled == expected
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--writers", type=int, default=8)
+    ap.add_argument("--rows", type=int, default=200)
+    ap.add_argument("--readers", type=int, default=2)
+    ap.add_argument("--timeout", type=float, default=DB.WRITE_TIMEOUT, help="per-write lock timeout (s)")
+    a = ap.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="stress_") as d:
+        ok = run(os.path.join(d, "stress.db"), a.writers, a.rows, a.readers, a.timeout)
+    print("OK: no lost writes" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Schedule-conflict detection: interval index and sweep against pairwise comparison.
+
+Builds a synthetic term of ``--courses`` courses with two to three weekly slots
+each and ``--students`` students taking ``--load`` courses, then times
+
+* the whole-term check: :func:`timetable.overlaps` per student against comparing
+  every pair of that student's slots,
+* single checks: one :class:`timetable.IntervalIndex` lookup per slot against a scan
+  of all of the student's slots, for a student with many courses,
+
+and checks that both methods find the same conflicts.
+
+Usage::
+
+    python -m perf.timetable_bench --courses 2000 --students 20000 --load 6
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import timetable as T
+
+
+def _term(courses, rng):
+    slots = {}
+    for c in range(courses):
+        cid = f"C{c:05d}"
+        start = rng.randrange(8 * 60, 19 * 60, 15)
+        length = rng.choice([50, 75, 110])
+        slots[cid] = [T.Slot(cid, d, start, start + length) for d in rng.sample(range(5), rng.choice([2, 3]))]
+    return slots
+
+
+def _pairwise(slots, who=""):
+    return [T.Conflict(who, a, b) for i, a in enumerate(slots) for b in slots[i + 1:]
+            if a.day == b.day and a.course_id != b.course_id and a.start < b.end and b.start < a.end]
+
+
+def _key(c):
+    return (c.who,) + tuple(sorted([tuple(c.a), tuple(c.b)]))
+
+
+def _best(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter(); out = fn(); best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--courses", type=int, default=2000)
+    ap.add_argument("--students", type=int, default=20000)
+    ap.add_argument("--load", type=int, default=6, help="courses per student")
+    ap.add_argument("--heavy", type=int, default=200, help="courses of the one busy student in the single checks")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args(argv)
+    rng = random.Random(a.seed)
+    term = _term(a.courses, rng)
+    ids = sorted(term)
+    people = {f"S{s:06d}": [sl for c in rng.sample(ids, a.load) for sl in term[c]] for s in range(a.students)}
+
+    t_sweep, found = _best(lambda: [c for who, sl in people.items() for c in T.overlaps(sl, who)], a.repeat)
+    t_pairs, expected = _best(lambda: [c for who, sl in people.items() for c in _pairwise(sl, who)], a.repeat)
+    same = sorted(map(_key, found)) == sorted(map(_key, expected))
+    print(f"term check, {a.students} students x {a.load} courses: sweep {t_sweep * 1000:.1f} ms, "
+          f"pairwise {t_pairs * 1000:.1f} ms, {len(found)} conflicts, {'same' if same else 'DIFFERENT'}")
+
+    heavy = [sl for c in rng.sample(ids, min(a.heavy, len(ids))) for sl in term[c]]
+    probes = [sl for c in rng.sample(ids, 200) for sl in term[c]]
+    index = T.IntervalIndex(heavy)
+    t_index, hits = _best(lambda: [h for p in probes for h in index.overlapping(p.day, p.start, p.end)], a.repeat)
+    t_scan, scanned = _best(lambda: [h for p in probes for h in heavy
+                                     if h.day == p.day and h.start < p.end and p.start < h.end], a.repeat)
+    same_single = sorted(hits) == sorted(scanned)
+    print(f"single checks against {len(heavy)} slots: index {t_index / len(probes) * 1e6:.1f} us/slot, "
+          f"scan {t_scan / len(probes) * 1e6:.1f} us/slot, {'same' if same_single else 'DIFFERENT'}")
+    return 0 if same and same_single else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Per-row versus batched validation throughput (:mod:`validation`).
+
+Validates ``--rows`` student records (about 1% invalid) three ways: one
+``validation.student`` call per row with try/except, ``validate_records`` on the
+list of dicts, and ``validate_columns`` on the same data already split into
+columns (what ``csv_import`` does).
+
+Usage::
+
+    python -m perf.validation_bench --rows 200000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import validation as V
+from perf import datagen
+
+
+def make_records(n, seed=0):
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        first, last = rng.choice(datagen.FIRST), rng.choice(datagen.LAST)
+        out.append(dict(student_id=f"S{i:07d}" if rng.random() > 0.003 else f"S {i}",
+                        name=f"{first} {last}",
+                        age=str(rng.randint(17, 30)) if rng.random() > 0.003 else "old",
+                        email=f"{first}.{last}{i}@Example.com".lower() if rng.random() > 0.003 else "none"))
+    return out
+
+
+def per_row(records):
+    clean, errors = [], []
+    for i, r in enumerate(records):
+        try:
+            clean.append((i, V.student(r)))
+        except V.ValidationError as e:
+            errors.append((i, str(e)))
+    return clean, errors
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=200000)
+    ap.add_argument("--repeat", type=int, default=3)
+    a = ap.parse_args(argv)
+    records = make_records(a.rows)
+    columns = {f: [r[f] for r in records] for f in V.COLUMNS["students"]}
+    runs = [("per row", lambda: per_row(records)),
+            ("validate_records", lambda: V.validate_records("students", records)),
+            ("validate_columns", lambda: V.validate_columns("students", columns))]
+    results = []
+    print(f"{a.rows} records")
+    for label, fn in runs:
+        best = float("inf")
+        for _ in range(a.repeat):
+            t0 = time.perf_counter(); res = fn(); best = min(best, time.perf_counter() - t0)
+        results.append(res)
+        print(f"{label:18} {a.rows / best:>10.0f} rows/s  ({len(res[0])} valid, {len(res[1])} rejected)")
+    same = all(r == results[0] for r in results)
+    print("results identical" if same else "FAILED: batched and per-row results differ")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Cached Records rows (``viewmodel.RecordsModel``) against re-reading them.
+
+Generates a database with ``--students`` students, builds a
+:class:`viewmodel.RecordsModel`, then makes ``--writes`` single writes (a student,
+instructor or course renamed, a student registered or dropped), each followed by
+:meth:`RecordsModel.refresh` and, for comparison, by what a refresh did before:
+all three ``records.*_rows`` read from scratch. Prints the median time of both,
+and checks after the last write that the cached rows equal freshly read ones.
+
+Usage::
+
+    python -m perf.viewmodel_bench --students 100000 --writes 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import db as DB
+import viewmodel
+from perf import datagen
+
+
+def _write(path, rng, n):
+    with DB.connect(path) as con:
+        student = con.execute("SELECT student_id FROM students ORDER BY random() LIMIT 1").fetchone()[0]
+        course, teacher = con.execute("SELECT course_id, instructor_id FROM courses ORDER BY random() LIMIT 1").fetchone()
+    kind = rng.choice(["student", "instructor", "course", "register", "drop"])
+    if kind == "student":
+        DB.update_student(student, name=f"Renamed Student {n}", db_path=path)
+    elif kind == "instructor" and teacher:
+        DB.update_instructor(teacher, name=f"Renamed Instructor {n}", db_path=path)
+    elif kind == "course":
+        DB.update_course(course, course_name=f"Renamed Course {n}", db_path=path)
+    elif kind == "register":
+        DB.register_student(student, course, path)
+    else:
+        with DB.connect(path) as con:
+            r = con.execute("SELECT student_id, course_id FROM registrations ORDER BY random() LIMIT 1").fetchone()
+        if r:
+            DB.unregister_student(*r, db_path=path)
+    return kind
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--students", type=int, default=100_000)
+    ap.add_argument("--writes", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args(argv)
+    rng = random.Random(a.seed)
+    with tempfile.TemporaryDirectory(prefix="viewmodel_") as d:
+        path = os.path.join(d, "school.db")
+        datagen.generate(path, students=a.students, seed=a.seed)
+        model = viewmodel.RecordsModel(path)
+        t0 = time.perf_counter()
+        model.refresh()
+        print(f"build: {time.perf_counter() - t0:.3f}s")
+        cached, full = [], []
+        for n in range(a.writes):
+            _write(path, rng, n)
+            t0 = time.perf_counter()
+            model.refresh()
+            cached.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            fresh = {t: viewmodel._ROWS[t](db_path=path) for t in viewmodel.TABLES}
+            full.append(time.perf_counter() - t0)
+        print(f"after one write: refresh {statistics.median(cached) * 1e3:.1f} ms, "
+              f"re-reading every table {statistics.median(full) * 1e3:.1f} ms "
+              f"({statistics.median(full) / statistics.median(cached):.0f}x); {model.stats}")
+        problems = [f"{t}: cached rows differ" for t in viewmodel.TABLES if model.rows(t) != fresh[t]]
+    for p in problems:
+        print("  problem:", p)
+    print("OK" if not problems else "FAILED")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
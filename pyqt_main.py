@@ -1,43 +1,59 @@
-import sys, csv, os
+import bisect, sys, os, threading, time
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QFormLayout, QLineEdit,
     QPushButton, QTabWidget, QComboBox, QMessageBox, QLabel, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QDialog, QDialogButtonBox
+    QTableWidget, QTableWidgetItem, QHeaderView, QDialog, QDialogButtonBox,
+    QListWidget, QListWidgetItem, QAbstractItemView, QCheckBox
 )
 from PyQt5.QtGui import QIntValidator, QRegularExpressionValidator
-from PyQt5.QtCore import Qt, QRegularExpression, pyqtSignal
+from PyQt5.QtCore import Qt, QRegularExpression, QTimer, pyqtSignal
 
 import db as DB
+import dedupe
+import maintenance
+import notify
+import records
+import stats
+import timetable
+import validation as V
+import viewmodel
 
 DB_PATH = DB.DEFAULT_DB
-DB.init_db(DB_PATH)
+_IMPORTED_AT = time.time()
 
-EMAIL_RX = QRegularExpression(r"^[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}$")
-ID_RX    = QRegularExpression(r"^[A-Za-z0-9_\-]+$")
+# input masks for the line edits; the checks themselves live in validation.py
+EMAIL_RX = QRegularExpression(f"^{V.EMAIL_PATTERN}$")
+ID_RX    = QRegularExpression(f"^{V.ID_PATTERN}$")
 
 def info(parent, title, text): QMessageBox.information(parent, title, text)
 def error(parent, title, text): QMessageBox.critical(parent, title, text)
+def confirm(parent, title, text): return QMessageBox.question(parent, title, text) == QMessageBox.Yes
 
-def require_nonempty(parent, field, text):
-    if not text.strip():
-        error(parent, "Invalid Input", f"{field} cannot be empty.")
-        return False
-    return True
+def describe_counts(counts):
+    """``{"students": 3, "registrations": 7}`` -> "Deleted 3 students; 7 registrations removed." """
+    (table, n), *cascade = counts.items()
+    parts = [f"{v} {k.replace('_unassigned', '')} unassigned" if k.endswith("_unassigned") else f"{v} {k} removed"
+             for k, v in cascade]
+    return f"Deleted {n} {table}" + (f"; {', '.join(parts)}" if parts else "") + "."
 
-def require_regex(parent, field, text, rx, msg=None):
-    if not rx.match(text).hasMatch():
-        error(parent, "Invalid Input", msg or f"{field} is not valid.")
-        return False
-    return True
+CANCELLED = object()
 
-def require_int_in_range(parent, field, text, lo, hi):
+def allowing_conflicts(parent, call):
+    """``call(allow_conflicts=False)``; on a schedule clash ask, then retry allowing it (or return CANCELLED)."""
     try:
-        v = int(text)
-    except Exception:
-        error(parent, "Invalid Input", f"{field} must be an integer."); return None
-    if v < lo or v > hi:
-        error(parent, "Invalid Input", f"{field} must be between {lo} and {hi}."); return None
-    return v
+        return call(allow_conflicts=False)
+    except DB.ScheduleConflict as e:
+        if not confirm(parent, "Schedule Conflict", f"{e}.\n\nSave anyway?"):
+            return CANCELLED
+        return call(allow_conflicts=True)
+
+def require_valid(parent, check, **fields):
+    """``check(fields)`` from :mod:`validation`, or None after showing its message."""
+    try:
+        return check(fields)
+    except V.ValidationError as e:
+        error(parent, "Invalid Input", f"{e}.")
+        return None
 
 class StudentForm(QWidget):
     dataChanged = pyqtSignal()
@@ -61,15 +77,11 @@ class StudentForm(QWidget):
         v.addWidget(title); v.addLayout(form); v.addWidget(add_btn, alignment=Qt.AlignLeft)
 
     def on_add(self):
-        name = self.name_e.text().strip()
-        age  = require_int_in_range(self, "Age", self.age_e.text().strip(), 0, 150)
-        email = self.email_e.text().strip()
-        sid   = self.sid_e.text().strip()
-        if not (require_nonempty(self, "Name", name) and age is not None and
-                require_regex(self, "Email", email, EMAIL_RX, "Please enter a valid email.") and
-                require_nonempty(self, "Student ID", sid) and
-                require_regex(self, "Student ID", sid, ID_RX, "Use letters, digits, _ or -.")):
+        rec = require_valid(self, V.student, name=self.name_e.text(), age=self.age_e.text(),
+                            email=self.email_e.text(), student_id=self.sid_e.text())
+        if rec is None:
             return
+        sid, name, age, email = rec
         try:
             DB.add_student(sid, name, age, email, DB_PATH)
             info(self, "Success", f"Student '{name}' added.")
@@ -100,15 +112,11 @@ class InstructorForm(QWidget):
         v.addWidget(title); v.addLayout(form); v.addWidget(add_btn, alignment=Qt.AlignLeft)
 
     def on_add(self):
-        name = self.name_e.text().strip()
-        age  = require_int_in_range(self, "Age", self.age_e.text().strip(), 0, 150)
-        email = self.email_e.text().strip()
-        iid   = self.iid_e.text().strip()
-        if not (require_nonempty(self, "Name", name) and age is not None and
-                require_regex(self, "Email", email, EMAIL_RX, "Please enter a valid email.") and
-                require_nonempty(self, "Instructor ID", iid) and
-                require_regex(self, "Instructor ID", iid, ID_RX, "Use letters, digits, _ or -.")):
+        rec = require_valid(self, V.instructor, name=self.name_e.text(), age=self.age_e.text(),
+                            email=self.email_e.text(), instructor_id=self.iid_e.text())
+        if rec is None:
             return
+        iid, name, age, email = rec
         try:
             DB.add_instructor(iid, name, age, email, DB_PATH)
             info(self, "Success", f"Instructor '{name}' added.")
@@ -125,41 +133,44 @@ class CourseForm(QWidget):
         self.cid_e = QLineEdit(); self.cid_e.setValidator(QRegularExpressionValidator(ID_RX, self))
         self.cname_e = QLineEdit()
         self.ins_combo = QComboBox(); self.ins_combo.setEditable(False)
-        self.refresh_instructors()
+        self.cap_e = QLineEdit(); self.cap_e.setValidator(QIntValidator(0, 100000, self))
+        self.cap_e.setPlaceholderText("unlimited")
+        self.slots_e = QLineEdit(); self.slots_e.setPlaceholderText("e.g. Mon 09:00-10:15, Wed 09:00-10:15")
         add_btn = QPushButton("Add Course"); add_btn.clicked.connect(self.on_add)
 
         form = QFormLayout()
         form.addRow("Course ID:", self.cid_e)
         form.addRow("Course Name:", self.cname_e)
         form.addRow("Instructor:", self.ins_combo)
+        form.addRow("Capacity:", self.cap_e)
+        form.addRow("Meets:", self.slots_e)
 
         v = QVBoxLayout(self)
         title = QLabel("Add Course"); title.setStyleSheet("font-size: 16px; font-weight: 600;")
         v.addWidget(title); v.addLayout(form); v.addWidget(add_btn, alignment=Qt.AlignLeft)
 
-    def refresh_instructors(self):
-        self.ins_combo.clear()
-        for ins in DB.list_instructors(DB_PATH):
-            self.ins_combo.addItem(f"{ins['instructor_id']} - {ins['name']}")
+    def refresh_instructors(self, rows, keys=None):
+        """Follow the view-model's Instructors rows (see :func:`sync_combo`)."""
+        sync_combo(self.ins_combo, rows, lambda r: f"{r[0]} - {r[1]}", keys)
 
     def selected_instructor_id(self) -> str:
         t = self.ins_combo.currentText()
         return t.split(" - ")[0].strip() if t else ""
 
     def on_add(self):
-        cid = self.cid_e.text().strip()
-        cname = self.cname_e.text().strip()
-        iid = self.selected_instructor_id()
-        if not (require_nonempty(self, "Course ID", cid) and
-                require_regex(self, "Course ID", cid, ID_RX, "Use letters, digits, _ or -.") and
-                require_nonempty(self, "Course Name", cname)):
+        rec = require_valid(self, V.course, course_id=self.cid_e.text(), course_name=self.cname_e.text(),
+                            instructor_id=self.selected_instructor_id(), capacity=self.cap_e.text())
+        if rec is None:
             return
+        cid, cname, iid, cap = rec
         if not iid:
             return error(self, "Invalid Input", "Please select an instructor.")
         try:
-            DB.add_course(cid, cname, iid, DB_PATH)
+            if allowing_conflicts(self, lambda **kw: DB.add_course(cid, cname, iid, DB_PATH, capacity=cap,
+                                                                   slots=self.slots_e.text(), **kw)) is CANCELLED:
+                return
             info(self, "Success", f"Course '{cname}' added.")
-            self.cid_e.clear(); self.cname_e.clear()
+            self.cid_e.clear(); self.cname_e.clear(); self.cap_e.clear(); self.slots_e.clear()
             self.dataChanged.emit()
         except Exception as e:
             error(self, "Error", f"Failed to add course:\n{e}")
@@ -171,7 +182,6 @@ class RegistrationForm(QWidget):
         super().__init__(parent)
         self.student_combo = QComboBox(); self.student_combo.setEditable(False)
         self.course_combo  = QComboBox(); self.course_combo.setEditable(False)
-        self.refresh_students(); self.refresh_courses()
         btn = QPushButton("Register"); btn.clicked.connect(self.on_register)
 
         form = QFormLayout()
@@ -182,15 +192,11 @@ class RegistrationForm(QWidget):
         title = QLabel("Register Student in Course"); title.setStyleSheet("font-size: 16px; font-weight: 600;")
         v.addWidget(title); v.addLayout(form); v.addWidget(btn, alignment=Qt.AlignLeft)
 
-    def refresh_students(self):
-        self.student_combo.clear()
-        for s in DB.list_students(DB_PATH):
-            self.student_combo.addItem(f"{s['student_id']} - {s['name']}")
+    def refresh_students(self, rows, keys=None):
+        sync_combo(self.student_combo, rows, lambda r: f"{r[0]} - {r[1]}", keys)
 
-    def refresh_courses(self):
-        self.course_combo.clear()
-        for c in DB.list_courses(DB_PATH):
-            self.course_combo.addItem(f"{c['course_id']} - {c['course_name']}")
+    def refresh_courses(self, rows, keys=None):
+        sync_combo(self.course_combo, rows, lambda r: f"{r[0]} - {r[1]}", keys)
 
     def _ids(self):
         parse = lambda t: t.split(" - ")[0].strip() if t else ""
@@ -201,54 +207,105 @@ class RegistrationForm(QWidget):
         if not sid or not cid:
             return error(self, "Invalid Input", "Select both a student and a course.")
         try:
-            DB.register_student(sid, cid, DB_PATH)
-            info(self, "Success", "Registration saved.")
+            status = allowing_conflicts(self, lambda **kw: DB.register_student(sid, cid, DB_PATH, **kw))
+            if status is CANCELLED:
+                return
+            if status == DB.WAITLISTED:
+                place = next(w["position"] for w in DB.list_waitlist(cid, DB_PATH) if w["student_id"] == sid)
+                info(self, "Waitlisted", f"The course is full; the student is number {place} on its waitlist.")
+            else:
+                info(self, "Success", "Registration saved.")
             self.dataChanged.emit()
         except Exception as e:
             error(self, "Error", f"Registration failed:\n{e}")
 
 class AssignmentForm(QWidget):
     dataChanged = pyqtSignal()
+    coursesAssigned = pyqtSignal(list, list)  # course IDs changed, instructor IDs affected
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.ins_combo = QComboBox(); self.ins_combo.setEditable(False)
-        self.course_combo = QComboBox(); self.course_combo.setEditable(False)
-        self.refresh_instructors(); self.refresh_courses()
-        btn = QPushButton("Assign"); btn.clicked.connect(self.on_assign)
+        self.course_list = QListWidget(); self.course_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self._keys = []  # course IDs of the list items, sorted
+        btn = QPushButton("Assign to Selected Courses"); btn.clicked.connect(self.on_assign)
 
         form = QFormLayout()
         form.addRow("Instructor:", self.ins_combo)
-        form.addRow("Course:", self.course_combo)
+        form.addRow("Courses:", self.course_list)
+
+        self.from_combo = QComboBox(); self.to_combo = QComboBox()
+        move_btn = QPushButton("Reassign All Courses"); move_btn.clicked.connect(self.on_reassign)
+        move = QFormLayout()
+        move.addRow("From:", self.from_combo)
+        move.addRow("To:", self.to_combo)
 
         v = QVBoxLayout(self)
-        title = QLabel("Assign Instructor to Course"); title.setStyleSheet("font-size: 16px; font-weight: 600;")
+        title = QLabel("Assign Instructor to Courses"); title.setStyleSheet("font-size: 16px; font-weight: 600;")
         v.addWidget(title); v.addLayout(form); v.addWidget(btn, alignment=Qt.AlignLeft)
-
-    def refresh_instructors(self):
-        self.ins_combo.clear()
-        for ins in DB.list_instructors(DB_PATH):
-            self.ins_combo.addItem(f"{ins['instructor_id']} - {ins['name']}")
-
-    def refresh_courses(self):
-        self.course_combo.clear()
-        for c in DB.list_courses(DB_PATH):
-            self.course_combo.addItem(f"{c['course_id']} - {c['course_name']}")
-
-    def _ids(self):
-        parse = lambda t: t.split(" - ")[0].strip() if t else ""
-        return parse(self.ins_combo.currentText()), parse(self.course_combo.currentText())
+        title = QLabel("Reassign an Instructor's Courses"); title.setStyleSheet("font-size: 16px; font-weight: 600;")
+        v.addWidget(title); v.addLayout(move); v.addWidget(move_btn, alignment=Qt.AlignLeft)
+
+    def refresh_instructors(self, rows, keys=None):
+        if self.to_combo.count() == 0:
+            self.to_combo.addItem("(unassigned)")
+        for combo, fixed in ((self.ins_combo, 0), (self.from_combo, 0), (self.to_combo, 1)):
+            sync_combo(combo, rows, lambda r: f"{r[0]} - {r[1]}", keys, fixed)
+
+    def refresh_courses(self, rows, keys=None):
+        """Follow the view-model's Courses rows; with ``keys``, only those items change and selection is kept."""
+        if keys is None:
+            self.course_list.clear(); self._keys = []
+            keys = [records.key_of(r) for r in rows]
+        for i, row, there in records.locate(self._keys, rows, keys):
+            if row is None:
+                self.course_list.takeItem(i)
+            elif there:
+                self.course_list.item(i).setText(self._course_text(row))
+            else:
+                item = QListWidgetItem(self._course_text(row)); item.setData(Qt.UserRole, row[0])
+                self.course_list.insertItem(i, item)
+
+    @staticmethod
+    def _course_text(row):
+        return f"{row[0]} - {row[1]}  ({row[2]})"
+
+    @staticmethod
+    def _parse(text):
+        return text.split(" - ")[0].strip() if text and " - " in text else ""
 
     def on_assign(self):
-        iid, cid = self._ids()
-        if not iid or not cid:
-            return error(self, "Invalid Input", "Select both an instructor and a course.")
+        iid = self._parse(self.ins_combo.currentText())
+        cids = [i.data(Qt.UserRole) for i in self.course_list.selectedItems()]
+        if not iid or not cids:
+            return error(self, "Invalid Input", "Select an instructor and at least one course.")
         try:
-            DB.update_course(cid, instructor_id=iid, db_path=DB_PATH)
-            info(self, "Success", "Instructor assigned to course.")
-            self.dataChanged.emit()
+            before = {c["course_id"]: c["instructor_id"] for c in DB.courses_by_id(cids, DB_PATH)}
+            changed = allowing_conflicts(self, lambda **kw: DB.assign_instructor_bulk(cids, iid, DB_PATH, **kw))
+        except Exception as e:
+            return error(self, "Error", f"Assignment failed:\n{e}")
+        if changed is CANCELLED:
+            return
+        self._assigned(changed, {iid} | {before[c] for c in changed})
+        info(self, "Success", f"Instructor assigned to {len(changed)} course(s).")
+
+    def on_reassign(self):
+        src, dst = self._parse(self.from_combo.currentText()), self._parse(self.to_combo.currentText()) or None
+        if not src:
+            return error(self, "Invalid Input", "Select the instructor whose courses should move.")
+        try:
+            changed = allowing_conflicts(self, lambda **kw: DB.reassign_courses(src, dst, DB_PATH, **kw))
         except Exception as e:
-            error(self, "Error", f"Assignment failed:\n{e}")
+            return error(self, "Error", f"Reassignment failed:\n{e}")
+        if changed is CANCELLED:
+            return
+        self._assigned(changed, {src, dst})
+        info(self, "Success", f"{len(changed)} course(s) reassigned.")
+
+    def _assigned(self, course_ids, instructor_ids):
+        if course_ids:
+            self.coursesAssigned.emit(course_ids, sorted(i for i in instructor_ids if i))
+
 class StudentEditDialog(QDialog):
     def __init__(self, row: dict, parent=None):
         super().__init__(parent)
@@ -272,7 +329,7 @@ class StudentEditDialog(QDialog):
 
     def apply(self):
         name = self.name_e.text().strip()
-        age = int(self.age_e.text().strip())
+        age = self.age_e.text()  # db.update_* validates every field
         email = self.email_e.text().strip()
         new_id = self.sid_e.text().strip()
         DB.update_student(self.orig_id, new_id=new_id, name=name, age=age, email=email, db_path=DB_PATH)
@@ -300,7 +357,7 @@ class InstructorEditDialog(QDialog):
 
     def apply(self):
         name = self.name_e.text().strip()
-        age = int(self.age_e.text().strip())
+        age = self.age_e.text()  # db.update_* validates every field
         email = self.email_e.text().strip()
         new_id = self.iid_e.text().strip()
         DB.update_instructor(self.orig_id, new_id=new_id, name=name, age=age, email=email, db_path=DB_PATH)
@@ -319,11 +376,18 @@ class CourseEditDialog(QDialog):
             for i in range(self.ins_combo.count()):
                 if self.ins_combo.itemText(i).startswith(row["instructor_id"] + " - "):
                     self.ins_combo.setCurrentIndex(i); break
+        self.orig_cap = "" if row.get("capacity") is None else str(row["capacity"])
+        self.cap_e = QLineEdit(self.orig_cap); self.cap_e.setValidator(QIntValidator(0, 100000, self))
+        self.cap_e.setPlaceholderText("unlimited")
+        self.orig_slots = ", ".join(s["text"] for s in DB.list_course_slots(self.orig_id, DB_PATH))
+        self.slots_e = QLineEdit(self.orig_slots)
 
         form = QFormLayout()
         form.addRow("Course ID:", self.cid_e)
         form.addRow("Course Name:", self.cname_e)
         form.addRow("Instructor:", self.ins_combo)
+        form.addRow("Capacity:", self.cap_e)
+        form.addRow("Meets:", self.slots_e)
 
         btns = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel)
         btns.accepted.connect(self.accept); btns.rejected.connect(self.reject)
@@ -335,24 +399,156 @@ class CourseEditDialog(QDialog):
         name   = self.cname_e.text().strip()
         text   = self.ins_combo.currentText()
         iid    = text.split(" - ")[0].strip() if text else None
-        DB.update_course(self.orig_id, new_id=new_id, course_name=name, instructor_id=iid, db_path=DB_PATH)
+        slots  = self.slots_e.text().strip()
+        cap    = self.cap_e.text().strip()
+
+        def save(**kw):
+            # one transaction: a refused conflict or capacity leaves the course, its times and seats unchanged
+            with DB.transaction(DB_PATH):
+                DB.update_course(self.orig_id, new_id=new_id, course_name=name, instructor_id=iid,
+                                 slots=slots if slots != self.orig_slots else None, db_path=DB_PATH, **kw)
+                if cap != self.orig_cap:
+                    DB.set_course_capacity(new_id or self.orig_id, cap, DB_PATH)
+        return allowing_conflicts(self, save)
+
+def make_table(headers):
+    t = QTableWidget(0, len(headers))
+    t.setHorizontalHeaderLabels(headers)
+    t.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    t.setEditTriggers(QTableWidget.NoEditTriggers)
+    t.setSelectionBehavior(QTableWidget.SelectRows)
+    t.setSelectionMode(QTableWidget.ExtendedSelection)  # Ctrl/Shift-click for bulk delete
+    t.verticalHeader().setVisible(False)
+    return t
+
+def _set_cells(table, r, old, values):
+    for c, (was, v) in enumerate(zip(old, values)):
+        if was != v:
+            table.setItem(r, c, QTableWidgetItem(str(v)))
+
+def fill_table(table, rows):
+    table.setRowCount(0); table.setRowCount(len(rows))
+    for r, values in enumerate(rows):
+        for c, v in enumerate(values):
+            table.setItem(r, c, QTableWidgetItem(str(v)))
+
+def sync_table(table, rows):
+    """Show ``rows`` (primary key first) by applying only what changed since the last call.
+
+    Untouched rows keep their items, so selection and scroll position survive.
+    """
+    shown = getattr(table, "_index", {})
+    delta = None if not shown else records.diff(shown, rows)
+    if delta is None:  # reordered, or nothing shown yet: one pass, not a row at a time
+        fill_table(table, rows)
+    else:
+        table.setUpdatesEnabled(False)
+        try:
+            gone = set(delta.removed)
+            for r in reversed([i for i, k in enumerate(shown) if k in gone]):
+                table.removeRow(r)
+            for r, values in delta.added:
+                table.insertRow(r)
+                for c, v in enumerate(values):
+                    table.setItem(r, c, QTableWidgetItem(str(v)))
+            for r, values in delta.changed:
+                _set_cells(table, r, shown[records.key_of(values)], values)
+        finally:
+            table.setUpdatesEnabled(True)
+    table._index = {records.key_of(v): v for v in rows}
+
+def sync_combo(combo, rows, text, keys=None, fixed=0):
+    """Show ``text(row)`` for ``rows`` (sorted by key) after the first ``fixed`` items of ``combo``.
+
+    With ``keys``, only those keys' items are inserted, renamed or removed. The
+    current choice is kept unless it was removed.
+    """
+    shown = getattr(combo, "_keys", None)
+    if keys is None or shown is None:
+        current, head = combo.currentText(), [combo.itemText(i) for i in range(fixed)]
+        combo.clear()
+        combo.addItems(head + [text(r) for r in rows])
+        combo._keys = [records.key_of(r) for r in rows]
+        combo.setCurrentIndex(max(combo.findText(current), 0))
+        return
+    for i, row, there in records.locate(shown, rows, keys):
+        if row is None:
+            combo.removeItem(fixed + i)
+        elif there:
+            combo.setItemText(fixed + i, text(row))
+        else:
+            combo.insertItem(fixed + i, text(row))
+
+def sync_ranked(table, rows, rank, keys=None):
+    """Show rows ordered by ``rank(row)`` (unique, e.g. ``(-count, key)``), touching only what changed.
+
+    Without ``keys``, ``rows`` is the whole result, applied like :func:`sync_table`.
+    With ``keys``, ``rows`` are the current rows of just those keys (a missing one
+    was deleted): each is taken out and put back at its rank, and the other rows
+    keep their items, selection and scroll position.
+    """
+    ranks = getattr(table, "_ranks", [])
+    if keys is None:
+        rows = sorted(rows, key=rank)
+        table._index = {r[-1]: table._index[r[-1]] for r in ranks}  # display order, for records.diff
+        sync_table(table, rows)
+        table._ranks = [(*rank(v), records.key_of(v)) for v in rows]
+        return
+    fresh = {records.key_of(r): r for r in rows}
+    index = table._index
+    table.setUpdatesEnabled(False)
+    try:
+        for key in keys:
+            old = index.pop(key, None)
+            if old is not None:
+                i = bisect.bisect_left(ranks, (*rank(old), key))
+                table.removeRow(i); del ranks[i]
+            new = fresh.get(key)
+            if new is not None:
+                r = (*rank(new), key)
+                i = bisect.bisect_left(ranks, r)
+                table.insertRow(i); ranks.insert(i, r); index[key] = new
+                for c, v in enumerate(new):
+                    table.setItem(i, c, QTableWidgetItem(str(v)))
+    finally:
+        table.setUpdatesEnabled(True)
+
 class RecordsTab(QWidget):
     dataChanged = pyqtSignal()
+    modelChanged = pyqtSignal(str, object, object)  # viewmodel listener calls, delivered on the GUI thread
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.model = viewmodel.RecordsModel(DB_PATH)
+        self.modelChanged.connect(self._model_changed)
+        self.model.subscribe(self.modelChanged.emit)
         self.scope_combo = QComboBox(); self.scope_combo.addItems(["All","Students","Instructors","Courses"])
         self.search_e = QLineEdit(); self.search_e.setPlaceholderText("Search by name, ID, or course…")
+        self.fuzzy_cb = QCheckBox("Fuzzy"); self.fuzzy_cb.setToolTip("Match names despite typos, best matches first")
         s_btn = QPushButton("Search"); c_btn = QPushButton("Clear")
         s_btn.clicked.connect(self.apply_search); c_btn.clicked.connect(self.clear_search)
         self.search_e.returnPressed.connect(self.apply_search)
         top = QHBoxLayout()
-        for w in (QLabel("Scope:"), self.scope_combo, self.search_e, s_btn, c_btn):
+        for w in (QLabel("Scope:"), self.scope_combo, self.search_e, self.fuzzy_cb, s_btn, c_btn):
             top.addWidget(w)
         top.addStretch()
-        self.stu = self._make_table(["Student ID","Name","Age","Email","Registered Courses"])
-        self.ins = self._make_table(["Instructor ID","Name","Age","Email","Assigned Courses"])
-        self.cou = self._make_table(["Course ID","Course Name","Instructor","Enrolled Students"])
+        # structured filters, applied in SQL (records.filters_for / DB.filter_records)
+        self.age_min, self.age_max, self.count_min, self.count_max = (QLineEdit() for _ in range(4))
+        for e, hint in ((self.age_min, "min"), (self.age_max, "max"), (self.count_min, "min"), (self.count_max, "max")):
+            e.setValidator(QIntValidator(0, 100000, e)); e.setPlaceholderText(hint); e.setMaximumWidth(60)
+            e.returnPressed.connect(self.apply_search)
+        self.domain_e = QLineEdit(); self.domain_e.setPlaceholderText("e.g. gmail.com"); self.domain_e.setMaximumWidth(160)
+        self.domain_e.returnPressed.connect(self.apply_search)
+        self.instructor_combo = QComboBox(); self.instructor_combo.addItems(["Any","Assigned","Unassigned"])
+        filt = QHBoxLayout()
+        for w in (QLabel("Age:"), self.age_min, QLabel("–"), self.age_max, QLabel("Email domain:"), self.domain_e,
+                  QLabel("Courses / enrolled:"), self.count_min, QLabel("–"), self.count_max,
+                  QLabel("Course instructor:"), self.instructor_combo):
+            filt.addWidget(w)
+        filt.addStretch()
+        self.stu = make_table(["Student ID","Name","Age","Email","Registered Courses"])
+        self.ins = make_table(["Instructor ID","Name","Age","Email","Assigned Courses"])
+        self.cou = make_table(["Course ID","Course Name","Instructor","Enrolled Students"])
         self.stu_edit, self.stu_del = QPushButton("Edit Selected"), QPushButton("Delete Selected")
         self.ins_edit, self.ins_del = QPushButton("Edit Selected"), QPushButton("Delete Selected")
         self.cou_edit, self.cou_del = QPushButton("Edit Selected"), QPushButton("Delete Selected")
@@ -361,87 +557,132 @@ class RecordsTab(QWidget):
         self.cou_edit.clicked.connect(self.edit_course); self.cou_del.clicked.connect(self.delete_course)
         layout = QVBoxLayout(self)
         title = QLabel("All Records"); title.setStyleSheet("font-size: 16px; font-weight: 600;")
-        layout.addWidget(title); layout.addLayout(top)
+        layout.addWidget(title); layout.addLayout(top); layout.addLayout(filt)
+
+        # per table: its widgets, the (q, filters) it shows and its page offset
+        self._views = {}
+        for name, label, table, buttons in (("students", "Students", self.stu, (self.stu_edit, self.stu_del)),
+                                            ("instructors", "Instructors", self.ins, (self.ins_edit, self.ins_del)),
+                                            ("courses", "Courses", self.cou, (self.cou_edit, self.cou_del))):
+            heading, prev_b, next_b = QLabel(label), QPushButton("◀ Prev"), QPushButton("Next ▶")
+            prev_b.clicked.connect(lambda _=False, n=name: self._page(n, -1))
+            next_b.clicked.connect(lambda _=False, n=name: self._page(n, +1))
+            layout.addWidget(heading); layout.addWidget(table)
+            b = QHBoxLayout()
+            for w in (*buttons, prev_b, next_b):
+                b.addWidget(w)
+            b.addStretch(); layout.addLayout(b)
+            prev_b.hide(); next_b.hide()
+            self._views[name] = dict(table=table, heading=heading, prev=prev_b, next=next_b, label=label,
+                                     shown=("", {}), offset=0)
+
+    def filters(self):
+        """The filter bar's values as ``DB.filter_records`` filters per table."""
+        has = {"Assigned": True, "Unassigned": False}.get(self.instructor_combo.currentText())
+        return records.filters_for((self.age_min.text(), self.age_max.text()), self.domain_e.text(),
+                                   (self.count_min.text(), self.count_max.text()), has)
 
-        layout.addWidget(QLabel("Students")); layout.addWidget(self.stu)
-        b = QHBoxLayout(); b.addWidget(self.stu_edit); b.addWidget(self.stu_del); b.addStretch(); layout.addLayout(b)
+    def refresh(self):
+        for name in self._views:
+            self._fill(name)
+
+    def _fill(self, name, q=None, filters=None):
+        """Reload one table; ``q``/``filters`` replace its current ones (back to the first page if they differ)."""
+        view = self._views[name]
+        table, heading, label = view["table"], view["heading"], view["label"]
+        shown, offset = view["shown"], view["offset"]
+        if q is not None:
+            if (q, filters) != shown:
+                offset = 0
+            shown = (q, filters)
+        q, filters = shown
+        fuzzy = self.fuzzy_cb.isChecked()
+        if not q and not filters:  # every row: from the shared view-model
+            showing_all = view["shown"] == ("", {})
+            view.update(shown=("", {}), offset=0)
+            self.model.refresh()  # _model_changed syncs the tables that show every row
+            if not showing_all:
+                sync_table(table, self.model.rows(name))
+            heading.setText(label); view["prev"].hide(); view["next"].hide()
+            return
+        if not filters:
+            sync_table(table, records.ROWS[name](q, DB_PATH, fuzzy=fuzzy))
+            heading.setText(label); view["prev"].hide(); view["next"].hide()
+            view.update(shown=shown, offset=0)
+            return
+        page = records.page(name, q, DB_PATH, fuzzy, filters, offset)
+        sync_table(table, page.rows); heading.setText(records.page_title(label, page))
+        view["prev"].setEnabled(page.offset > 0); view["next"].setEnabled(page.offset + len(page.rows) < page.total)
+        view["prev"].show(); view["next"].show()
+        view.update(shown=shown, offset=page.offset)
 
-        layout.addWidget(QLabel("Instructors")); layout.addWidget(self.ins)
-        b = QHBoxLayout(); b.addWidget(self.ins_edit); b.addWidget(self.ins_del); b.addStretch(); layout.addLayout(b)
+    def _page(self, name, step):
+        self._views[name]["offset"] += step * records.PAGE_ROWS
+        self._fill(name)
 
-        layout.addWidget(QLabel("Courses")); layout.addWidget(self.cou)
-        b = QHBoxLayout(); b.addWidget(self.cou_edit); b.addWidget(self.cou_del); b.addStretch(); layout.addLayout(b)
+    def _model_changed(self, name, rows, keys):
+        # the newest rows: a change queued from the watcher thread may arrive after a later one
+        view = self._views[name]
+        if view["shown"] == ("", {}):
+            sync_table(view["table"], self.model.cached(name))
+        else:  # a search or filters: rows may have started or stopped matching
+            self._fill(name)
 
-        self.refresh()
+    def _fill_students(self, q: str = "", filters=None):
+        self._fill("students", q, filters or {})
 
-    def _make_table(self, headers):
-        t = QTableWidget(0, len(headers))
-        t.setHorizontalHeaderLabels(headers)
-        t.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        t.setEditTriggers(QTableWidget.NoEditTriggers)
-        t.setSelectionBehavior(QTableWidget.SelectRows)
-        t.setSelectionMode(QTableWidget.SingleSelection)
-        t.verticalHeader().setVisible(False)
-        return t
+    def _fill_instructors(self, q: str = "", filters=None):
+        self._fill("instructors", q, filters or {})
 
-    def refresh(self):
-        self._fill_students(); self._fill_instructors(); self._fill_courses()
-
-    def _fill_students(self, q: str = ""):
-        from db import list_registrations_for_student
-        self.stu.setRowCount(0)
-        data = DB.search_students(q, DB_PATH) if q else DB.list_students(DB_PATH)
-        for row in data:
-            regs = list_registrations_for_student(row["student_id"], DB_PATH)
-            courses = ", ".join(r["course_name"] for r in regs) or "-"
-            r = self.stu.rowCount(); self.stu.insertRow(r)
-            self.stu.setItem(r,0,QTableWidgetItem(row["student_id"]))
-            self.stu.setItem(r,1,QTableWidgetItem(row["name"]))
-            self.stu.setItem(r,2,QTableWidgetItem(str(row["age"])))
-            self.stu.setItem(r,3,QTableWidgetItem(row["email"]))
-            self.stu.setItem(r,4,QTableWidgetItem(courses))
-
-    def _fill_instructors(self, q: str = ""):
-        self.ins.setRowCount(0)
-        data = DB.search_instructors(q, DB_PATH) if q else DB.list_instructors(DB_PATH)
-        all_courses = DB.list_courses(DB_PATH)
-        for row in data:
-            taught = [c for c in all_courses if c["instructor_id"] == row["instructor_id"]]
-            courses = ", ".join(c["course_name"] for c in taught) or "-"
-            r = self.ins.rowCount(); self.ins.insertRow(r)
-            self.ins.setItem(r,0,QTableWidgetItem(row["instructor_id"]))
-            self.ins.setItem(r,1,QTableWidgetItem(row["name"]))
-            self.ins.setItem(r,2,QTableWidgetItem(str(row["age"])))
-            self.ins.setItem(r,3,QTableWidgetItem(row["email"]))
-            self.ins.setItem(r,4,QTableWidgetItem(courses))
-
-    def _fill_courses(self, q: str = ""):
-        self.cou.setRowCount(0)
-        data = DB.search_courses(q, DB_PATH) if q else DB.list_courses(DB_PATH)
-        for row in data:
-            students = DB.list_registrations_for_course(row["course_id"], DB_PATH)
-            s_names = ", ".join(s["name"] for s in students) or "-"
-            r = self.cou.rowCount(); self.cou.insertRow(r)
-            self.cou.setItem(r,0,QTableWidgetItem(row["course_id"]))
-            self.cou.setItem(r,1,QTableWidgetItem(row["course_name"]))
-            self.cou.setItem(r,2,QTableWidgetItem(row["instructor_name"]))
-            self.cou.setItem(r,3,QTableWidgetItem(s_names))
+    def _fill_courses(self, q: str = "", filters=None):
+        self._fill("courses", q, filters or {})
 
     def apply_search(self):
         q = self.search_e.text().strip()
         scope = self.scope_combo.currentText()
-        self._fill_students(q if scope in ("All","Students") else "")
-        self._fill_instructors(q if scope in ("All","Instructors") else "")
-        self._fill_courses(q if scope in ("All","Courses") else "")
+        try:
+            filters = self.filters()
+            self._fill_students(*((q, filters["students"]) if scope in ("All","Students") else ()))
+            self._fill_instructors(*((q, filters["instructors"]) if scope in ("All","Instructors") else ()))
+            self._fill_courses(*((q, filters["courses"]) if scope in ("All","Courses") else ()))
+        except V.ValidationError as e:
+            error(self, "Error", str(e))
+        except Exception as e:  # also the retry after a failed initial load
+            error(self, "Error", f"Failed to load data:\n{e}")
 
     def clear_search(self):
-        self.search_e.clear(); self.scope_combo.setCurrentIndex(0); self.refresh()
+        self.search_e.clear(); self.scope_combo.setCurrentIndex(0)
+        for e in (self.age_min, self.age_max, self.domain_e, self.count_min, self.count_max):
+            e.clear()
+        self.instructor_combo.setCurrentIndex(0)
+        for name in self._views:
+            self._fill(name, "", {})
 
     def _selected_id(self, table, col=0):
         items = table.selectedItems()
         if not items: return ""
         return items[0].tableWidget().item(items[0].row(), col).text().strip()
 
+    def _selected_ids(self, table, col=0):
+        rows = sorted({i.row() for i in table.selectedItems()})
+        return [table.item(r, col).text().strip() for r in rows]
+
+    def _delete_selected(self, table, noun, delete):
+        ids = self._selected_ids(table)
+        if not ids: return error(self, "Error", f"Select one or more {noun}s to delete.")
+        if len(ids) > 1 and not confirm(self, "Delete", f"Delete {len(ids)} {noun}s?"): return
+        try: counts = delete(ids, DB_PATH)
+        except Exception as e: return error(self, "Error", f"Failed to delete: {e}")
+        self.dataChanged.emit()
+        info(self, "Deleted", describe_counts(counts))
+
+    def delete_where(self, table, predicate, text):
+        if not confirm(self, "Delete", f"Delete all {text}?"): return
+        try: counts = DB.delete_where(table, predicate, DB_PATH)
+        except Exception as e: return error(self, "Error", f"Failed to delete: {e}")
+        self.dataChanged.emit()
+        info(self, "Deleted", describe_counts(counts))
+
     def edit_student(self):
         sid = self._selected_id(self.stu, 0)
         if not sid: return error(self, "Error", "Select a student to edit.")
@@ -449,15 +690,11 @@ class RecordsTab(QWidget):
         if not row: return error(self, "Error", "Student not found.")
         dlg = StudentEditDialog(row, self)
         if dlg.exec_() == QDialog.Accepted:
-            try: dlg.apply(); self.apply_search(); self.dataChanged.emit(); info(self,"Saved","Student updated.")
+            try: dlg.apply(); self.dataChanged.emit(); info(self,"Saved","Student updated.")
             except Exception as e: error(self,"Error",f"Failed to save: {e}")
 
     def delete_student(self):
-        sid = self._selected_id(self.stu, 0)
-        if not sid: return error(self, "Error", "Select a student to delete.")
-        DB.delete_student(sid, DB_PATH)
-        self.apply_search(); self.dataChanged.emit()
-        info(self, "Deleted", f"Student '{sid}' deleted.")
+        self._delete_selected(self.stu, "student", DB.delete_students)
 
     def edit_instructor(self):
         iid = self._selected_id(self.ins, 0)
@@ -466,15 +703,11 @@ class RecordsTab(QWidget):
         if not row: return error(self, "Error", "Instructor not found.")
         dlg = InstructorEditDialog(row, self)
         if dlg.exec_() == QDialog.Accepted:
-            try: dlg.apply(); self.apply_search(); self.dataChanged.emit(); info(self,"Saved","Instructor updated.")
+            try: dlg.apply(); self.dataChanged.emit(); info(self,"Saved","Instructor updated.")
             except Exception as e: error(self,"Error",f"Failed to save: {e}")
 
     def delete_instructor(self):
-        iid = self._selected_id(self.ins, 0)
-        if not iid: return error(self, "Error", "Select an instructor to delete.")
-        DB.delete_instructor(iid, DB_PATH)
-        self.apply_search(); self.dataChanged.emit()
-        info(self, "Deleted", f"Instructor '{iid}' deleted.")
+        self._delete_selected(self.ins, "instructor", DB.delete_instructors)
 
     def edit_course(self):
         cid = self._selected_id(self.cou, 0)
@@ -486,19 +719,123 @@ class RecordsTab(QWidget):
             row["instructor_name"] = ins["name"] if ins else "-"
         dlg = CourseEditDialog(row, self)
         if dlg.exec_() == QDialog.Accepted:
-            try: dlg.apply(); self.apply_search(); self.dataChanged.emit(); info(self,"Saved","Course updated.")
+            try:
+                if dlg.apply() is CANCELLED: return
+                self.dataChanged.emit(); info(self,"Saved","Course updated.")
             except Exception as e: error(self,"Error",f"Failed to save: {e}")
 
     def delete_course(self):
-        cid = self._selected_id(self.cou, 0)
-        if not cid: return error(self, "Error", "Select a course to delete.")
-        DB.delete_course(cid, DB_PATH)
-        self.apply_search(); self.dataChanged.emit()
-        info(self, "Deleted", f"Course '{cid}' deleted.")
+        self._delete_selected(self.cou, "course", DB.delete_courses)
+
+class DedupeDialog(QDialog):
+    """Find duplicate students or instructors (:mod:`dedupe`) and merge the checked clusters."""
+    merged = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Find Duplicates"); self.resize(720, 420)
+        self.kind_combo = QComboBox(); self.kind_combo.addItems(["Students","Instructors"])
+        self.email_cb = QCheckBox("Same email"); self.email_cb.setChecked(True)
+        self.name_cb = QCheckBox("Similar name and age"); self.name_cb.setChecked(True)
+        find_btn = QPushButton("Find"); find_btn.clicked.connect(self.find)
+        top = QHBoxLayout()
+        for w in (self.kind_combo, self.email_cb, self.name_cb, find_btn):
+            top.addWidget(w)
+        top.addStretch()
+        self.list = QListWidget()
+        self.summary = QLabel("")
+        merge_btn = QPushButton("Merge Checked"); merge_btn.clicked.connect(self.merge_checked)
+        close_btn = QPushButton("Close"); close_btn.clicked.connect(self.accept)
+        b = QHBoxLayout(); b.addWidget(self.summary); b.addStretch(); b.addWidget(merge_btn); b.addWidget(close_btn)
+        v = QVBoxLayout(self); v.addLayout(top)
+        v.addWidget(QLabel("The first record of each cluster is kept; name-only matches start unchecked."))
+        v.addWidget(self.list); v.addLayout(b)
+        self._clusters = []
+
+    def _kind(self):
+        return self.kind_combo.currentText().lower()
+
+    def find(self):
+        by = [k for k, cb in (("email", self.email_cb), ("name", self.name_cb)) if cb.isChecked()]
+        self.list.clear()
+        self._clusters = dedupe.find_duplicates(self._kind(), DB_PATH, by=by) if by else []
+        for c in self._clusters:
+            item = QListWidgetItem(dedupe.describe(c))
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if "email" in c.reasons else Qt.Unchecked)
+            self.list.addItem(item)
+        self.summary.setText(f"{len(self._clusters)} cluster(s), "
+                             f"{sum(len(c.merge) for c in self._clusters)} duplicate(s)")
+
+    def merge_checked(self):
+        chosen = [c for i, c in enumerate(self._clusters) if self.list.item(i).checkState() == Qt.Checked]
+        if not chosen:
+            return error(self, "Error", "Check the clusters to merge.")
+        n = sum(len(c.merge) for c in chosen)
+        if not confirm(self, "Confirm Merge", f"Merge {n} duplicate {self._kind()} into {len(chosen)} record(s)?"):
+            return
+        try:
+            counts = dedupe.merge_clusters(self._kind(), chosen, DB_PATH)
+        except Exception as e:
+            return error(self, "Error", f"Merge failed: {e}")
+        (table, merged), *moved = counts.items()
+        details = ", ".join(f"{v} {k.replace('_', ' ')}" for k, v in moved)
+        info(self, "Merged", f"Merged {merged} {table}; {details}.")
+        self.merged.emit()
+        self.find()
+
+class StatisticsTab(QWidget):
+    """Read-only counts served from the trigger-maintained summary tables in :mod:`stats`."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.enroll = make_table(["Course ID","Course Name","Instructor","Enrolled"])
+        self.stu_load = make_table(["Student ID","Name","Courses"])
+        self.ins_load = make_table(["Instructor ID","Name","Courses Taught"])
+        layout = QVBoxLayout(self)
+        title = QLabel("Statistics"); title.setStyleSheet("font-size: 16px; font-weight: 600;")
+        layout.addWidget(title)
+        layout.addWidget(QLabel("Course Enrollment")); layout.addWidget(self.enroll)
+        b = QHBoxLayout()
+        for label, table in (("Courses per Student", self.stu_load), ("Instructor Load", self.ins_load)):
+            col = QVBoxLayout(); col.addWidget(QLabel(label)); col.addWidget(table); b.addLayout(col)
+        layout.addLayout(b)
+
+        # Records table name -> (stats table, rows for keys (None = all), display order: busiest first)
+        self._tables = {
+            "courses": (self.enroll, lambda keys: [(r["course_id"], r["course_name"], r["instructor_name"], r["enrolled"])
+                                                   for r in stats.course_enrollment(DB_PATH, keys)],
+                        lambda r: (-r[3], r[0])),
+            "students": (self.stu_load, lambda keys: [(r["student_id"], r["name"], r["courses"])
+                                                      for r in stats.student_course_counts(DB_PATH, keys)],
+                         lambda r: (-r[2], r[0])),
+            "instructors": (self.ins_load, lambda keys: [(r["instructor_id"], r["name"], r["courses"])
+                                                         for r in stats.instructor_load(DB_PATH, keys)],
+                            lambda r: (-r[2], r[0])),
+        }
+
+    def read(self, name=None, keys=None):
+        """``{name: rows}`` of one table or all, for :meth:`refresh`; safe on a worker thread."""
+        keys = None if keys is None else list(keys)
+        return {n: self._tables[n][1](keys) for n in ([name] if name else self._tables)}
+
+    def refresh(self, name=None, keys=None, rows=None):
+        """Re-read one table (``name``) or all, or show ``rows`` from :meth:`read`; with ``keys``, only those rows (see :func:`sync_ranked`)."""
+        for n, found in (rows if rows is not None else self.read(name, keys)).items():
+            table, _, rank = self._tables[n]
+            sync_ranked(table, found, rank, keys)
 
 class MainWindow(QMainWindow):
+    dataLoaded = pyqtSignal()
+    workDone = pyqtSignal(object, object)  # (callback, result) from in_worker, delivered queued
+    externalChange = pyqtSignal()  # emitted on the watcher thread, delivered queued
+    maintenanceReported = pyqtSignal(object)  # emitted on the maintenance thread, delivered queued
+
     def __init__(self):
+        DB.init_db(DB_PATH)  # a single PRAGMA when the schema is already current
         super().__init__()
+        self.loaded = False
+        self.load_error = None  # set by _load_failed
         self.setWindowTitle("School Management System")
         self.resize(1100, 740)
 
@@ -509,27 +846,109 @@ class MainWindow(QMainWindow):
         self.registration_tab = RegistrationForm(self)
         self.assignment_tab = AssignmentForm(self)
         self.records_tab = RecordsTab(self)
+        self.stats_tab = StatisticsTab(self)
 
         for name, tab in [("Students", self.student_tab), ("Instructors", self.instructor_tab),
                           ("Courses", self.course_tab), ("Registration", self.registration_tab),
-                          ("Assignment", self.assignment_tab), ("Records", self.records_tab)]:
+                          ("Assignment", self.assignment_tab), ("Records", self.records_tab),
+                          ("Statistics", self.stats_tab)]:
             tabs.addTab(tab, name)
 
         for tab in (self.student_tab, self.instructor_tab, self.course_tab,
                     self.registration_tab, self.assignment_tab, self.records_tab):
             tab.dataChanged.connect(self.notify_data_changed)
+        self.assignment_tab.coursesAssigned.connect(self.notify_courses_assigned)
+        self.maintenance = maintenance.Scheduler(DB_PATH, on_report=self.maintenanceReported.emit)
+        self.maintenanceReported.connect(self._maintenance_done)
+        # Records tables, combos and statistics follow the view-model, touching only the keys it re-read
+        self.records_tab.modelChanged.connect(self._model_changed)
+        # other processes' commits: the watcher thread refreshes the view-model (its changes reach
+        # _model_changed queued), then the GUI thread goes through notify_data_changed
+        self.watcher = notify.Watcher(DB_PATH, on_change=self._external_change)
+        self.externalChange.connect(self.notify_data_changed)
+        self.workDone.connect(self._work_done)
 
         central = QWidget(); v = QVBoxLayout(central); v.addWidget(tabs); self.setCentralWidget(central)
         self._build_menus()
-        self.statusBar().showMessage("Ready")
+        self.statusBar().showMessage("Loading…")
+        # Tables and combos are filled after the first paint, not in the constructors.
+        QTimer.singleShot(0, self.initial_load)
+
+    def in_worker(self, fetch, done, failed=None):
+        """Run ``fetch()`` on a worker thread, then ``done(result)`` on the GUI thread.
+
+        If ``fetch`` raises, ``failed(exc)`` runs instead (by default an error box).
+        """
+        def work():
+            try:
+                result = fetch()
+            except Exception as e:
+                return self.workDone.emit(failed or self._work_failed, e)
+            self.workDone.emit(done, result)
+        threading.Thread(target=work, daemon=True).start()
+
+    def _work_done(self, done, result):
+        done(result)
+
+    def _work_failed(self, exc):
+        error(self, "Error", f"Failed to load data:\n{exc}")
+
+    def initial_load(self):
+        self.first_paint_at = time.time()  # runs on the first event-loop pass after show()
+        # The view-model is built and the statistics read on a worker thread. The model's
+        # changes (Records tables, combos) are queued before _loaded, so they are shown first.
+        model = self.records_tab.model
+        self.in_worker(lambda: (model.refresh(), self.stats_tab.read())[1],
+                       self._loaded, self._load_failed)
+
+    def _loaded(self, stats_rows):
+        self.stats_tab.refresh(rows=stats_rows)
+        self._started("Ready")
+
+    def _load_failed(self, exc):
+        # Carry on without the data: the watcher refreshes everything on the next commit,
+        # and Refresh Records retries by hand. Profile mode still gets its dataLoaded.
+        self.load_error = exc
+        self._started("Loading failed; use Tools > Refresh Records to retry")
+        self._work_failed(exc)
+
+    def _started(self, status):
+        self.loaded = True
+        self.statusBar().showMessage(status)
+        self.dataLoaded.emit()
+        if maintenance.Scheduler.enabled():
+            self.maintenance.start()
+        if notify.Watcher.enabled():
+            self.watcher.start()
 
     def notify_data_changed(self):
-        self.course_tab.refresh_instructors()
-        self.registration_tab.refresh_students(); self.registration_tab.refresh_courses()
-        self.assignment_tab.refresh_instructors(); self.assignment_tab.refresh_courses()
-        self.records_tab.apply_search()
+        self.records_tab.model.refresh()  # reaches _model_changed for each table that changed
+        self.maintenance.touch()
         self.statusBar().showMessage("Data updated", 3000)
 
+    def _external_change(self):
+        self.records_tab.model.refresh()
+        self.externalChange.emit()
+
+    def _model_changed(self, name, rows, keys):
+        rows = self.records_tab.model.cached(name)  # the newest, as in RecordsTab._model_changed
+        if name == "students":
+            self.registration_tab.refresh_students(rows, keys)
+        elif name == "instructors":
+            self.course_tab.refresh_instructors(rows, keys); self.assignment_tab.refresh_instructors(rows, keys)
+        else:
+            self.registration_tab.refresh_courses(rows, keys); self.assignment_tab.refresh_courses(rows, keys)
+        if self.loaded:  # the first statistics come with _loaded
+            self.stats_tab.refresh(name, keys)
+        if self.load_error is not None:  # a retry (or the watcher) has loaded the data after all
+            self.load_error = None
+            self.statusBar().showMessage("Ready")
+
+    def notify_courses_assigned(self, course_ids, instructor_ids):
+        self.records_tab.model.refresh()  # re-reads just these courses and instructors
+        self.maintenance.touch()
+        self.statusBar().showMessage(f"{len(course_ids)} course(s) reassigned", 3000)
+
     def _build_menus(self):
         mb = self.menuBar()
         file_m = mb.addMenu("&File")
@@ -548,8 +967,45 @@ class MainWindow(QMainWindow):
 
         tools_m = mb.addMenu("&Tools")
         tools_m.addAction("Refresh Records").triggered.connect(self.records_tab.apply_search)
+        tools_m.addAction("Check Timetable…").triggered.connect(self._check_timetable)
+        tools_m.addAction("Find Duplicates…").triggered.connect(self._find_duplicates)
+        tools_m.addAction("Run Maintenance Now").triggered.connect(self._run_maintenance)
+        clean_m = tools_m.addMenu("Clean Up")
+        for table, predicate, text in [("students", "unregistered", "students without registrations"),
+                                       ("courses", "empty", "courses without students"),
+                                       ("instructors", "unassigned", "instructors without courses")]:
+            clean_m.addAction(f"Delete {text}…").triggered.connect(
+                lambda _=False, a=(table, predicate, text): self.records_tab.delete_where(*a))
+
+    def _run_maintenance(self):
+        self.maintenance.start().run_soon()
+        self.statusBar().showMessage("Maintenance running…")
+
+    def _maintenance_done(self, report):
+        self.statusBar().showMessage(f"Maintenance: {report}", 10000)
+        if not report.ok:
+            error(self, "Maintenance", str(report))
+
+    def closeEvent(self, event):
+        self.maintenance.stop(timeout=5.0)  # let a running task finish its transaction
+        self.watcher.stop(timeout=1.0)
+        super().closeEvent(event)
+
+    def _find_duplicates(self):
+        dlg = DedupeDialog(self)
+        dlg.merged.connect(self.notify_data_changed)
+        dlg.find(); dlg.exec_()
+
+    def _check_timetable(self):
+        with DB.connect(DB_PATH) as con:
+            found = timetable.term_conflicts(con)
+        if not found:
+            return info(self, "Timetable", "No student or instructor is double-booked.")
+        lines = "\n".join(map(str, found[:30])) + (f"\n… and {len(found) - 30} more" if len(found) > 30 else "")
+        info(self, "Timetable", f"{len(found)} conflict(s):\n{lines}")
 
     def _backup_db(self):
+        from PyQt5.QtWidgets import QFileDialog
         path, _ = QFileDialog.getSaveFileName(self, "Backup Database", "", "SQLite DB (*.db);;All Files (*)")
         if not path: return
         try:
@@ -559,13 +1015,15 @@ class MainWindow(QMainWindow):
             error(self, "Backup Failed", str(e))
 
     def _export_csv(self, which="students"):
+        from PyQt5.QtWidgets import QFileDialog
         if which == "all":
             folder = QFileDialog.getExistingDirectory(self, "Export folder")
             if not folder: return
             try:
-                self._write_students_csv(os.path.join(folder, "students.csv"))
-                self._write_instructors_csv(os.path.join(folder, "instructors.csv"))
-                self._write_courses_csv(os.path.join(folder, "courses.csv"))
+                with DB.read_only(DB_PATH):  # one mmap'd read-only connection for all three files
+                    self._write_students_csv(os.path.join(folder, "students.csv"))
+                    self._write_instructors_csv(os.path.join(folder, "instructors.csv"))
+                    self._write_courses_csv(os.path.join(folder, "courses.csv"))
                 info(self, "Exported", f"Exported 3 CSV files to:\n{folder}")
             except Exception as e:
                 error(self, "Export Failed", str(e))
@@ -575,14 +1033,16 @@ class MainWindow(QMainWindow):
         path, _ = QFileDialog.getSaveFileName(self, title, "", "CSV Files (*.csv);;All Files (*)")
         if not path: return
         try:
-            if which == "students": self._write_students_csv(path)
-            elif which == "instructors": self._write_instructors_csv(path)
-            else: self._write_courses_csv(path)
+            with DB.read_only(DB_PATH):
+                if which == "students": self._write_students_csv(path)
+                elif which == "instructors": self._write_instructors_csv(path)
+                else: self._write_courses_csv(path)
             info(self, "Exported", f"Saved to:\n{path}")
         except Exception as e:
             error(self, "Export Failed", str(e))
 
     def _write_students_csv(self, path):
+        import csv
         with open(path, "w", newline="", encoding="utf-8") as f:
             import db as DBm
             w = csv.writer(f)
@@ -593,6 +1053,7 @@ class MainWindow(QMainWindow):
                 w.writerow([s["student_id"], s["name"], s["age"], s["email"], courses])
 
     def _write_instructors_csv(self, path):
+        import csv
         with open(path, "w", newline="", encoding="utf-8") as f:
             w = csv.writer(f)
             w.writerow(["instructor_id","name","age","email","assigned_courses"])
@@ -602,6 +1063,7 @@ class MainWindow(QMainWindow):
                 w.writerow([i["instructor_id"], i["name"], i["age"], i["email"], ", ".join(taught)])
 
     def _write_courses_csv(self, path):
+        import csv
         with open(path, "w", newline="", encoding="utf-8") as f:
             w = csv.writer(f)
             w.writerow(["course_id","course_name","instructor","enrolled_students"])
@@ -613,8 +1075,22 @@ class MainWindow(QMainWindow):
 def main():
     app = QApplication(sys.argv)
     win = MainWindow()
+    if "--profile-startup" in sys.argv:
+        _profile_startup(app, win)
     win.show()
     sys.exit(app.exec_())
 
+def _profile_startup(app, win):
+    """Print import/paint/data-loaded offsets (seconds) and quit once data is loaded."""
+    t0 = float(os.environ.get("SCHOOL_STARTUP_T0", _IMPORTED_AT))
+    marks = {"imported": round(_IMPORTED_AT - t0, 4)}
+    def report():
+        marks["shown"] = round(win.first_paint_at - t0, 4)
+        marks["loaded"] = round(time.time() - t0, 4)
+        if win.load_error is not None:
+            marks["error"] = str(win.load_error)
+        print(marks, flush=True); app.quit()
+    win.dataLoaded.connect(report)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
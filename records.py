@@ -0,0 +1,214 @@
+"""Rows for the Records tables, shared by both GUIs.
+
+The ``*_rows`` functions build the display tuples (primary key first) with one
+grouped query per related table, and are safe to call from a worker thread.
+:func:`diff` compares a new result with what a table already shows, so the GUIs
+only touch rows that were inserted, removed or modified, and :func:`patch` updates
+just the rows an operation is known to have touched; :func:`locate` places the
+rows of changed keys in a sorted list, such as a combo box's items. With ``fuzzy=True`` the
+search goes through :mod:`fuzzy` instead of ``LIKE``, and rows come best match first.
+
+``filters`` (see :func:`filters_for` and ``db.FILTERS``) are applied in SQL by
+``db.filter_records``, one page of ``limit`` rows from ``offset`` at a time;
+:func:`page` returns a page together with the size of the whole result.
+"""
+
+import bisect
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import db as DB
+import fuzzy as F
+import validation as V
+
+PAGE_ROWS = 500  # rows per page of a filtered result
+_KEYS = {"students": "student_id", "instructors": "instructor_id", "courses": "course_id"}
+
+
+def filters_for(age=(None, None), email_domain: str = "", count=(None, None),
+                has_instructor: Optional[bool] = None) -> Dict[str, Dict]:
+    """The Records filter bar as ``db.filter_records`` filters per table.
+
+    Age and email domain apply to students and instructors, ``count`` to the
+    courses a student takes or an instructor teaches and to a course's enrollment,
+    ``has_instructor`` to courses. Empty values are left out, so a table without
+    filters maps to an empty dict; bad bounds raise :class:`validation.ValidationError`.
+    """
+    def rng(r, field):
+        r = V.check_range(*r, field)
+        return None if r == (None, None) else r
+    domain = (email_domain or "").strip().lstrip("@").lower() or None
+    person = {"age": rng(age, "age"), "email_domain": domain, "courses": rng(count, "courses")}
+    out = {"students": person, "instructors": dict(person),
+           "courses": {"enrolled": rng(count, "enrolled"), "has_instructor": has_instructor}}
+    return {t: {k: v for k, v in f.items() if v is not None} for t, f in out.items()}
+
+
+def _filtered(table: str, q: str, db_path: str, fuzzy: bool, filters: Dict,
+              limit: Optional[int], offset: int, by_key: bool = False) -> List[Dict]:
+    if q and fuzzy:  # best match first: rank every name above the threshold, filter them in SQL, then page
+        ranked = [k for k, _ in F.matches(table, q, db_path, limit=None)]
+        kept = {r[_KEYS[table]]: r for r in DB.filter_records(table, db_path, keys=ranked, **filters)}
+        data = [kept[k] for k in ranked if k in kept]
+        return data[offset:None if limit is None else offset + limit]
+    return DB.filter_records(table, db_path, q=q, limit=limit, offset=offset, by_key=by_key, **filters)
+
+
+def count_rows(table: str, q: str = "", db_path: str = DB.DEFAULT_DB, fuzzy: bool = False,
+               filters: Optional[Dict] = None) -> int:
+    """Rows the ``*_rows`` function of ``table`` returns for ``q`` and ``filters`` without paging."""
+    if q and fuzzy:
+        return len(_filtered(table, q, db_path, fuzzy, filters or {}, None, 0))
+    return DB.count_records(table, db_path, q=q, **(filters or {}))
+
+
+def student_rows(q: str = "", db_path: str = DB.DEFAULT_DB, keys: Optional[Iterable[str]] = None,
+                 fuzzy: bool = False, filters: Optional[Dict] = None, limit: Optional[int] = None,
+                 offset: int = 0, by_key: bool = False) -> List[tuple]:
+    """Rows matching ``q``; with ``keys`` only those students, to refresh a few rows."""
+    if keys is not None:
+        keys = list(keys)
+        data, courses = DB.students_by_id(keys, db_path), DB.course_names_by_student(db_path, keys)
+    elif filters:
+        data = _filtered("students", q, db_path, fuzzy, filters, limit, offset, by_key)
+        courses = DB.course_names_by_student(db_path, [r["student_id"] for r in data])
+    elif q and fuzzy:
+        data = F.search_students(q, db_path)
+        courses = DB.course_names_by_student(db_path, [r["student_id"] for r in data])
+    else:
+        data = DB.search_students(q, db_path) if q else DB.list_students(db_path)
+        courses = DB.course_names_by_student(db_path)
+    return [(r["student_id"], r["name"], r["age"], r["email"], ", ".join(courses.get(r["student_id"], ())) or "-")
+            for r in data]
+
+
+def instructor_rows(q: str = "", db_path: str = DB.DEFAULT_DB, keys: Optional[Iterable[str]] = None,
+                    fuzzy: bool = False, filters: Optional[Dict] = None, limit: Optional[int] = None,
+                    offset: int = 0, by_key: bool = False) -> List[tuple]:
+    """Rows matching ``q``; with ``keys`` only those instructors, to refresh a few rows (see :func:`patch`)."""
+    if keys is not None:
+        keys = list(keys)
+        data, taught = DB.instructors_by_id(keys, db_path), DB.course_names_by_instructor(db_path, keys)
+    elif filters:
+        data = _filtered("instructors", q, db_path, fuzzy, filters, limit, offset, by_key)
+        taught = DB.course_names_by_instructor(db_path, [r["instructor_id"] for r in data])
+    elif q and fuzzy:
+        data = F.search_instructors(q, db_path)
+        taught = DB.course_names_by_instructor(db_path, [r["instructor_id"] for r in data])
+    else:
+        data = DB.search_instructors(q, db_path) if q else DB.list_instructors(db_path)
+        taught = DB.course_names_by_instructor(db_path)
+    return [(r["instructor_id"], r["name"], r["age"], r["email"], ", ".join(taught.get(r["instructor_id"], ())) or "-")
+            for r in data]
+
+
+def course_rows(q: str = "", db_path: str = DB.DEFAULT_DB, keys: Optional[Iterable[str]] = None,
+                fuzzy: bool = False, filters: Optional[Dict] = None, limit: Optional[int] = None,
+                offset: int = 0, by_key: bool = False) -> List[tuple]:
+    if keys is not None:
+        keys = list(keys)
+        data, names = DB.courses_by_id(keys, db_path), DB.student_names_by_course(db_path, keys)
+    elif filters:
+        data = _filtered("courses", q, db_path, fuzzy, filters, limit, offset, by_key)
+        names = DB.student_names_by_course(db_path, [r["course_id"] for r in data])
+    elif q and fuzzy:
+        data = F.search_courses(q, db_path)
+        names = DB.student_names_by_course(db_path, [r["course_id"] for r in data])
+    else:
+        data = DB.search_courses(q, db_path) if q else DB.list_courses(db_path)
+        names = DB.student_names_by_course(db_path)
+    return [(r["course_id"], r["course_name"], r["instructor_name"], ", ".join(names.get(r["course_id"], ())) or "-")
+            for r in data]
+
+
+class Page(NamedTuple):
+    rows: List[tuple]
+    total: int   # rows in the whole result
+    offset: int  # position of rows[0] in it
+
+
+ROWS = {"students": student_rows, "instructors": instructor_rows, "courses": course_rows}
+
+
+def page(table: str, q: str = "", db_path: str = DB.DEFAULT_DB, fuzzy: bool = False, filters: Optional[Dict] = None,
+         offset: int = 0, limit: int = PAGE_ROWS) -> Page:
+    """``limit`` filtered rows of ``table`` from ``offset``, which is clamped to the last page.
+
+    Broad filters are read in key order (see :func:`db.prefer_key_order`).
+    """
+    total = count_rows(table, q, db_path, fuzzy, filters)
+    offset = max(0, min(offset, (total - 1) // limit * limit))
+    by_key = DB.prefer_key_order(total, DB.count_records(table, db_path), limit)
+    return Page(ROWS[table](q, db_path, fuzzy=fuzzy, filters=filters, limit=limit, offset=offset, by_key=by_key),
+                total, offset)
+
+
+def page_title(label: str, p: Page) -> str:
+    """``"Students — 1–500 of 5354 matching"``."""
+    if not p.total:
+        return f"{label} — none matching"
+    return f"{label} — {p.offset + 1}–{p.offset + len(p.rows)} of {p.total} matching"
+
+
+class Delta(NamedTuple):
+    removed: List[str]                # keys no longer present
+    added: List[Tuple[int, tuple]]    # (position in the new result, row), ascending
+    changed: List[Tuple[int, tuple]]  # (position in the new result, row) whose values differ
+
+
+def key_of(row: tuple) -> str:
+    return str(row[0])
+
+
+def diff(shown: Dict[str, tuple], rows: List[tuple]) -> Optional[Delta]:
+    """Changes that turn ``shown`` (key -> row, in display order) into ``rows``.
+
+    Applying ``removed``, then inserting ``added`` in order at their positions,
+    yields ``rows`` as long as the rows kept keep their relative order, which holds
+    for results sorted by primary key. Returns None when they were reordered; the
+    caller should then rebuild the table.
+    """
+    keys = [key_of(r) for r in rows]
+    new = set(keys)
+    removed = [k for k in shown if k not in new]
+    if [k for k in shown if k in new] != [k for k in keys if k in shown]:
+        return None
+    added, changed = [], []
+    for pos, (k, row) in enumerate(zip(keys, rows)):
+        prev = shown.get(k)
+        if prev is None:
+            added.append((pos, row))
+        elif prev != row:
+            changed.append((pos, row))
+    return Delta(removed, added, changed)
+
+
+def patch(shown: Dict[str, tuple], rows: List[tuple]) -> List[Tuple[int, tuple]]:
+    """``(position, row)`` for each of ``rows`` that is shown with different values.
+
+    For refreshing only the records an operation touched; rows that are not shown
+    (e.g. filtered out by a search) are skipped.
+    """
+    positions = {k: i for i, k in enumerate(shown)}
+    return sorted((positions[k], r) for k, r in ((key_of(r), r) for r in rows)
+                  if k in positions and shown[k] != r)
+
+
+def locate(shown: List[str], rows: List[tuple], keys: Iterable[str]) -> Iterator[Tuple[int, Optional[tuple], bool]]:
+    """``(position, row, was_shown)`` for each of ``keys`` that is or was shown, in key order.
+
+    ``shown`` is the sorted key list of a widget's items and ``rows`` the current
+    rows, sorted by key (as ``viewmodel.RecordsModel`` keeps them); ``row`` is None
+    when the key is gone. ``shown`` is updated as each is yielded, so the caller
+    removes, replaces or inserts the item at ``position`` right away.
+    """
+    for k in sorted(keys):
+        j = bisect.bisect_left(rows, (k,))  # a row (k, ...) sorts right after (k,)
+        row = rows[j] if j < len(rows) and key_of(rows[j]) == k else None
+        i = bisect.bisect_left(shown, k)
+        there = i < len(shown) and shown[i] == k
+        if row is None and there:
+            del shown[i]
+        elif row is not None and not there:
+            shown.insert(i, k)
+        if row is not None or there:
+            yield i, row, there
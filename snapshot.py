@@ -0,0 +1,304 @@
+"""Compact binary snapshots of the school database.
+
+A snapshot holds the base tables (students, instructors, courses and their slots,
+registrations, waitlist)
+column by column: integers as packed little-endian ``array('q')`` values with a
+null map, text as a length array plus one UTF-8 blob. Each table block is
+optionally compressed (zlib or lzma) and carries a CRC32. Summary tables, the
+change log and the name index are not stored; the triggers rebuild them while loading.
+
+Layout::
+
+    b"SCHSNAP1" <codec:u8> <user_version:u32> <tables:u16>
+    per table:  <name> <rows:u32> <cols:u16> (<name> <type:1 byte>)*cols
+                <block length:u64> <crc32:u32> <block>
+    block:      per column <length:u64> <payload>        (after decompression)
+
+Names are ``<length:u16>`` + UTF-8. Usage::
+
+    python snapshot.py dump school.db school.snap --codec zlib
+    python snapshot.py load school.snap restored.db [--replace]
+    python snapshot.py verify school.snap [--db school.db]
+"""
+
+import argparse
+import lzma
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import db as DB
+
+MAGIC = b"SCHSNAP1"
+CODECS = {"none": 0, "zlib": 1, "lzma": 2}
+TABLES = ["instructors", "courses", "course_slots", "students", "registrations", "waitlist"]  # load order
+
+INT, REAL, TEXT, BLOB = b"i", b"f", b"t", b"b"
+_LITTLE = sys.byteorder == "little"
+
+
+class SnapshotError(ValueError):
+    """The file is not a snapshot, is corrupt, or does not fit the database."""
+
+
+def _compress(codec: int, data: bytes) -> bytes:
+    if codec == 1:
+        return zlib.compress(data, 6)
+    if codec == 2:
+        return lzma.compress(data, preset=1)
+    return data
+
+
+def _decompress(codec: int, data: bytes) -> bytes:
+    if codec == 1:
+        return zlib.decompress(data)
+    if codec == 2:
+        return lzma.decompress(data)
+    return data
+
+
+def _name(s: str) -> bytes:
+    b = s.encode()
+    return struct.pack("<H", len(b)) + b
+
+
+def _numbers(typecode: str, values) -> bytes:
+    arr = array(typecode, values)
+    if not _LITTLE:
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _unnumbers(typecode: str, data: bytes) -> array:
+    arr = array(typecode)
+    arr.frombytes(data)
+    if not _LITTLE:
+        arr.byteswap()
+    return arr
+
+
+# columns -----------------------------------------------------------------
+def _column_type(values) -> bytes:
+    kinds = {type(v) for v in values if v is not None}
+    if kinds <= {int}:
+        return INT
+    if kinds <= {int, float}:
+        return REAL
+    if kinds <= {str}:
+        return TEXT
+    if kinds <= {bytes}:
+        return BLOB
+    raise SnapshotError(f"mixed column types: {sorted(k.__name__ for k in kinds)}")
+
+
+def _encode_column(kind: bytes, values) -> bytes:
+    if kind in (INT, REAL):
+        nulls = bytes(v is None for v in values)
+        nums = _numbers("q" if kind == INT else "d", (0 if v is None else v for v in values))
+        return nulls + nums
+    raw = [b"" if v is None else (v.encode() if kind == TEXT else v) for v in values]
+    lengths = _numbers("q", (-1 if v is None else len(r) for v, r in zip(values, raw)))
+    return lengths + b"".join(raw)
+
+
+def _decode_column(kind: bytes, data: bytes, rows: int) -> list:
+    if kind in (INT, REAL):
+        nulls = data[:rows]
+        nums = _unnumbers("q" if kind == INT else "d", data[rows:])
+        if not any(nulls):
+            return nums.tolist()
+        return [None if n else v for n, v in zip(nulls, nums)]
+    lengths = _unnumbers("q", data[:8 * rows])
+    blob, pos, out = memoryview(data)[8 * rows:], 0, []
+    for n in lengths:
+        if n < 0:
+            out.append(None)
+            continue
+        chunk = blob[pos:pos + n]; pos += n
+        out.append(str(chunk, "utf-8") if kind == TEXT else bytes(chunk))
+    return out
+
+
+# tables ------------------------------------------------------------------
+def _table_columns(con, table: str) -> Tuple[List[str], List[str]]:
+    """(column names, primary-key columns in key order)."""
+    info = con.execute(f"PRAGMA table_info({table})").fetchall()
+    cols = [r[1] for r in info]
+    pk = [r[1] for r in sorted(info, key=lambda r: r[5]) if r[5]]
+    return cols, pk or cols
+
+
+def _read_table(con, table: str) -> Tuple[List[str], List[list]]:
+    cols, pk = _table_columns(con, table)
+    rows = con.execute(f"SELECT {', '.join(cols)} FROM {table} ORDER BY {', '.join(pk)}").fetchall()
+    return cols, [list(c) for c in zip(*rows)] if rows else [[] for _ in cols]
+
+
+def _read_tables(db_path: str) -> Tuple[int, Dict[str, Tuple[List[str], List[list]]]]:
+    """``(user_version, {table: (columns, column values)})`` of every table in :data:`TABLES`."""
+    with DB.connect(db_path) as con:
+        # one read transaction for every table, so a commit between two of them cannot leave e.g.
+        # a registration without its student; a caller's open transaction already is one. Ended
+        # here, before any encoding or writing: until then it blocks every writer's commit.
+        own = not con.in_transaction
+        if own:
+            con.execute("BEGIN")
+        try:
+            version = con.execute("PRAGMA user_version").fetchone()[0]
+            return version, {table: _read_table(con, table) for table in TABLES}
+        finally:
+            if own:
+                con.execute("ROLLBACK")  # nothing was written
+
+
+def dump(db_path: str = DB.DEFAULT_DB, out_path: str = "school.snap", codec: str = "zlib") -> Dict[str, int]:
+    """Write a snapshot of ``db_path``; returns the row count per table."""
+    code = CODECS[codec]
+    counts = {}
+    version, tables = _read_tables(db_path)
+    with open(out_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<BIH", code, version, len(TABLES)))
+        for table, (cols, columns) in tables.items():
+            rows = len(columns[0])
+            kinds = [_column_type(c) for c in columns]
+            block = b"".join(struct.pack("<Q", len(p)) + p
+                             for p in (_encode_column(k, c) for k, c in zip(kinds, columns)))
+            packed = _compress(code, block)
+            f.write(_name(table) + struct.pack("<IH", rows, len(cols)))
+            f.write(b"".join(_name(c) + k for c, k in zip(cols, kinds)))
+            f.write(struct.pack("<QI", len(packed), zlib.crc32(block)))
+            f.write(packed)
+            counts[table] = rows
+    return counts
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data, self.pos = data, 0
+
+    def take(self, n: int) -> bytes:
+        if self.pos + n > len(self.data):
+            raise SnapshotError("truncated snapshot")
+        out = self.data[self.pos:self.pos + n]; self.pos += n
+        return out
+
+    def unpack(self, fmt: str):
+        return struct.unpack(fmt, self.take(struct.calcsize(fmt)))
+
+    def name(self) -> str:
+        return self.take(self.unpack("<H")[0]).decode()
+
+
+def read(path: str) -> Tuple[int, Dict[str, Tuple[List[str], List[list]]]]:
+    """Decode a snapshot into ``(user_version, {table: (columns, column values)})``."""
+    with open(path, "rb") as f:
+        r = _Reader(f.read())
+    if r.take(len(MAGIC)) != MAGIC:
+        raise SnapshotError(f"{path}: not a snapshot file")
+    code, version, ntables = r.unpack("<BIH")
+    if code not in CODECS.values():
+        raise SnapshotError(f"{path}: unknown codec {code}")
+    tables = {}
+    for _ in range(ntables):
+        table = r.name()
+        rows, ncols = r.unpack("<IH")
+        cols = [(r.name(), r.take(1)) for _ in range(ncols)]
+        size, crc = r.unpack("<QI")
+        try:
+            block = _decompress(code, r.take(size))
+        except (zlib.error, lzma.LZMAError) as e:
+            raise SnapshotError(f"{path}: table {table}: {e}") from e
+        if zlib.crc32(block) != crc:
+            raise SnapshotError(f"{path}: table {table}: checksum mismatch")
+        b, columns = _Reader(block), []
+        for _, kind in cols:
+            columns.append(_decode_column(kind, b.take(b.unpack("<Q")[0]), rows))
+        tables[table] = ([c for c, _ in cols], columns)
+    return version, tables
+
+
+def load(path: str, db_path: str = DB.DEFAULT_DB, replace: bool = False) -> Dict[str, int]:
+    """Restore a snapshot into ``db_path`` in one transaction; returns rows per table.
+
+    The database must have no records unless ``replace`` is set, in which case
+    they are deleted first.
+    """
+    version, tables = read(path)
+    DB.init_db(db_path)
+    if version > DB.SCHEMA_VERSION:
+        raise SnapshotError(f"snapshot schema {version} is newer than this program ({DB.SCHEMA_VERSION})")
+    counts = {}
+    with DB.writer(db_path) as con:
+        if replace:
+            for table in reversed(TABLES):
+                con.execute(f"DELETE FROM {table}")
+        elif any(con.execute(f"SELECT 1 FROM {t} LIMIT 1").fetchone() for t in TABLES):
+            raise SnapshotError(f"{db_path} already has records (use replace=True)")
+        for table in TABLES:
+            cols, columns = tables.get(table, ([], []))
+            known, _ = _table_columns(con, table)
+            unknown = set(cols) - set(known)
+            if unknown:
+                raise SnapshotError(f"table {table}: unknown columns {sorted(unknown)}")
+            if cols:
+                con.executemany(f"INSERT INTO {table}({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                                zip(*columns))
+            counts[table] = len(columns[0]) if columns else 0
+    return counts
+
+
+def verify(path: str, db_path: Optional[str] = None) -> List[str]:
+    """Check checksums and decoding; with ``db_path`` also compare every row.
+
+    Returns a list of problems (empty when the snapshot is good).
+    """
+    try:
+        _, tables = read(path)
+    except SnapshotError as e:
+        return [str(e)]
+    problems = []
+    if db_path is None:
+        return problems
+    _, live_tables = _read_tables(db_path)
+    for table in TABLES:
+        cols, columns = tables.get(table, ([], []))
+        live_cols, live = live_tables[table]
+        if cols != live_cols:
+            problems.append(f"{table}: columns {cols} != {live_cols}")
+        elif columns != live:
+            snap_rows, live_rows = set(zip(*columns)), set(zip(*live))
+            problems.append(f"{table}: {len(live_rows - snap_rows)} rows only in the database, "
+                            f"{len(snap_rows - live_rows)} only in the snapshot")
+    return problems
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("dump"); p.add_argument("db"); p.add_argument("out")
+    p.add_argument("--codec", choices=sorted(CODECS), default="zlib")
+    p = sub.add_parser("load"); p.add_argument("snapshot"); p.add_argument("db")
+    p.add_argument("--replace", action="store_true", help="delete existing records first")
+    p = sub.add_parser("verify"); p.add_argument("snapshot"); p.add_argument("--db", help="compare with this database")
+    a = ap.parse_args(argv)
+    try:
+        if a.cmd == "dump":
+            print(dump(a.db, a.out, a.codec))
+        elif a.cmd == "load":
+            print(load(a.snapshot, a.db, a.replace))
+        else:
+            problems = verify(a.snapshot, a.db)
+            for msg in problems:
+                print(msg)
+            print("OK" if not problems else "FAILED")
+            return 1 if problems else 0
+    except SnapshotError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Enrollment and teaching-load statistics.
+
+The counts live in the ``course_stats``, ``student_stats`` and ``instructor_stats``
+summary tables, which triggers in :data:`db.STATS_SQL` keep current on every insert,
+delete and key change. Reading them is one indexed join; nothing is recounted.
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional
+
+from db import DEFAULT_DB, connect, writer
+
+
+def _only(col: str, keys: Optional[Iterable[str]]):
+    """A WHERE clause and its parameters limiting ``col`` to ``keys`` (none when ``keys`` is None)."""
+    if keys is None:
+        return "", ()
+    return f"WHERE {col} IN (SELECT value FROM json_each(?))", (json.dumps(list(keys)),)
+
+
+def course_enrollment(db_path: str = DEFAULT_DB, keys: Optional[Iterable[str]] = None) -> List[Dict]:
+    """Enrolled-student count per course, fullest first; ``keys`` limits it to those courses."""
+    where, params = _only("cs.course_id", keys)
+    with connect(db_path) as con:
+        rows = con.execute(f"""
+            SELECT c.course_id, c.course_name, COALESCE(i.name, '-'), cs.enrolled
+            FROM course_stats cs
+            JOIN courses c ON c.course_id = cs.course_id
+            LEFT JOIN instructors i ON i.instructor_id = c.instructor_id
+            {where}
+            ORDER BY cs.enrolled DESC, c.course_id
+        """, params).fetchall()
+    return [dict(course_id=r[0], course_name=r[1], instructor_name=r[2], enrolled=r[3]) for r in rows]
+
+
+def student_course_counts(db_path: str = DEFAULT_DB, keys: Optional[Iterable[str]] = None) -> List[Dict]:
+    """Number of registered courses per student, busiest first; ``keys`` limits it to those students."""
+    where, params = _only("ss.student_id", keys)
+    with connect(db_path) as con:
+        rows = con.execute(f"""
+            SELECT s.student_id, s.name, ss.courses
+            FROM student_stats ss JOIN students s ON s.student_id = ss.student_id
+            {where}
+            ORDER BY ss.courses DESC, s.student_id
+        """, params).fetchall()
+    return [dict(student_id=r[0], name=r[1], courses=r[2]) for r in rows]
+
+
+def instructor_load(db_path: str = DEFAULT_DB, keys: Optional[Iterable[str]] = None) -> List[Dict]:
+    """Number of courses taught per instructor, busiest first; ``keys`` limits it to those instructors."""
+    where, params = _only("st.instructor_id", keys)
+    with connect(db_path) as con:
+        rows = con.execute(f"""
+            SELECT i.instructor_id, i.name, st.courses
+            FROM instructor_stats st JOIN instructors i ON i.instructor_id = st.instructor_id
+            {where}
+            ORDER BY st.courses DESC, i.instructor_id
+        """, params).fetchall()
+    return [dict(instructor_id=r[0], name=r[1], courses=r[2]) for r in rows]
+
+
+def enrollment_count(course_id: str, db_path: str = DEFAULT_DB) -> Optional[int]:
+    with connect(db_path) as con:
+        r = con.execute("SELECT enrolled FROM course_stats WHERE course_id=?", (course_id,)).fetchone()
+    return None if not r else r[0]
+
+
+def rebuild(db_path: str = DEFAULT_DB) -> None:
+    """Recount every summary table from the base tables (repair after manual edits)."""
+    with writer(db_path) as con:
+        con.execute("DELETE FROM course_stats")
+        con.execute("DELETE FROM student_stats")
+        con.execute("DELETE FROM instructor_stats")
+        con.execute("""INSERT INTO course_stats(course_id, enrolled)
+                       SELECT c.course_id, COUNT(r.student_id) FROM courses c
+                       LEFT JOIN registrations r ON r.course_id = c.course_id GROUP BY c.course_id""")
+        con.execute("""INSERT INTO student_stats(student_id, courses)
+                       SELECT s.student_id, COUNT(r.course_id) FROM students s
+                       LEFT JOIN registrations r ON r.student_id = s.student_id GROUP BY s.student_id""")
+        con.execute("""INSERT INTO instructor_stats(instructor_id, courses)
+                       SELECT i.instructor_id, COUNT(c.course_id) FROM instructors i
+                       LEFT JOIN courses c ON c.instructor_id = i.instructor_id GROUP BY i.instructor_id""")
@@ -0,0 +1,237 @@
+"""Course meeting times and schedule-conflict detection.
+
+A course meets in weekly slots (``course_slots``: day 0-6 for Monday-Sunday,
+start and end in minutes after midnight, end exclusive). Two slots conflict when
+they are on the same day and their time ranges overlap.
+
+Checks never compare every pair of slots:
+
+* :class:`IntervalIndex` keeps the slots of one person (or one course) sorted by
+  start with a running maximum of the end times, so "what overlaps this slot" is
+  two binary searches plus a scan over the candidates.
+* :func:`overlaps` sweeps a whole set of slots in start order and keeps only the
+  currently open ones, so validating a term is ``O(n log n)`` plus the conflicts
+  found.
+
+The ``*_conflicts`` functions take an open connection so that ``db.py`` can check
+and write in the same transaction.
+
+Usage::
+
+    python timetable.py check --db school.db      # every student and instructor clash
+"""
+
+import argparse
+import json
+import re
+import sys
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, groupby
+from operator import itemgetter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+_ORDER = itemgetter(1, 2, 3)  # day, start, end
+_SLOT = re.compile(r"^\s*([A-Za-z]{3})[a-z]*\s+(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+
+
+class Slot(NamedTuple):
+    course_id: str
+    day: int
+    start: int  # minutes after midnight
+    end: int    # exclusive
+
+
+class Conflict(NamedTuple):
+    who: str    # student or instructor ID ("" when checking a bare set of slots)
+    a: Slot
+    b: Slot
+
+    def __str__(self):
+        head = f"{self.who}: " if self.who else ""
+        return (f"{head}{self.a.course_id} ({format_slot(self.a)}) "
+                f"overlaps {self.b.course_id} ({format_slot(self.b)})")
+
+
+class ScheduleConflict(ValueError):
+    """The change would double-book someone; ``conflicts`` lists the clashes."""
+
+    def __init__(self, conflicts: List[Conflict]):
+        shown = "; ".join(map(str, conflicts[:5])) + (f" (+{len(conflicts) - 5} more)" if len(conflicts) > 5 else "")
+        super().__init__(f"schedule conflict: {shown}")
+        self.conflicts = conflicts
+
+
+# text form ---------------------------------------------------------------
+def parse_slot(text: str, course_id: str = "") -> Slot:
+    """``"Mon 09:00-10:15"`` -> Slot. Raises ValueError on anything else."""
+    m = _SLOT.match(text)
+    day = DAYS.index(m.group(1).title()) if m and m.group(1).title() in DAYS else -1
+    if day < 0:
+        raise ValueError(f"not a time slot (e.g. 'Mon 09:00-10:15'): {text!r}")
+    h1, m1, h2, m2 = map(int, m.groups()[1:])
+    start, end = h1 * 60 + m1, h2 * 60 + m2
+    if m1 > 59 or m2 > 59 or not 0 <= start < end <= 24 * 60:
+        raise ValueError(f"invalid time range: {text!r}")
+    return Slot(course_id, day, start, end)
+
+
+def parse_slots(text: str, course_id: str = "") -> List[Slot]:
+    """Comma- or semicolon-separated slots; empty text means no meetings."""
+    return [parse_slot(p, course_id) for p in re.split(r"[,;]", text or "") if p.strip()]
+
+
+def format_slot(s: Slot) -> str:
+    return f"{DAYS[s.day]} {s.start // 60:02d}:{s.start % 60:02d}-{s.end // 60:02d}:{s.end % 60:02d}"
+
+
+def format_slots(slots: Iterable[Slot]) -> str:
+    return ", ".join(format_slot(s) for s in sorted(slots, key=lambda s: (s.day, s.start)))
+
+
+# index ---------------------------------------------------------------------
+class IntervalIndex:
+    """Slots per day, sorted by start, with the running maximum of their ends.
+
+    Slots overlapping ``[start, end)`` all start before ``end`` (one bisect on the
+    starts) and lie after the first position whose running maximum end exceeds
+    ``start`` (one bisect on the non-decreasing maxima); only that window is scanned.
+    """
+
+    def __init__(self, slots: Iterable[Slot] = ()):
+        self._days: Dict[int, Tuple[List[int], List[int], List[Slot]]] = {}
+        by_day: Dict[int, List[Slot]] = {}
+        for s in slots:
+            by_day.setdefault(s.day, []).append(s)
+        for day, items in by_day.items():
+            items.sort(key=lambda s: (s.start, s.end))
+            self._days[day] = ([s.start for s in items], list(accumulate((s.end for s in items), max)), items)
+
+    def __len__(self):
+        return sum(len(v[2]) for v in self._days.values())
+
+    def overlapping(self, day: int, start: int, end: int) -> List[Slot]:
+        entry = self._days.get(day)
+        if not entry:
+            return []
+        starts, max_ends, items = entry
+        hi = bisect_left(starts, end)
+        lo = bisect_right(max_ends, start, 0, hi)
+        return [s for s in items[lo:hi] if s.end > start]
+
+    def conflicts(self, slots: Iterable[Slot], who: str = "") -> List[Conflict]:
+        """Clashes between ``slots`` and the indexed ones (same-course pairs excluded)."""
+        return [Conflict(who, hit, s) for s in slots for hit in self.overlapping(s.day, s.start, s.end)
+                if hit.course_id != s.course_id]
+
+
+def overlaps(slots: Iterable[Slot], who: str = "") -> List[Conflict]:
+    """All overlapping pairs of different courses within ``slots`` (sweep line).
+
+    Slots are visited in (day, start) order, keeping the ones still open; each of
+    those overlaps the current slot, so the work is the sort plus the pairs found.
+    """
+    out: List[Conflict] = []
+    day, active = None, []
+    for s in sorted(slots, key=_ORDER):
+        if s.day != day:
+            day, active = s.day, []
+        else:
+            active = [a for a in active if a.end > s.start]
+        out.extend(Conflict(who, a, s) for a in active if a.course_id != s.course_id)
+        active.append(s)
+    return out
+
+
+# database ------------------------------------------------------------------
+def _slots(con, sql: str, params: Sequence) -> List[Slot]:
+    return [Slot(*r) for r in con.execute(sql, params)]
+
+
+def course_slots(con, course_ids: Iterable[str]) -> List[Slot]:
+    return _slots(con, """SELECT course_id, day, start_min, end_min FROM course_slots
+                          WHERE course_id IN (SELECT value FROM json_each(?))""", (json.dumps(list(course_ids)),))
+
+
+def student_conflicts(con, student_id: str, course_ids: Iterable[str]) -> List[Conflict]:
+    """Clashes between ``course_ids`` and the courses the student is registered or waitlisted for."""
+    new = course_slots(con, course_ids)
+    if not new:
+        return []
+    index = IntervalIndex(_slots(con, """
+        SELECT s.course_id, s.day, s.start_min, s.end_min FROM course_slots s
+        WHERE s.course_id IN (SELECT course_id FROM registrations WHERE student_id = ?
+                              UNION SELECT course_id FROM waitlist WHERE student_id = ?)
+    """, (student_id, student_id)))
+    return index.conflicts(new, student_id)
+
+
+def instructor_conflicts(con, instructor_id: Optional[str], course_ids: Iterable[str]) -> List[Conflict]:
+    """Clashes if the instructor also taught ``course_ids`` (their other courses, and among these)."""
+    ids = set(course_ids)
+    if not instructor_id or not ids:
+        return []
+    new = course_slots(con, ids)
+    if not new:
+        return []
+    taught = [s for s in _slots(con, """
+        SELECT s.course_id, s.day, s.start_min, s.end_min FROM course_slots s
+        JOIN courses c ON c.course_id = s.course_id WHERE c.instructor_id = ?
+    """, (instructor_id,)) if s.course_id not in ids]
+    return IntervalIndex(taught).conflicts(new, instructor_id) + overlaps(new, instructor_id)
+
+
+def course_conflicts(con, course_id: str, slots: Sequence[Slot]) -> List[Conflict]:
+    """Clashes if ``course_id`` met at ``slots``: for its instructor and every student
+    registered or waitlisted for it, against their registered and waitlisted courses."""
+    index = IntervalIndex(slots)
+    rows = con.execute("""
+        WITH members(student_id) AS (
+            SELECT student_id FROM registrations WHERE course_id = ?
+            UNION SELECT student_id FROM waitlist WHERE course_id = ?)
+        SELECT p.who, s.course_id, s.day, s.start_min, s.end_min
+        FROM (SELECT student_id AS who, course_id FROM registrations
+              WHERE student_id IN members
+              UNION
+              SELECT student_id, course_id FROM waitlist
+              WHERE student_id IN members
+              UNION ALL
+              SELECT instructor_id, course_id FROM courses
+              WHERE instructor_id = (SELECT instructor_id FROM courses WHERE course_id = ?)) p
+        JOIN course_slots s ON s.course_id = p.course_id
+        WHERE p.course_id != ?
+    """, (course_id, course_id, course_id, course_id))
+    return [Conflict(who, Slot(*slot), hit) for who, *slot in rows
+            for hit in index.overlapping(slot[1], slot[2], slot[3])]
+
+
+def term_conflicts(con) -> List[Conflict]:
+    """Every clash in the timetable, per student and per instructor, in one pass each."""
+    out: List[Conflict] = []
+    for sql in ("""SELECT r.student_id, s.course_id, s.day, s.start_min, s.end_min
+                   FROM registrations r JOIN course_slots s ON s.course_id = r.course_id
+                   ORDER BY r.student_id""",
+                """SELECT c.instructor_id, s.course_id, s.day, s.start_min, s.end_min
+                   FROM courses c JOIN course_slots s ON s.course_id = c.course_id
+                   WHERE c.instructor_id IS NOT NULL ORDER BY c.instructor_id"""):
+        for who, rows in groupby(con.execute(sql), key=lambda r: r[0]):
+            out.extend(overlaps((Slot(*r[1:]) for r in rows), who))
+    return out
+
+
+def main(argv=None):
+    import db as DB
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("check"); p.add_argument("--db", default=DB.DEFAULT_DB)
+    a = ap.parse_args(argv)
+    with DB.connect(a.db) as con:
+        found = term_conflicts(con)
+    for c in found:
+        print(c)
+    print(f"{len(found)} conflicts")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
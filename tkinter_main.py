@@ -6,13 +6,18 @@ A small School Management GUI used in **Software Tools Lab – Fall 2025–2026*
 This module is documented with Sphinx/Napoleon-style docstrings.
 """
 
+import os, queue, sys, threading, time
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import csv, os
+from tkinter import ttk, messagebox
 import db as DB
+import maintenance
+import notify
+import records
+import validation as V
+import viewmodel
 
 DB_PATH = DB.DEFAULT_DB
-DB.init_db(DB_PATH)
+_IMPORTED_AT = time.time()
 
 def info(msg): messagebox.showinfo("Info", msg)
 def error(msg): messagebox.showerror("Error", msg)
@@ -23,6 +28,194 @@ def center(win, w=1100, h=700):
     sw, sh = win.winfo_screenwidth(), win.winfo_screenheight()
     x, y = (sw-w)//2, (sh-h)//2; win.geometry(f"{w}x{h}+{x}+{y}")
 
+CHUNK_ROWS = 500     # Treeview rows inserted per after() callback
+VIRTUAL_ROWS = 5000  # larger results are shown through a sliding window
+POLL_MS = 15         # how often a loading table checks for its background result
+MODEL_POLL_MS = 100  # how often the Records tab checks for view-model changes
+
+class RecordTable:
+    """Scrollable Treeview that loads its rows without blocking the event loop.
+
+    :meth:`load` runs the query on a worker thread, which hands the rows back
+    through a queue polled with ``after()``. Results up to ``virtual_rows`` are
+    kept as Treeview items whose ids are the primary keys: only changed rows are
+    updated, and new ones are inserted ``CHUNK_ROWS`` at a time. Larger results
+    switch the table to virtual scrolling, where the Treeview holds only the rows
+    in the viewport and the scrollbar and mouse wheel move a window over the full
+    result.
+
+    Parameters
+    ----------
+    parent : tkinter widget
+        Parent container for the table.
+    headers : Sequence[str]
+        Column headers.
+    virtual_rows : int, optional
+        Row count above which virtual scrolling is used.
+
+    Attributes
+    ----------
+    tree : ttk.Treeview
+        The underlying widget.
+    rows : list[tuple]
+        Every row of the current result, visible or not.
+    pending : bool
+        True while a load is fetching or inserting.
+    """
+
+    def __init__(self, parent, headers, virtual_rows=VIRTUAL_ROWS):
+        f = ttk.Frame(parent); f.pack(fill="both", expand=True, padx=6, pady=6)
+        self.tree = ttk.Treeview(f, columns=list(range(len(headers))), show="headings", height=8)
+        for i,h in enumerate(headers):
+            self.tree.heading(i, text=h, anchor="w"); self.tree.column(i, width=140, anchor="w")
+        self.vsb = ttk.Scrollbar(f, orient="vertical", command=self._yview)
+        self.tree.configure(yscrollcommand=self._tree_scrolled)
+        self.tree.grid(row=0,column=0,sticky="nsew"); self.vsb.grid(row=0,column=1,sticky="ns")
+        f.columnconfigure(0, weight=1); f.rowconfigure(0, weight=1)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(seq, self._wheel)
+        self.tree.bind("<Configure>", lambda e: self.virtual and self._render())
+        self.tree.bind("<<TreeviewSelect>>", self._remember_selection)
+
+        self.virtual_rows = virtual_rows
+        self.rows, self.virtual, self.offset = [], False, 0
+        self.pending = False
+        self._results = queue.Queue()
+        self._gen = 0            # bumped by every load; stale results and chunks are dropped
+        self._selected = None    # key of the selected row, kept across virtual re-renders
+        self._index = {}         # item id (primary key) -> values, outside virtual mode
+
+    # loading ---------------------------------------------------------------
+    def load(self, fetch, done=None):
+        """Fetch rows with ``fetch()`` on a worker thread, then display them.
+
+        ``fetch`` may also return a :class:`records.Page`, whose rows are shown;
+        ``done(result)`` then runs on the event loop, e.g. to update a page label.
+        """
+        self._gen += 1; gen = self._gen
+        self.pending = True
+
+        def work():
+            try:
+                self._results.put((gen, fetch(), None))
+            except Exception as e:
+                self._results.put((gen, None, e))
+
+        threading.Thread(target=work, daemon=True).start()
+        self.tree.after(POLL_MS, self._poll, gen, done)
+
+    def _poll(self, gen, done=None):
+        if gen != self._gen:
+            return
+        try:
+            got, rows, exc = self._results.get_nowait()
+        except queue.Empty:
+            self.tree.after(POLL_MS, self._poll, gen, done); return
+        if got != gen:  # a result from a superseded load
+            self.tree.after(POLL_MS, self._poll, gen, done); return
+        if exc is not None:
+            self.pending = False; error(str(exc)); return
+        self.show(rows.rows if isinstance(rows, records.Page) else rows)
+        if done is not None:
+            done(rows)
+
+    def show(self, rows):
+        """Display ``rows`` (value tuples, primary key first).
+
+        Only the differences to what is shown are applied (see
+        :func:`records.diff`), so selection and scroll position survive a refresh.
+        """
+        self.rows = rows
+        virtual = len(rows) > self.virtual_rows
+        if virtual != self.virtual:  # item ids mean different things in the two modes
+            self.tree.delete(*self.tree.get_children())
+            self._index, self.offset = {}, 0
+        self.virtual = virtual
+        if virtual:
+            self._render(); self.pending = False
+            return
+        shown = {iid: self._index[iid] for iid in self.tree.get_children()}
+        delta = records.diff(shown, rows)
+        if delta is None:  # rows were reordered: start over
+            self.tree.delete(*self.tree.get_children())
+            self._index = {}
+            delta = records.diff({}, rows)
+        if delta.removed:
+            self.tree.delete(*delta.removed)
+        for key in delta.removed:
+            del self._index[key]
+        for _, values in delta.changed:
+            key = records.key_of(values)
+            self.tree.item(key, values=values); self._index[key] = values
+        self._insert_chunk(self._gen, delta.added, 0)
+
+    def _insert_chunk(self, gen, added, start):
+        if gen != self._gen:
+            return
+        for pos, values in added[start:start + CHUNK_ROWS]:
+            key = records.key_of(values)
+            self.tree.insert("", pos, iid=key, values=values); self._index[key] = values
+        if start + CHUNK_ROWS < len(added):
+            self.tree.after(1, self._insert_chunk, gen, added, start + CHUNK_ROWS)
+        else:
+            self.pending = False
+
+    # virtual scrolling -----------------------------------------------------
+    def _visible(self):
+        height = self.tree.winfo_height()
+        if height <= 1:  # not mapped yet
+            return int(self.tree.cget("height"))
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        return max(1, (height - rowheight) // rowheight)  # minus the heading row
+
+    def _render(self):
+        n = self._visible()
+        self.offset = max(0, min(self.offset, len(self.rows) - n))
+        window = self.rows[self.offset:self.offset + n]
+        items = self.tree.get_children()
+        if len(items) > len(window):
+            self.tree.delete(*items[len(window):])
+        for i, values in enumerate(window):
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert("", "end", values=values)
+        items = self.tree.get_children()
+        keep = [iid for iid, values in zip(items, window) if values[0] == self._selected]
+        self.tree.selection_set(keep)
+        total = max(1, len(self.rows))
+        self.vsb.set(self.offset / total, min(1.0, (self.offset + n) / total))
+
+    def _scroll_to(self, offset):
+        self.offset = int(offset); self._render()
+
+    def _yview(self, *args):
+        if not self.virtual:
+            return self.tree.yview(*args)
+        if args[0] == "moveto":
+            self._scroll_to(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = self._visible() if args[2] == "pages" else 1
+            self._scroll_to(self.offset + int(args[1]) * step)
+
+    def _tree_scrolled(self, first, last):
+        if not self.virtual:
+            self.vsb.set(first, last)
+
+    def _wheel(self, event):
+        if not self.virtual:
+            return None
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_to(self.offset - 3)
+        else:
+            self._scroll_to(self.offset + 3)
+        return "break"
+
+    def _remember_selection(self, _event):
+        sel = self.tree.selection()
+        if sel:  # an empty selection comes from scrolling the selected row out of view
+            self._selected = self.tree.item(sel[0], "values")[0]
+
 class App(tk.Tk):
 
     """App (Tkinter)
@@ -65,9 +258,14 @@ class App(tk.Tk):
       :meth:`build_courses`, :meth:`build_registration`, :meth:`build_assignment`,
       and :meth:`build_records`.
     - Calls :meth:`build_menubar` to create File/Tools menus.
+    - Table and combo data is *not* loaded here: :meth:`initial_load` runs from
+      the event loop once the window has painted, then sets ``self.loaded`` and
+      fires the ``<<DataLoaded>>`` virtual event.
     """
 
+        DB.init_db(DB_PATH)  # a single PRAGMA when the schema is already current
         super().__init__()
+        self.loaded = False
         self.title("School Management System"); center(self)
         nb = ttk.Notebook(self); nb.pack(fill="both", expand=True, padx=10, pady=10)
 
@@ -83,14 +281,80 @@ class App(tk.Tk):
         self.build_courses()
         self.build_registration()
         self.build_assignment()
+        self.model = viewmodel.RecordsModel(DB_PATH)
+        self._model_events = queue.Queue()  # (table, keys re-read or None), from any thread
+        self._model_dirty = set()
+        self._choices = {}  # table -> (sorted keys, combo texts)
+        self.model.subscribe(lambda table, rows, keys: self._model_events.put((table, keys)))
         self.build_records()
 
         self.build_menubar()
+        self.maintenance = maintenance.Scheduler(DB_PATH)
+        # other processes' commits: the watcher thread refreshes the view-model, whose changes reach
+        # the event loop through self._model_events (see _poll_model)
+        self.watcher = notify.Watcher(DB_PATH, on_change=self.model.refresh)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.after_idle(self.initial_load)
+
+    def initial_load(self):
+        """Flush pending redraws so the window paints, then fill tables and combos."""
+        self.update_idletasks()
+        self.first_paint_at = time.time()
+        self.refresh_all()
+        self._finish_load()
+        self._poll_model()
+
+    def _finish_load(self):
+        if self.busy():
+            self.after(POLL_MS, self._finish_load); return
+        self.loaded = True
+        if maintenance.Scheduler.enabled():
+            self.maintenance.start()
+        if notify.Watcher.enabled():
+            self.watcher.start()
+        self.event_generate("<<DataLoaded>>")
+
+    def _poll_model(self):
+        """Apply view-model changes, from this window's writes or other processes'.
+
+        For each table that changed, the combos listing it are patched (only the
+        keys the model re-read) and its Records table follows: one that lists every
+        row shows the cached rows, one showing a search or filters is reloaded in
+        the background, since rows may have started or stopped matching. A table
+        still loading every row is checked again on the next poll; its load may
+        already bring the newest rows, which are then not shown twice.
+        """
+        reload = set()
+        while True:
+            try:
+                name, keys = self._model_events.get_nowait()
+            except queue.Empty:
+                break
+            self.refresh_combos(name, keys)
+            (self._model_dirty if self.views[name]["shown"] == ("", {}) else reload).add(name)
+        for name in reload:
+            self._fill(name)
+        for name in list(self._model_dirty):
+            view = self.views[name]
+            if view["table"].pending:
+                continue
+            self._model_dirty.discard(name)
+            rows = self.model.cached(name)
+            if view["shown"] == ("", {}) and rows is not None and rows is not view["table"].rows:
+                view["table"].show(rows)
+        self.after(MODEL_POLL_MS, self._poll_model)
+
+    def close(self):
+        """Stop the maintenance scheduler (after its running task) and the change watcher, then close."""
+        self.maintenance.stop(timeout=5.0)
+        self.watcher.stop(timeout=1.0)
+        self.destroy()
 
     def build_menubar(self):
         """Build and attach the application menubar.
 
-    Creates **File** (Backup DB…, Exit) and **Tools** (Refresh Records) menus,
+    Creates **File** (Backup DB…, Exit) and **Tools** (Refresh Records, Run
+    Maintenance Now) menus,
     wires their commands, and assigns the menu to the window.
 
     Returns
@@ -100,13 +364,36 @@ class App(tk.Tk):
         m = tk.Menu(self)
         file_m = tk.Menu(m, tearoff=0)
         file_m.add_command(label="Backup DB…", command=self.backup_db)
-        file_m.add_separator(); file_m.add_command(label="Exit", command=self.destroy)
+        file_m.add_separator(); file_m.add_command(label="Exit", command=self.close)
         m.add_cascade(label="File", menu=file_m)
         tools_m = tk.Menu(m, tearoff=0)
         tools_m.add_command(label="Refresh Records", command=self.refresh_all)
+        tools_m.add_command(label="Run Maintenance Now", command=self.run_maintenance)
         m.add_cascade(label="Tools", menu=tools_m)
         self.config(menu=m)
 
+    def run_maintenance(self):
+        """Run every maintenance task now on a worker thread and report the results.
+
+    The tasks (see :mod:`maintenance`) run through ``maintenance.run`` off the
+    event loop; the reports come back through a queue polled with ``after()``
+    and are shown in one info dialog (an error dialog if any task failed).
+
+    Returns
+    -------
+    None
+    """
+        results = queue.Queue()
+        threading.Thread(target=lambda: results.put(maintenance.run(db_path=DB_PATH)), daemon=True).start()
+        def poll():
+            try:
+                reports = results.get_nowait()
+            except queue.Empty:
+                self.after(POLL_MS, poll); return
+            text = "\n".join(map(str, reports))
+            (info if all(r.ok for r in reports) else error)(text)
+        poll()
+
     def backup_db(self):
         """Back up the current SQLite DB to a user-selected file.
 
@@ -119,6 +406,7 @@ class App(tk.Tk):
     None
     """
 
+        from tkinter import filedialog
         path = filedialog.asksaveasfilename(title="Backup DB", defaultextension=".db",
                                             filetypes=[("SQLite DB", "*.db"), ("All Files","*.*")])
         if not path: return
@@ -146,8 +434,8 @@ class App(tk.Tk):
         Propagated as a messagebox error if the DB insert fails.
     """
         try:
-            DB.add_student(self.s_id.get().strip(), self.s_name.get().strip(),
-                           int(self.s_age.get().strip()), self.s_email.get().strip(), DB_PATH)
+            DB.add_student(*V.student(dict(student_id=self.s_id.get(), name=self.s_name.get(),
+                                           age=self.s_age.get(), email=self.s_email.get())), DB_PATH)
             info("Student added."); self.s_name.delete(0,tk.END); self.s_age.delete(0,tk.END)
             self.s_email.delete(0,tk.END); self.s_id.delete(0,tk.END); self.refresh_all()
         except Exception as e: error(str(e))
@@ -165,43 +453,54 @@ class App(tk.Tk):
     def add_instructor(self):
         """Create a new instructor using form entries."""
         try:
-            DB.add_instructor(self.i_id.get().strip(), self.i_name.get().strip(),
-                              int(self.i_age.get().strip()), self.i_email.get().strip(), DB_PATH)
+            DB.add_instructor(*V.instructor(dict(instructor_id=self.i_id.get(), name=self.i_name.get(),
+                                                 age=self.i_age.get(), email=self.i_email.get())), DB_PATH)
             info("Instructor added."); self.i_name.delete(0,tk.END); self.i_age.delete(0,tk.END)
             self.i_email.delete(0,tk.END); self.i_id.delete(0,tk.END); self.refresh_all()
         except Exception as e: error(str(e))
 
 
     def build_courses(self):
-        """Construct the Courses tab UI (ID, name, instructor selector)."""
+        """Construct the Courses tab UI (ID, name, instructor selector, capacity).
+
+        Leaving the Course ID field of an existing course shows its capacity,
+        which **Set Capacity** changes.
+        """
         f = ttk.Frame(self.courses_tab); f.pack(anchor="w", pady=8)
         ttk.Label(f, text="Course ID").grid(row=0,column=0,sticky="e"); self.c_id=ttk.Entry(f,width=28); self.c_id.grid(row=0,column=1)
         ttk.Label(f, text="Course Name").grid(row=1,column=0,sticky="e"); self.c_name=ttk.Entry(f,width=28); self.c_name.grid(row=1,column=1)
         ttk.Label(f, text="Instructor").grid(row=2,column=0,sticky="e"); self.c_ins=ttk.Combobox(f,width=26,state="readonly"); self.c_ins.grid(row=2,column=1)
-        ttk.Button(f, text="Add Course", command=self.add_course).grid(row=3,column=0,columnspan=2,pady=6)
-        self.refresh_instructor_combo(self.c_ins)
-
-    def refresh_instructor_combo(self, combo):
-        """Reload the instructor Combobox with 'instructor_id - name' options.
-
-    Parameters
-    ----------
-    combo : ttk.Combobox
-        The Combobox to update.
-
-    Returns
-    -------
-    None
-    """
-
-        combo["values"] = [f"{i['instructor_id']} - {i['name']}" for i in DB.list_instructors(DB_PATH)]
+        ttk.Label(f, text="Capacity").grid(row=3,column=0,sticky="e"); self.c_cap=ttk.Entry(f,width=28); self.c_cap.grid(row=3,column=1)
+        ttk.Label(f, text="(empty = unlimited)").grid(row=3,column=2,sticky="w")
+        self.c_id.bind("<FocusOut>", self.show_capacity)
+        b = ttk.Frame(f); b.grid(row=4,column=0,columnspan=2,pady=6)
+        ttk.Button(b, text="Add Course", command=self.add_course).pack(side="left")
+        ttk.Button(b, text="Set Capacity", command=self.set_capacity).pack(side="left", padx=6)
 
     def add_course(self):
         """Create a course and link it to the selected instructor."""
         try:
             iid = (self.c_ins.get().split(" - ")[0] if self.c_ins.get() else None)
-            DB.add_course(self.c_id.get().strip(), self.c_name.get().strip(), iid, DB_PATH)
-            info("Course added."); self.c_id.delete(0,tk.END); self.c_name.delete(0,tk.END); self.refresh_all()
+            DB.add_course(self.c_id.get().strip(), self.c_name.get().strip(), iid, DB_PATH, capacity=self.c_cap.get())
+            info("Course added."); self.c_id.delete(0,tk.END); self.c_name.delete(0,tk.END)
+            self.c_cap.delete(0,tk.END); self.refresh_all()
+        except Exception as e: error(str(e))
+
+    def show_capacity(self, _event=None):
+        """Put the capacity of the course in Course ID, if it exists, into the Capacity field."""
+        row = DB.get_course(self.c_id.get().strip(), DB_PATH)
+        if row is not None:
+            self.c_cap.delete(0,tk.END); self.c_cap.insert(0, "" if row["capacity"] is None else str(row["capacity"]))
+
+    def set_capacity(self):
+        """Change the capacity of the course in Course ID; a raised one promotes from its waitlist."""
+        try:
+            cid = self.c_id.get().strip()
+            if DB.get_course(cid, DB_PATH) is None:
+                return error(f"Course not found: {cid}")
+            promoted = DB.set_course_capacity(cid, self.c_cap.get(), DB_PATH)
+            info("Capacity saved." + (f" Registered from the waitlist: {', '.join(promoted)}." if promoted else ""))
+            self.refresh_all()
         except Exception as e: error(str(e))
 
 
@@ -211,43 +510,49 @@ class App(tk.Tk):
         ttk.Label(f, text="Student").grid(row=0,column=0,sticky="e"); self.reg_s=ttk.Combobox(f,width=26,state="readonly"); self.reg_s.grid(row=0,column=1)
         ttk.Label(f, text="Course").grid(row=1,column=0,sticky="e"); self.reg_c=ttk.Combobox(f,width=26,state="readonly"); self.reg_c.grid(row=1,column=1)
         ttk.Button(f, text="Register", command=self.register_student).grid(row=2,column=0,columnspan=2,pady=6)
-        self.refresh_student_combo(self.reg_s); self.refresh_course_combo(self.reg_c)
 
-    def refresh_student_combo(self, combo):
-        """Reload the student Combobox with 'student_id - name' options.
+    def refresh_combos(self, name, keys=None):
+        """Show the view-model's ``name`` rows as 'id - name' options in the Comboboxes listing them.
 
         Parameters
         ----------
-        combo : ttk.Combobox
-            The Combobox to update.
+        name : str
+            ``"students"``, ``"instructors"`` or ``"courses"``.
+        keys : set of str, optional
+            The keys the model re-read; only their options are replaced. None
+            rebuilds the options from every cached row.
 
         Returns
         -------
         None
         """
-
-        
-        combo["values"] = [f"{s['student_id']} - {s['name']}" for s in DB.list_students(DB_PATH)]
-
-    def refresh_course_combo(self, combo):
-        """Reload the course Combobox with 'course_id - course_name' options.
-
-        Parameters
-        ----------
-        combo : ttk.Combobox
-            The Combobox to update.
-
-        Returns
-        -------
-        None
-        """
-        combo["values"] = [f"{c['course_id']} - {c['course_name']}" for c in DB.list_courses(DB_PATH)]
+        rows = self.model.cached(name)
+        if rows is None:
+            return
+        shown, texts = self._choices.get(name, (None, None))
+        if keys is None or shown is None:
+            shown, texts = [records.key_of(r) for r in rows], [f"{r[0]} - {r[1]}" for r in rows]
+            self._choices[name] = (shown, texts)
+        else:
+            for i, row, there in records.locate(shown, rows, keys):
+                if row is None:
+                    del texts[i]
+                elif there:
+                    texts[i] = f"{row[0]} - {row[1]}"
+                else:
+                    texts.insert(i, f"{row[0]} - {row[1]}")
+        combos = {"students": (self.reg_s,), "instructors": (self.c_ins, self.asg_i),
+                  "courses": (self.reg_c, self.asg_c)}[name]
+        for combo in combos:
+            combo["values"] = texts
 
     def register_student(self):
         """Persist a student-course registration via DB API."""
         try:
             sid = self.reg_s.get().split(" - ")[0]; cid = self.reg_c.get().split(" - ")[0]
-            DB.register_student(sid, cid, DB_PATH); info("Registered."); self.refresh_all()
+            status = DB.register_student(sid, cid, DB_PATH)
+            info("Course full: added to the waitlist." if status == DB.WAITLISTED else "Registered.")
+            self.refresh_all()
         except Exception as e: error(str(e))
 
     def build_assignment(self):
@@ -256,7 +561,6 @@ class App(tk.Tk):
         ttk.Label(f, text="Instructor").grid(row=0,column=0,sticky="e"); self.asg_i=ttk.Combobox(f,width=26,state="readonly"); self.asg_i.grid(row=0,column=1)
         ttk.Label(f, text="Course").grid(row=1,column=0,sticky="e"); self.asg_c=ttk.Combobox(f,width=26,state="readonly"); self.asg_c.grid(row=1,column=1)
         ttk.Button(f, text="Assign", command=self.assign_instructor).grid(row=2,column=0,columnspan=2,pady=6)
-        self.refresh_instructor_combo(self.asg_i); self.refresh_course_combo(self.asg_c)
 
     def assign_instructor(self):
         """Assign an instructor to a course and save in DB."""
@@ -267,67 +571,90 @@ class App(tk.Tk):
 
 
     def build_records(self):
-        """Build the aggregated Records tab with search and tables."""
+        """Build the aggregated Records tab with search, filters and tables."""
         top = ttk.Frame(self.records_tab); top.pack(fill="x", padx=6, pady=(8,2))
         ttk.Label(top, text="Scope:").pack(side="left")
         self.scope = ttk.Combobox(top, values=["All","Students","Instructors","Courses"], width=14, state="readonly")
         self.scope.current(0); self.scope.pack(side="left", padx=6)
         self.search = ttk.Entry(top, width=40); self.search.pack(side="left", padx=6)
+        self.fuzzy = tk.BooleanVar(value=False)
+        ttk.Checkbutton(top, text="Fuzzy", variable=self.fuzzy).pack(side="left", padx=(0,6))
         ttk.Button(top, text="Search", command=self.apply_search).pack(side="left")
         ttk.Button(top, text="Clear", command=self.clear_search).pack(side="left", padx=4)
 
-        self.stu = self._table(self.records_tab, ["Student ID","Name","Age","Email","Registered Courses"])
-        self.ins = self._table(self.records_tab, ["Instructor ID","Name","Age","Email","Assigned Courses"])
-        self.cou = self._table(self.records_tab, ["Course ID","Course Name","Instructor","Enrolled Students"])
-
+        flt = ttk.Frame(self.records_tab); flt.pack(fill="x", padx=6, pady=(0,2))
+        def entry(label, width=5):
+            if label: ttk.Label(flt, text=label).pack(side="left", padx=(6,2))
+            e = ttk.Entry(flt, width=width); e.pack(side="left"); e.bind("<Return>", lambda _e: self.apply_search())
+            return e
+        self.age_min = entry("Age:"); self.age_max = entry("–")
+        self.domain = entry("Email domain:", 16)
+        self.count_min = entry("Courses / enrolled:"); self.count_max = entry("–")
+        ttk.Label(flt, text="Course instructor:").pack(side="left", padx=(6,2))
+        self.has_instructor = ttk.Combobox(flt, values=["Any","Assigned","Unassigned"], width=11, state="readonly")
+        self.has_instructor.current(0); self.has_instructor.pack(side="left")
+
+        # per table: its widgets, the (q, filters) it shows and its page offset
+        self.views = {}
+        for name, label, headers in (
+                ("students", "Students", ["Student ID","Name","Age","Email","Registered Courses"]),
+                ("instructors", "Instructors", ["Instructor ID","Name","Age","Email","Assigned Courses"]),
+                ("courses", "Courses", ["Course ID","Course Name","Instructor","Enrolled Students"])):
+            bar = ttk.Frame(self.records_tab); bar.pack(fill="x", padx=6)
+            heading = ttk.Label(bar, text=label); heading.pack(side="left")
+            nxt = ttk.Button(bar, text="Next ▶", command=lambda n=name: self._page(n, +1))
+            prv = ttk.Button(bar, text="◀ Prev", command=lambda n=name: self._page(n, -1))
+            nxt.pack(side="right"); prv.pack(side="right", padx=4)
+            prv.state(["disabled"]); nxt.state(["disabled"])
+            self.views[name] = dict(table=RecordTable(self.records_tab, headers), heading=heading, prev=prv, next=nxt,
+                                    label=label, shown=("", {}), offset=0)
+        self.stu, self.ins, self.cou = (self.views[n]["table"] for n in ("students", "instructors", "courses"))
 
         act = ttk.Frame(self.records_tab); act.pack(fill="x", padx=6, pady=6)
         ttk.Button(act, text="Refresh", command=self.refresh_all).pack(side="left")
 
-        self.refresh_all()
+    def refresh_all(self):
+        """Reload combos and tables across all tabs after data changes.
 
-    def _table(self, parent, headers):
-        """Create a scrollable Treeview with the given headers.
+        Records tables that list every row reload from the view-model on worker
+        threads (the model is refreshed there even when every table shows a
+        search); :meth:`_poll_model` then patches the combos and reloads the
+        searched or filtered tables of whatever changed. Records tables keep their
+        current search, filters and page.
+        """
 
-    Builds a frame, a Treeview configured with heading columns, and a vertical
-    scrollbar; sets grid weights for resizing and returns the Treeview.
+        self.maintenance.touch()
+        every = [name for name, view in self.views.items() if view["shown"] == ("", {})]
+        for name in every:
+            self._fill(name)
+        if not every:
+            threading.Thread(target=self.model.refresh, daemon=True).start()
 
-    Parameters
-    ----------
-    parent : tkinter widget
-        Parent container for the table.
-    headers : Sequence[str]
-        Column headers.
+    def filters(self):
+        """The filter bar's values as ``DB.filter_records`` filters per table.
 
     Returns
     -------
-    ttk.Treeview
-        The configured Treeview widget (its parent frame is already packed).
-    """
-
-        f = ttk.Frame(parent); f.pack(fill="both", expand=True, padx=6, pady=6)
-        tree = ttk.Treeview(f, columns=list(range(len(headers))), show="headings", height=8)
-        for i,h in enumerate(headers):
-            tree.heading(i, text=h, anchor="w"); tree.column(i, width=140, anchor="w")
-        vsb = ttk.Scrollbar(f, orient="vertical", command=tree.yview); tree.configure(yscrollcommand=vsb.set)
-        tree.grid(row=0,column=0,sticky="nsew"); vsb.grid(row=0,column=1,sticky="ns")
-        f.columnconfigure(0, weight=1); f.rowconfigure(0, weight=1)
-        return tree
-
-    def refresh_all(self):
-        """Reload combos and tables across all tabs after data changes."""
+    dict
+        ``{"students": {...}, "instructors": {...}, "courses": {...}}`` (see
+        :func:`records.filters_for`).
 
-        self.fill_students(""); self.fill_instructors(""); self.fill_courses("")
-        self.refresh_instructor_combo(self.c_ins)
-        self.refresh_student_combo(self.reg_s); self.refresh_course_combo(self.reg_c)
-        self.refresh_instructor_combo(self.asg_i); self.refresh_course_combo(self.asg_c)
+    Raises
+    ------
+    validation.ValidationError
+        If a bound is not a whole number or a minimum exceeds its maximum.
+    """
+        has = {"Assigned": True, "Unassigned": False}.get(self.has_instructor.get())
+        return records.filters_for((self.age_min.get(), self.age_max.get()), self.domain.get(),
+                                   (self.count_min.get(), self.count_max.get()), has)
 
     def apply_search(self):
-        """Apply the current query to tables based on selected scope.
+        """Apply the current query and filters to tables based on selected scope.
 
-    Reads the query from ``self.search`` and the scope from ``self.scope``,
-    then repopulates Students, Instructors, and Courses—passing the query
-    only to the chosen scope (or all when scope is "All").
+    Reads the query from ``self.search``, the scope from ``self.scope`` and the
+    filter bar, then repopulates Students, Instructors, and Courses—passing the
+    query and filters only to the chosen scope (or all when scope is "All").
+    Filtered tables show one page of ``records.PAGE_ROWS`` rows at a time.
 
     Returns
     -------
@@ -335,87 +662,152 @@ class App(tk.Tk):
     """
 
         q = self.search.get().strip(); scope = self.scope.get()
-        self.fill_students(q if scope in ("All","Students") else "")
-        self.fill_instructors(q if scope in ("All","Instructors") else "")
-        self.fill_courses(q if scope in ("All","Courses") else "")
+        try:
+            f = self.filters()
+        except V.ValidationError as e:
+            return error(str(e))
+        self.fill_students(*((q, f["students"]) if scope in ("All","Students") else ()))
+        self.fill_instructors(*((q, f["instructors"]) if scope in ("All","Instructors") else ()))
+        self.fill_courses(*((q, f["courses"]) if scope in ("All","Courses") else ()))
 
     def clear_search(self):
-        """Clear the search UI and refresh all tables.
+        """Clear the search UI and filters and show every record.
 
-    Resets the query entry, sets scope to "All", and triggers a full refresh.
+    Resets the query entry and filter bar, sets scope to "All", and triggers a
+    full refresh.
 
     Returns
     -------
     None
     """
 
-        self.search.delete(0,tk.END); self.scope.current(0); self.refresh_all()
+        self.search.delete(0,tk.END); self.scope.current(0)
+        for e in (self.age_min, self.age_max, self.domain, self.count_min, self.count_max):
+            e.delete(0, tk.END)
+        self.has_instructor.current(0)
+        for name in self.views:
+            self.views[name]["shown"] = ("", {})
+        self.refresh_all()
 
-    def fill_students(self, q=""):
-        """Populate the Students table.
+    def busy(self):
+        """Whether any Records table is still fetching or inserting rows."""
+        return any(t.pending for t in (self.stu, self.ins, self.cou))
 
-        Clears rows, fetches students (all or search by ``q``), computes the
-        registered courses string, and inserts rows into ``self.stu``.
+    def _fill(self, name, q=None, filters=None):
+        """Load one Records table; ``q``/``filters`` replace what it shows.
+
+        A table keeps its page unless the query or filters change. Without
+        filters every matching row is loaded (with no query either, from the
+        cached :class:`viewmodel.RecordsModel`); with filters, one page and the
+        total come from :func:`records.page`, and the heading and Prev/Next
+        buttons are updated once it arrives.
+        """
+        view = self.views[name]
+        if q is not None:
+            if (q, filters) != view["shown"]:
+                view["offset"] = 0
+            view["shown"] = (q, filters)
+        q, filters = view["shown"]
+        fuzzy = self.fuzzy.get()
+        if not q and not filters:  # every row: from the shared view-model
+            view["heading"].config(text=view["label"])
+            view["prev"].state(["disabled"]); view["next"].state(["disabled"])
+            view["table"].load(lambda: self.model.rows(name))
+            return
+        if not filters:
+            view["heading"].config(text=view["label"])
+            view["prev"].state(["disabled"]); view["next"].state(["disabled"])
+            view["table"].load(lambda: records.ROWS[name](q, DB_PATH, fuzzy=fuzzy))
+            return
+        offset = view["offset"]
+
+        def paged(page):
+            view["offset"] = page.offset
+            view["heading"].config(text=records.page_title(view["label"], page))
+            view["prev"].state(["!disabled" if page.offset > 0 else "disabled"])
+            view["next"].state(["!disabled" if page.offset + len(page.rows) < page.total else "disabled"])
+
+        view["table"].load(lambda: records.page(name, q, DB_PATH, fuzzy, filters, offset), done=paged)
+
+    def _page(self, name, step):
+        self.views[name]["offset"] = max(0, self.views[name]["offset"] + step * records.PAGE_ROWS)
+        self._fill(name)
+
+    def fill_students(self, q="", filters=None):
+        """Load the Students table in the background.
+
+        Fetches students (all or search by ``q``) with their registered
+        courses on a worker thread; see :class:`RecordTable`.
 
         Parameters
         ----------
         q : str, optional
-            Search filter; empty shows all.
+            Search filter; empty shows all. Matches names despite typos
+            when the Fuzzy box is ticked.
+        filters : dict, optional
+            Structured filters for ``DB.filter_records`` (age, email_domain,
+            courses); results are then paged.
 
         Returns
         -------
         None
         """
-        for i in self.stu.get_children(): self.stu.delete(i)
-        data = DB.search_students(q, DB_PATH) if q else DB.list_students(DB_PATH)
-        for r in data:
-            regs = DB.list_registrations_for_student(r["student_id"], DB_PATH)
-            courses = ", ".join(x["course_name"] for x in regs) or "-"
-            self.stu.insert("", "end", values=(r["student_id"], r["name"], r["age"], r["email"], courses))
+        self._fill("students", q, filters or {})
 
-    def fill_instructors(self, q=""):
-        """Populate the Instructors table.
+    def fill_instructors(self, q="", filters=None):
+        """Load the Instructors table in the background.
 
-        Clears rows, fetches instructors (all or search by ``q``), derives the
-        taught courses from ``DB.list_courses``, and inserts rows into ``self.ins``.
+        Fetches instructors (all or search by ``q``) with their assigned
+        courses on a worker thread; see :class:`RecordTable`.
 
         Parameters
         ----------
         q : str, optional
-            Search filter; empty shows all.
+            Search filter; empty shows all. Matches names despite typos
+            when the Fuzzy box is ticked.
+        filters : dict, optional
+            Structured filters for ``DB.filter_records`` (age, email_domain,
+            courses); results are then paged.
 
         Returns
         -------
         None
         """
-        for i in self.ins.get_children(): self.ins.delete(i)
-        data = DB.search_instructors(q, DB_PATH) if q else DB.list_instructors(DB_PATH)
-        all_courses = DB.list_courses(DB_PATH)
-        for r in data:
-            taught = ", ".join(c["course_name"] for c in all_courses if c["instructor_id"] == r["instructor_id"]) or "-"
-            self.ins.insert("", "end", values=(r["instructor_id"], r["name"], r["age"], r["email"], taught))
+        self._fill("instructors", q, filters or {})
 
-    def fill_courses(self, q=""):
-        """Populate the Courses table.
+    def fill_courses(self, q="", filters=None):
+        """Load the Courses table in the background.
 
-        Clears rows, fetches courses (all or search by ``q``), derives enrolled
-        student names, and inserts rows into ``self.cou``.
+        Fetches courses (all or search by ``q``) with their enrolled student
+        names on a worker thread; see :class:`RecordTable`.
 
         Parameters
         ----------
         q : str, optional
-            Search filter; empty shows all.
+            Search filter; empty shows all. Matches names despite typos
+            when the Fuzzy box is ticked.
+        filters : dict, optional
+            Structured filters for ``DB.filter_records`` (enrolled,
+            has_instructor, instructor_id); results are then paged.
 
         Returns
         -------
         None
         """
-        for i in self.cou.get_children(): self.cou.delete(i)
-        data = DB.search_courses(q, DB_PATH) if q else DB.list_courses(DB_PATH)
-        for r in data:
-            studs = DB.list_registrations_for_course(r["course_id"], DB_PATH)
-            s_names = ", ".join(s["name"] for s in studs) or "-"
-            self.cou.insert("", "end", values=(r["course_id"], r["course_name"], r["instructor_name"], s_names))
+        self._fill("courses", q, filters or {})
+
+def main():
+    """Run the app; ``--profile-startup`` prints a startup timeline and exits."""
+    app = App()
+    if "--profile-startup" in sys.argv:
+        t0 = float(os.environ.get("SCHOOL_STARTUP_T0", _IMPORTED_AT))
+        def report(_event):
+            print({"imported": round(_IMPORTED_AT - t0, 4),
+                   "shown": round(app.first_paint_at - t0, 4),
+                   "loaded": round(time.time() - t0, 4)}, flush=True)
+            app.destroy()
+        app.bind("<<DataLoaded>>", report)
+    app.mainloop()
 
 if __name__ == "__main__":
-    App().mainloop()
+    main()
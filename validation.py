@@ -0,0 +1,249 @@
+"""Input validation shared by every entry path.
+
+Used by ``models.py``, the ``db.py`` mutators, both GUIs and the bulk import.
+Patterns are compiled once at import. The ``check_*`` functions validate and
+normalize one value and raise :class:`ValidationError`. The record functions
+(:func:`student`, :func:`instructor`, :func:`course`, :func:`registration`) turn
+a mapping such as a CSV row into the tuple of columns ``db.py`` inserts.
+:func:`validate_columns` and :func:`validate_records` do the same for many rows
+at once, one column at a time, and report the bad rows instead of raising.
+"""
+
+import re
+from itertools import compress, count
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+EMAIL_PATTERN = r"[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}"
+ID_PATTERN = r"[A-Za-z0-9_\-]+"
+EMAIL_RE = re.compile(EMAIL_PATTERN)
+ID_RE = re.compile(ID_PATTERN)
+_SPACES = re.compile(r"\s+")
+AGE_MIN, AGE_MAX = 0, 150
+
+
+LABELS = {"student_id": "Student ID", "instructor_id": "Instructor ID", "course_id": "Course ID",
+          "course_name": "Course name", "name": "Name", "age": "Age", "email": "Email", "capacity": "Capacity",
+          "slots": "Meeting times", "courses": "Courses", "enrolled": "Enrolled", "email_domain": "Email domain"}
+
+
+class ValidationError(ValueError):
+    """A value failed validation; ``field`` names the offending field."""
+
+    def __init__(self, field: str, message: str):
+        super().__init__(f"{LABELS.get(field, field)}: {message}")
+        self.field = field
+
+
+def check_id(value, field: str = "id") -> str:
+    v = str(value if value is not None else "").strip()
+    if not v:
+        raise ValidationError(field, "cannot be empty")
+    if not ID_RE.fullmatch(v):
+        raise ValidationError(field, "use letters, digits, _ or -")
+    return v
+
+
+def optional_id(value, field: str = "id") -> Optional[str]:
+    if value is None or not str(value).strip():
+        return None
+    return check_id(value, field)
+
+
+def check_name(value, field: str = "name") -> str:
+    """Non-empty text with surrounding and repeated whitespace removed."""
+    v = _SPACES.sub(" ", str(value if value is not None else "")).strip()
+    if not v:
+        raise ValidationError(field, "cannot be empty")
+    return v
+
+
+def check_age(value, field: str = "age") -> int:
+    if isinstance(value, bool):
+        raise ValidationError(field, "must be an integer")
+    try:
+        v = value if isinstance(value, int) else int(str(value).strip())
+    except ValueError:
+        raise ValidationError(field, "must be an integer") from None
+    if not AGE_MIN <= v <= AGE_MAX:
+        raise ValidationError(field, f"must be between {AGE_MIN} and {AGE_MAX}")
+    return v
+
+
+def check_email(value, field: str = "email") -> str:
+    """A plausible address; the domain is lower-cased."""
+    v = str(value if value is not None else "").strip()
+    if not EMAIL_RE.fullmatch(v):
+        raise ValidationError(field, "not a valid email address")
+    local, _, domain = v.rpartition("@")
+    return f"{local}@{domain.lower()}"
+
+
+def check_capacity(value, field: str = "capacity") -> Optional[int]:
+    """A non-negative seat count; empty means unlimited (None)."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool):
+        raise ValidationError(field, "must be a whole number")
+    try:
+        v = value if isinstance(value, int) else int(str(value).strip())
+    except ValueError:
+        raise ValidationError(field, "must be a whole number") from None
+    if v < 0:
+        raise ValidationError(field, "cannot be negative")
+    return v
+
+
+def check_range(lo, hi, field: str) -> Tuple[Optional[int], Optional[int]]:
+    """An inclusive range of whole numbers for a filter; an empty end is open (None)."""
+    lo, hi = check_capacity(lo, field), check_capacity(hi, field)
+    if lo is not None and hi is not None and lo > hi:
+        raise ValidationError(field, "minimum is above maximum")
+    return lo, hi
+
+
+# records (column order matches the tables) -----------------------------------
+COLUMNS = {
+    "students": ("student_id", "name", "age", "email"),
+    "instructors": ("instructor_id", "name", "age", "email"),
+    "courses": ("course_id", "course_name", "instructor_id", "capacity"),
+    "registrations": ("student_id", "course_id"),
+}
+
+
+def person(person_id, name, age, email, id_field: str = "student_id") -> Tuple[str, str, int, str]:
+    return check_id(person_id, id_field), check_name(name), check_age(age), check_email(email)
+
+
+def person_changes(new_id, name, age, email, id_field: str = "student_id") -> tuple:
+    """Like :func:`person` for an update: ``None`` (not changing) passes through."""
+    return (None if new_id is None else check_id(new_id, id_field), None if name is None else check_name(name),
+            None if age is None else check_age(age), None if email is None else check_email(email))
+
+
+def student(row: Mapping) -> Tuple[str, str, int, str]:
+    return person(row.get("student_id"), row.get("name"), row.get("age"), row.get("email"), "student_id")
+
+
+def instructor(row: Mapping) -> Tuple[str, str, int, str]:
+    return person(row.get("instructor_id"), row.get("name"), row.get("age"), row.get("email"), "instructor_id")
+
+
+def course(row: Mapping) -> Tuple[str, str, Optional[str], Optional[int]]:
+    return (check_id(row.get("course_id"), "course_id"), check_name(row.get("course_name"), "course_name"),
+            optional_id(row.get("instructor_id"), "instructor_id"), check_capacity(row.get("capacity")))
+
+
+def registration(row: Mapping) -> Tuple[str, str]:
+    return check_id(row.get("student_id"), "student_id"), check_id(row.get("course_id"), "course_id")
+
+
+RECORDS = {"students": student, "instructors": instructor, "courses": course, "registrations": registration}
+
+
+# batches ---------------------------------------------------------------------
+# Each column check returns the normalized column and (row index, message) for the
+# values it rejects. The common, valid case runs through precompiled patterns and
+# builtins; only the rejected values go through the scalar check for their message.
+Errors = List[Tuple[int, str]]
+
+
+def _text(values) -> List[str]:
+    return [v.strip() if type(v) is str else ("" if v is None else str(v).strip()) for v in values]
+
+
+def _explain(check: Callable, values, bad: Sequence[int], field: str, out: list) -> Errors:
+    """Run the scalar check on the values the fast path rejected (it may still accept some)."""
+    errors = []
+    for i in bad:
+        try:
+            out[i] = check(values[i], field)
+        except ValidationError as e:
+            errors.append((i, str(e)))
+    return errors
+
+
+def ids_column(values: Sequence, field: str = "id", optional: bool = False) -> Tuple[list, Errors]:
+    out = _text(values)
+    match = ID_RE.fullmatch
+    bad = [i for i, v in enumerate(out) if not match(v) and not (optional and not v)]
+    if optional:
+        out = [v or None for v in out]
+    return out, _explain(check_id, values, bad, field, out)
+
+
+def names_column(values: Sequence, field: str = "name") -> Tuple[list, Errors]:
+    out = [" ".join(v.split()) for v in _text(values)]
+    return out, _explain(check_name, values, [i for i, v in enumerate(out) if not v], field, out)
+
+
+def ages_column(values: Sequence, field: str = "age") -> Tuple[list, Errors]:
+    out, bad = [], []
+    for i, v in enumerate(values):
+        if type(v) is int and AGE_MIN <= v <= AGE_MAX:
+            out.append(v); continue
+        s = v.strip() if isinstance(v, str) else ""
+        if s.isascii() and s.isdigit() and AGE_MIN <= int(s) <= AGE_MAX:
+            out.append(int(s))
+        else:
+            out.append(None); bad.append(i)
+    return out, _explain(check_age, values, bad, field, out)
+
+
+def emails_column(values: Sequence, field: str = "email") -> Tuple[list, Errors]:
+    out = _text(values)
+    match = EMAIL_RE.fullmatch
+    bad = [i for i, v in enumerate(out) if not match(v)]
+    for i in [i for i, v in enumerate(out) if not v.islower()]:  # upper case somewhere
+        local, _, domain = out[i].rpartition("@")
+        out[i] = f"{local}@{domain.lower()}"
+    return out, _explain(check_email, values, bad, field, out)
+
+
+def capacities_column(values: Sequence, field: str = "capacity") -> Tuple[list, Errors]:
+    out, bad = [], []
+    for i, v in enumerate(values):
+        s = v.strip() if isinstance(v, str) else v
+        if s is None or s == "":
+            out.append(None)
+        elif type(s) is int and s >= 0 or isinstance(s, str) and s.isascii() and s.isdigit():
+            out.append(int(s))
+        else:
+            out.append(None); bad.append(i)
+    return out, _explain(check_capacity, values, bad, field, out)
+
+
+BATCH: Dict[str, List[Tuple[str, Callable]]] = {
+    "students": [("student_id", ids_column), ("name", names_column), ("age", ages_column),
+                 ("email", emails_column)],
+    "instructors": [("instructor_id", ids_column), ("name", names_column), ("age", ages_column),
+                    ("email", emails_column)],
+    "courses": [("course_id", ids_column), ("course_name", names_column),
+                ("instructor_id", lambda v, f: ids_column(v, f, optional=True)), ("capacity", capacities_column)],
+    "registrations": [("student_id", ids_column), ("course_id", ids_column)],
+}
+
+
+def validate_columns(kind: str, columns: Mapping[str, Sequence]) -> Tuple[List[Tuple[int, tuple]], Errors]:
+    """Validate a table given as ``{field: values}`` (equal lengths; missing fields are empty).
+
+    Returns ``(clean, errors)``: ``(row index, record tuple)`` for every valid row
+    and ``(row index, message)`` with the first problem of every other row.
+    """
+    n = max((len(v) for v in columns.values()), default=0)
+    checked: List[list] = []
+    first_error: Dict[int, str] = {}
+    for field, check in BATCH[kind]:
+        out, errors = check(columns.get(field) or [None] * n, field)
+        checked.append(out)
+        for i, msg in errors:
+            first_error.setdefault(i, msg)
+    keep = bytearray(b"\x01") * n
+    for i in first_error:
+        keep[i] = 0
+    clean = list(compress(zip(count(), zip(*checked)), keep))
+    return clean, sorted(first_error.items())
+
+
+def validate_records(kind: str, records: Sequence[Mapping]) -> Tuple[List[Tuple[int, tuple]], Errors]:
+    """:func:`validate_columns` for a list of mappings (e.g. ``csv.DictReader`` rows)."""
+    return validate_columns(kind, {f: [r.get(f) for r in records] for f, _ in BATCH[kind]})
@@ -0,0 +1,220 @@
+"""Cached Records rows shared by both GUIs, kept current from ``change_log``.
+
+:class:`RecordsModel` holds the unsearched, unfiltered rows of the Students,
+Instructors and Courses tables (the tuples of ``records.*_rows``), built once
+with one grouped query per related table. :meth:`RecordsModel.refresh` reads the
+change-log entries since the sequence number the cache reflects (see
+``changelog.changes_since``) and re-reads only the rows they touch, including
+the rows that show a changed name: a renamed course appears in its students'
+and its instructor's rows, a renamed student in their courses' rows, a renamed
+instructor in their courses' rows. With more than ``max_changes`` entries, or
+when entries were truncated from the log or the file was replaced, it rebuilds
+instead.
+
+Listeners registered with :meth:`RecordsModel.subscribe` are called with
+``(table, rows, keys)`` for every table whose rows changed, on the thread that
+ran the refresh; ``keys`` are the keys re-read (a superset of those whose rows
+changed), or None after a rebuild. GUIs hand the call to their event loop
+themselves. Searches,
+fuzzy matches and filtered pages still go to ``records`` directly.
+
+Usage::
+
+    python viewmodel.py --db school.db    # time a build and an incremental refresh
+"""
+
+import argparse
+import bisect
+import json
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import changelog
+import db as DB
+import records
+
+TABLES = ("students", "instructors", "courses")
+MAX_CHANGES = 5000  # log entries beyond which rebuilding is cheaper than patching
+_ROWS = {"students": records.student_rows, "instructors": records.instructor_rows, "courses": records.course_rows}
+
+Listener = Callable[[str, List[tuple], Optional[Set[str]]], None]
+
+
+def _related(db_path: str, sql: str, keys: Iterable[str]) -> Set[str]:
+    keys = list(keys)
+    if not keys:
+        return set()
+    with DB.connect(db_path) as con:
+        return {r[0] for r in con.execute(sql, (json.dumps(keys),)) if r[0] is not None}
+
+
+def _teachers(db_path: str, course_ids: Optional[Iterable[str]] = None) -> Dict[str, Optional[str]]:
+    """course_id -> instructor_id, for ``course_ids`` or every course."""
+    with DB.connect(db_path) as con:
+        if course_ids is None:
+            return dict(con.execute("SELECT course_id, instructor_id FROM courses"))
+        return dict(con.execute("SELECT course_id, instructor_id FROM courses "
+                                "WHERE course_id IN (SELECT value FROM json_each(?))",
+                                (json.dumps(list(course_ids)),)))
+
+
+class RecordsModel:
+    """Records rows of every table, cached until the database changes. Thread-safe."""
+
+    def __init__(self, db_path: str = DB.DEFAULT_DB, max_changes: int = MAX_CHANGES):
+        self.db_path, self.max_changes = db_path, max_changes
+        self.seq: Optional[int] = None         # change_log position the cache reflects; None = not built
+        self.stats = dict(builds=0, updates=0, rows_read=0)
+        self._rows: Dict[str, Dict[str, tuple]] = {}
+        self._keys: Dict[str, List[str]] = {}  # sorted, parallel to _lists
+        self._lists: Dict[str, List[tuple]] = {}
+        self._teacher: Dict[str, Optional[str]] = {}
+        self._listeners: List[Listener] = []
+        self._lock = threading.RLock()
+
+    def subscribe(self, listener: Listener) -> Callable[[], None]:
+        """Call ``listener(table, rows, keys)`` after each refresh that changes ``table``; returns an unsubscribe function."""
+        with self._lock:
+            self._listeners.append(listener)
+        def unsubscribe():
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+        return unsubscribe
+
+    def rows(self, table: str) -> List[tuple]:
+        """Every row of ``table`` as of now, by primary key; the list must not be modified."""
+        self.refresh()
+        with self._lock:
+            return self._lists[table]
+
+    def cached(self, table: str) -> Optional[List[tuple]]:
+        """The rows of ``table`` as of the last refresh, without reading the database; None before the first."""
+        with self._lock:
+            return self._lists.get(table)
+
+    def refresh(self) -> List[str]:
+        """Bring the cache up to date and notify listeners; returns the tables that changed."""
+        with self._lock:
+            changed = self._update()
+            lists = [(t, self._lists[t], keys) for t, keys in changed.items()]
+            listeners = list(self._listeners)
+        for table, rows, keys in lists:
+            for listener in listeners:
+                listener(table, rows, keys)
+        return list(changed)
+
+    def invalidate(self):
+        """Forget the cache, e.g. after the database file was swapped for a backup."""
+        with self._lock:
+            self.seq = None
+
+    # internals (called with the lock held) -----------------------------------
+    def _update(self) -> Dict[str, Optional[Set[str]]]:
+        """Changed tables -> the keys re-read, or None when rebuilt."""
+        if self.seq is None:
+            return self._build()
+        latest = changelog.latest_seq(self.db_path)
+        if latest == self.seq:
+            return {}
+        entries = changelog.changes_since(self.seq, self.db_path, limit=self.max_changes + 1)
+        if latest < self.seq or len(entries) > self.max_changes or (entries and entries[0]["seq"] != self.seq + 1):
+            return self._build()  # a new file, too many changes, or entries truncated from the log
+        if not entries:
+            self.seq = latest
+            return {}
+        dirty = self._dirty(entries)
+        changed = {t: dirty[t] for t in TABLES if dirty[t] and self._patch(t, dirty[t])}
+        self.seq = entries[-1]["seq"]
+        self.stats["updates"] += 1
+        return changed
+
+    def _build(self) -> Dict[str, Optional[Set[str]]]:
+        seq = changelog.latest_seq(self.db_path)  # read first: later writes are re-read by the next refresh
+        self._teacher = _teachers(self.db_path)
+        for table in TABLES:
+            rows = _ROWS[table](db_path=self.db_path)
+            self._rows[table] = {records.key_of(r): r for r in rows}
+            self._keys[table] = [records.key_of(r) for r in rows]
+            self._lists[table] = rows
+            self.stats["rows_read"] += len(rows)
+        self.seq = seq
+        self.stats["builds"] += 1
+        return dict.fromkeys(TABLES)
+
+    def _dirty(self, entries: List[Dict]) -> Dict[str, Set[str]]:
+        """Keys per table whose rows may show something an entry changed."""
+        dirty = {t: set() for t in TABLES}
+        renamed = {t: set() for t in TABLES}  # names shown in other tables' rows
+        for e in entries:
+            keys = [e["key"]] + ([e["old_key"]] if e["old_key"] else [])
+            entity = e["entity"]
+            if entity == "registrations":
+                for k in keys:
+                    student, course = k.split(changelog.KEY_SEP, 1)
+                    dirty["students"].add(student); dirty["courses"].add(course)
+                continue
+            dirty[entity].update(keys)
+            if e["op"] == "U" and ("name" in e["columns"] or "course_name" in e["columns"]):
+                renamed[entity].update(keys)
+        # key renames and deletes cascade to registrations and courses, which log their own entries
+        dirty["courses"] |= _related(self.db_path, "SELECT course_id FROM registrations "
+                                     "WHERE student_id IN (SELECT value FROM json_each(?))", renamed["students"])
+        dirty["courses"] |= _related(self.db_path, "SELECT course_id FROM courses "
+                                     "WHERE instructor_id IN (SELECT value FROM json_each(?))", renamed["instructors"])
+        dirty["students"] |= _related(self.db_path, "SELECT student_id FROM registrations "
+                                      "WHERE course_id IN (SELECT value FROM json_each(?))", renamed["courses"])
+        # a course's instructor before and after the change: both rows list it
+        now = _teachers(self.db_path, dirty["courses"])
+        for course in dirty["courses"]:
+            for teacher in (self._teacher.pop(course, None), now.get(course)):
+                if teacher is not None:
+                    dirty["instructors"].add(teacher)
+        self._teacher.update(now)
+        return dirty
+
+    def _patch(self, table: str, keys: Set[str]) -> bool:
+        """Re-read ``keys`` of ``table``; whether any row was added, removed or modified."""
+        cached, order = self._rows[table], self._keys[table]
+        fresh = {records.key_of(r): r for r in _ROWS[table](db_path=self.db_path, keys=keys)}
+        self.stats["rows_read"] += len(fresh)
+        rows = list(self._lists[table])  # a copy: listeners may still be showing the old list
+        changed = False
+        for k in keys:
+            row, i = fresh.get(k), bisect.bisect_left(order, k)
+            if row is None:
+                if cached.pop(k, None) is not None:
+                    del order[i], rows[i]
+                    changed = True
+            elif k not in cached:
+                cached[k] = row
+                order.insert(i, k); rows.insert(i, row)
+                changed = True
+            elif cached[k] != row:
+                cached[k] = rows[i] = row
+                changed = True
+        if changed:
+            self._lists[table] = rows
+        return changed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=DB.DEFAULT_DB)
+    a = ap.parse_args(argv)
+    DB.init_db(a.db)
+    model = RecordsModel(a.db)
+    t0 = time.perf_counter()
+    model.refresh()
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    model.refresh()
+    print(f"build: {t_build:.3f}s for {sum(len(model.rows(t)) for t in TABLES)} rows; "
+          f"refresh with no changes: {(time.perf_counter() - t0) * 1e3:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())